@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import numpy_helper
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+from nn_verification_visualisation.controller.process_manager.network_modifier import NetworkModifier
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools"))
+
+from qs_common import PROFILING_OUT_DIR, ensure_output_dir, write_csv, write_json
+from generate_test_model import build_model
+
+REPEATS = 3
+INPUT_DIM = 4
+OUTPUT_DIM = 2
+HIDDEN_WIDTHS = [100, 250, 500, 1000, 2000]
+HIDDEN_LAYERS = 2
+NUM_DIRECTIONS = 16
+SELECTED_NEURONS = [(1, 0), (HIDDEN_LAYERS, 1)]
+
+
+def _as_double_model(model: onnx.ModelProto) -> onnx.ModelProto:
+    """
+    Copy of the model whose initializers are stored as float64, so the normalization has to convert every tensor.
+    """
+    converted = onnx.ModelProto()
+    converted.CopyFrom(model)
+    for element in converted.graph.initializer:
+        array = numpy_helper.to_array(element).astype(np.float64)
+        element.CopyFrom(numpy_helper.from_array(array, element.name))
+    return converted
+
+
+def _copy(model: onnx.ModelProto) -> onnx.ModelProto:
+    copied = onnx.ModelProto()
+    copied.CopyFrom(model)
+    return copied
+
+
+def _time_ms(function, setup=None) -> float:
+    """
+    :param setup: called before every run outside of the timing, its result is passed to function
+    """
+    runs = []
+    for _ in range(REPEATS):
+        arguments = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        function(*arguments)
+        runs.append((time.perf_counter() - start) * 1000)
+    return round(float(statistics.median(runs)), 3)
+
+
+def _enter_tapped_network(modifier: NetworkModifier, model: onnx.ModelProto, directions) -> None:
+    with modifier.tapped_network(model, SELECTED_NEURONS, directions):
+        pass
+
+
+def run_modifier_benchmark() -> list[dict]:
+    directions = AlgorithmExecutor().calculate_directions(NUM_DIRECTIONS)
+    modifier = NetworkModifier()
+    rows = []
+    for width in HIDDEN_WIDTHS:
+        model = build_model(input_dim=INPUT_DIM, hidden_dims=[width] * HIDDEN_LAYERS, output_dim=OUTPUT_DIM, seed=42)
+        double_model = _as_double_model(model)
+        parameter_count = int(sum(np.prod(element.dims) for element in model.graph.initializer))
+
+        def normalize(copied: onnx.ModelProto):
+            NetworkModifier.change_initialiser_data_format(modifier, copied)
+
+        rows.append(
+            {
+                "hidden_width": width,
+                "parameter_count": parameter_count,
+                # the normalization changes the model in place, the fresh copies are not timed
+                "normalize_float64_ms": _time_ms(normalize, lambda: _copy(double_model)),
+                "normalize_float32_ms": _time_ms(normalize, lambda: _copy(model)),
+                "custom_output_layer_ms": _time_ms(
+                    lambda: modifier.custom_output_layer(model, SELECTED_NEURONS, directions)
+                ),
+                "tapped_output_layer_ms": _time_ms(
+                    lambda: modifier.tapped_output_layer(model, SELECTED_NEURONS, directions)
+                ),
+                "tapped_network_ms": _time_ms(lambda: _enter_tapped_network(modifier, model, directions)),
+                "bridge_model_bytes": modifier.custom_output_layer(model, SELECTED_NEURONS, directions).ByteSize(),
+                "tapped_model_bytes": modifier.tapped_output_layer(model, SELECTED_NEURONS, directions).ByteSize(),
+            }
+        )
+        print(rows[-1])
+    return rows
+
+
+def main() -> None:
+    ensure_output_dir(PROFILING_OUT_DIR)
+    rows = run_modifier_benchmark()
+    write_json(PROFILING_OUT_DIR / "modifier_benchmark_results.json", rows)
+    write_csv(
+        PROFILING_OUT_DIR / "modifier_benchmark_metrics.csv",
+        rows,
+        [
+            "hidden_width",
+            "parameter_count",
+            "normalize_float64_ms",
+            "normalize_float32_ms",
+            "custom_output_layer_ms",
+            "tapped_output_layer_ms",
+            "tapped_network_ms",
+            "bridge_model_bytes",
+            "tapped_model_bytes",
+        ],
+    )
+    print({"modifier_benchmark_cases": len(rows)})
+
+
+if __name__ == "__main__":
+    main()
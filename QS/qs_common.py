@@ -19,6 +19,8 @@ import onnx
 import onnxruntime as ort
 from matplotlib.patches import FancyArrowPatch, FancyBboxPatch
 
+from nn_verification_visualisation.controller.process_manager.polygon import polygon_from_bounds
+
 ROOT = Path(__file__).resolve().parents[1]
 QS_DIR = ROOT / "QS"
 GUI_OUT_DIR = QS_DIR / "GUI"
@@ -162,48 +164,7 @@ def write_neuron_variation_plot(rows: list[dict], output_path: Path) -> None:
 
 
 def compute_polygon(bounds: list[tuple[float, float]], directions: list[tuple[float, float]]) -> list[tuple[float, float]]:
-    def clip_polygon(poly: list[tuple[float, float]], a: float, b: float, c: float):
-        def inside(point: tuple[float, float]) -> bool:
-            return a * point[0] + b * point[1] <= c + 1e-9
-
-        def intersect(point1: tuple[float, float], point2: tuple[float, float]):
-            x1, y1 = point1
-            x2, y2 = point2
-            dx = x2 - x1
-            dy = y2 - y1
-            denom = a * dx + b * dy
-            if abs(denom) < 1e-12:
-                return point2
-            t = (c - a * x1 - b * y1) / denom
-            return (x1 + t * dx, y1 + t * dy)
-
-        out: list[tuple[float, float]] = []
-        for index in range(len(poly)):
-            curr = poly[index]
-            prev = poly[index - 1]
-            curr_in = inside(curr)
-            prev_in = inside(prev)
-            if curr_in:
-                if not prev_in:
-                    out.append(intersect(prev, curr))
-                out.append(curr)
-            elif prev_in:
-                out.append(intersect(prev, curr))
-        return out
-
-    max_bound = max(abs(value) for (low, high) in bounds for value in (low, high))
-    margin = max(5.0, max_bound * 2.0 + 1.0)
-    poly: list[tuple[float, float]] = [(-margin, -margin), (margin, -margin), (margin, margin), (-margin, margin)]
-
-    for index, (low, high) in enumerate(bounds):
-        a, b = directions[index]
-        poly = clip_polygon(poly, a, b, high)
-        if not poly:
-            break
-        poly = clip_polygon(poly, -a, -b, -low)
-        if not poly:
-            break
-    return poly
+    return polygon_from_bounds(bounds, directions)
 
 
 def polygon_area(points: list[tuple[float, float]]) -> float:
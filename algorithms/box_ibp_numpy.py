@@ -2,121 +2,98 @@ ALGORITHM_NAME = "Box IBP (NumPy)"
 IS_DETERMINISTIC = True
 
 import numpy as np
-from onnx import numpy_helper
 
+from nn_verification_visualisation.controller.process_manager.network_compiler import compile_network, split_weight, \
+    interval_gemm, interval_conv, interval_affine
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
 
-def _initializer_map(onnx_model) -> dict[str, np.ndarray]:
-    return {
-        initializer.name: np.asarray(numpy_helper.to_array(initializer), dtype=np.float64)
-        for initializer in onnx_model.graph.initializer
-    }
 
+def calculate_output_bounds_ir_batched(network: NetworkIR, input_bounds: np.ndarray) -> np.ndarray:
+    """
+    Box interval propagation of several input boxes at once, e.g. every saved bound set of a network
+    or every region of a split input. The network is read once and every Gemm is a single matrix-matrix product
+    for all boxes, every Conv a single im2col product per weight sign.
+    :param network: the decoded network
+    :param input_bounds: np.ndarray (B, N, 2) with [lower, upper] per box and input
+    :return: np.ndarray (B, M, 2), the output bounds per box
+    """
+    input_bounds = np.asarray(input_bounds)
+    if input_bounds.ndim != 3 or input_bounds.shape[2] != 2:
+        raise ValueError("input_bounds must have shape (B, N, 2).")
+
+    steps = compile_network(network, input_bounds.shape[1])
+    input_name = network.input_name
+    # one row of flattened features per box
+    lower_bounds: dict[str, np.ndarray] = {input_name: input_bounds[:, :, 0].astype(np.float64, copy=True)}
+    upper_bounds: dict[str, np.ndarray] = {input_name: input_bounds[:, :, 1].astype(np.float64, copy=True)}
+
+    for op_type, inputs, output_name, parameters in steps:
+        lower, upper = lower_bounds[inputs[0]], upper_bounds[inputs[0]]
+        if op_type == "Gemm":
+            weight, bias = parameters
+            out_lower, out_upper = interval_gemm(lower, upper, split_weight(weight), bias)
+        elif op_type == "Conv":
+            weight, bias, geometry = parameters
+            out_lower, out_upper = interval_conv(lower, upper, np.maximum(weight, 0.0), np.minimum(weight, 0.0),
+                                                 bias, geometry)
+        elif op_type == "Affine":
+            out_lower, out_upper = interval_affine(lower, upper, *parameters)
+        elif op_type == "Sum":
+            other_lower, other_upper = lower_bounds[inputs[1]], upper_bounds[inputs[1]]
+            if parameters[0] > 0:
+                out_lower, out_upper = lower + other_lower, upper + other_upper
+            else:
+                out_lower, out_upper = lower - other_upper, upper - other_lower
+        elif op_type == "Reshape":
+            out_lower, out_upper = lower, upper
+        elif op_type == "Relu":
+            in_place = parameters[0]
+            out_lower = np.maximum(lower, 0.0, out=lower if in_place else None)
+            out_upper = np.maximum(upper, 0.0, out=upper if in_place else None)
+        elif op_type == "Gather":
+            out_lower = lower[:, parameters[0]]
+            out_upper = upper[:, parameters[0]]
+        else:
+            out_lower = np.concatenate([lower_bounds[name] for name in inputs], axis=1)
+            out_upper = np.concatenate([upper_bounds[name] for name in inputs], axis=1)
 
-def _apply_gemm(
-    lower: np.ndarray,
-    upper: np.ndarray,
-    weight: np.ndarray,
-    bias: np.ndarray | None,
-) -> tuple[np.ndarray, np.ndarray]:
-    weight_pos = np.maximum(weight, 0.0)
-    weight_neg = np.minimum(weight, 0.0)
+        lower_bounds[output_name] = out_lower
+        upper_bounds[output_name] = out_upper
 
-    out_lower = lower @ weight_pos + upper @ weight_neg
-    out_upper = upper @ weight_pos + lower @ weight_neg
+    output_name = network.output_names[0]
+    if output_name not in lower_bounds or output_name not in upper_bounds:
+        raise ValueError(f"Could not compute bounds for output tensor {output_name!r}.")
 
-    if bias is not None:
-        out_lower = out_lower + bias
-        out_upper = out_upper + bias
+    return np.stack([lower_bounds[output_name], upper_bounds[output_name]], axis=2)
 
-    return out_lower, out_upper
 
+def calculate_output_bounds_batched(onnx_model, input_bounds: np.ndarray) -> np.ndarray:
+    """
+    See calculate_output_bounds_ir_batched.
+    """
+    return calculate_output_bounds_ir_batched(NetworkIR.from_model(onnx_model), input_bounds)
 
-def calculate_output_bounds(onnx_model, input_bounds: np.ndarray) -> np.ndarray:
+
+def calculate_output_bounds_ir(network: NetworkIR, input_bounds: np.ndarray) -> np.ndarray:
     """
     NumPy-only box interval propagation for feedforward ONNX models made from:
-    - Gemm
+    - Gemm, MatMul (+ Add) and 2D Conv
+    - Add / Sub / Mul / Div with constants, e.g. input normalization, and BatchNormalization
+    - Flatten and Reshape
     - Relu
+    - Gather / Concat on the feature axis (graph-tap output heads)
 
-    This is intended to work for TestFiles/NN1.onnx and similar MLP-style models.
+    This is intended to work for TestFiles/NN1.onnx and similar MLP- or CNN-style models.
+    See calculate_output_bounds_ir_batched for several input boxes.
     """
     if input_bounds.ndim != 2 or input_bounds.shape[1] != 2:
         raise ValueError("input_bounds must have shape (N, 2).")
 
-    initializers = _initializer_map(onnx_model)
-    lower_bounds: dict[str, np.ndarray] = {
-        onnx_model.graph.input[0].name: input_bounds[:, 0].astype(np.float64, copy=True).reshape(1, -1)
-    }
-    upper_bounds: dict[str, np.ndarray] = {
-        onnx_model.graph.input[0].name: input_bounds[:, 1].astype(np.float64, copy=True).reshape(1, -1)
-    }
-
-    for node in onnx_model.graph.node:
-        if node.op_type == "Gemm":
-            if len(node.input) < 2:
-                raise ValueError(f"Gemm node {node.name!r} is missing inputs.")
-
-            inp_name = node.input[0]
-            weight_name = node.input[1]
-            bias_name = node.input[2] if len(node.input) > 2 and node.input[2] else None
-
-            if inp_name not in lower_bounds or inp_name not in upper_bounds:
-                raise ValueError(f"Missing interval for input tensor {inp_name!r}.")
-            if weight_name not in initializers:
-                raise ValueError(f"Gemm weight initializer {weight_name!r} was not found.")
-
-            trans_a = 0
-            trans_b = 0
-            alpha = 1.0
-            beta = 1.0
-            for attribute in node.attribute:
-                if attribute.name == "transA":
-                    trans_a = attribute.i
-                elif attribute.name == "transB":
-                    trans_b = attribute.i
-                elif attribute.name == "alpha":
-                    alpha = attribute.f
-                elif attribute.name == "beta":
-                    beta = attribute.f
-
-            if trans_a:
-                raise ValueError(f"Gemm node {node.name!r} uses transA=1, which is not supported.")
-
-            weight = initializers[weight_name]
-            if trans_b:
-                weight = weight.T
-            weight = alpha * weight
-
-            bias = None
-            if bias_name is not None:
-                if bias_name not in initializers:
-                    raise ValueError(f"Gemm bias initializer {bias_name!r} was not found.")
-                bias = beta * initializers[bias_name].reshape(1, -1)
-
-            out_lower, out_upper = _apply_gemm(lower_bounds[inp_name], upper_bounds[inp_name], weight, bias)
-        elif node.op_type == "Relu":
-            inp_name = node.input[0]
-            if inp_name not in lower_bounds or inp_name not in upper_bounds:
-                raise ValueError(f"Missing interval for input tensor {inp_name!r}.")
-            out_lower = np.maximum(lower_bounds[inp_name], 0.0)
-            out_upper = np.maximum(upper_bounds[inp_name], 0.0)
-        else:
-            raise ValueError(
-                f"Unsupported ONNX operator {node.op_type!r} in node {node.name!r}. "
-                "This NumPy box algorithm currently supports Gemm and Relu only."
-            )
-
-        output_name = node.output[0]
-        lower_bounds[output_name] = out_lower
-        upper_bounds[output_name] = out_upper
+    return calculate_output_bounds_ir_batched(network, input_bounds[np.newaxis])[0]
 
-    output_name = onnx_model.graph.output[0].name
-    if output_name not in lower_bounds or output_name not in upper_bounds:
-        raise ValueError(f"Could not compute bounds for output tensor {output_name!r}.")
 
-    return np.stack(
-        [
-            lower_bounds[output_name].reshape(-1),
-            upper_bounds[output_name].reshape(-1),
-        ],
-        axis=1,
-    )
+def calculate_output_bounds(onnx_model, input_bounds: np.ndarray) -> np.ndarray:
+    """
+    See calculate_output_bounds_ir, the network is decoded first.
+    """
+    return calculate_output_bounds_ir(NetworkIR.from_model(onnx_model), input_bounds)
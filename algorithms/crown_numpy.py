@@ -0,0 +1,221 @@
+ALGORITHM_NAME = "CROWN (NumPy)"
+IS_DETERMINISTIC = True
+
+import numpy as np
+
+from nn_verification_visualisation.controller.process_manager.network_compiler import compile_network, split_weight, \
+    interval_gemm, interval_conv, interval_affine
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
+
+
+def _conv_transpose(rows: np.ndarray, weight: np.ndarray, geometry: tuple) -> np.ndarray:
+    """
+    Adjoint of network_compiler.conv: maps coefficients of the output features to coefficients of the input features,
+    one kernel position at a time.
+    :return: np.ndarray (rows, input features)
+    """
+    input_shape, strides, pads, dilations, group, output_shape = geometry
+    count = rows.shape[0]
+    coefficients = rows.reshape((count,) + output_shape)
+    channels, height, width = input_shape
+    padded = np.zeros((count, channels, height + pads[0] + pads[2], width + pads[1] + pads[3]))
+    group_channels = weight.shape[1]
+    group_outputs = weight.shape[0] // group
+    last_row = strides[0] * (output_shape[1] - 1) + 1
+    last_column = strides[1] * (output_shape[2] - 1) + 1
+    for index in range(group):
+        group_coefficients = coefficients[:, index * group_outputs:(index + 1) * group_outputs]
+        group_weight = weight[index * group_outputs:(index + 1) * group_outputs]
+        target = padded[:, index * group_channels:(index + 1) * group_channels]
+        for row in range(weight.shape[2]):
+            top = row * dilations[0]
+            for column in range(weight.shape[3]):
+                left = column * dilations[1]
+                # (count, output channels, height, width) x (output channels, channels)
+                contribution = np.tensordot(group_coefficients, group_weight[:, :, row, column], axes=([1], [0]))
+                target[:, :, top:top + last_row:strides[0], left:left + last_column:strides[1]] += \
+                    contribution.transpose(0, 3, 1, 2)
+    return padded[:, :, pads[0]:pads[0] + height, pads[1]:pads[1] + width].reshape(count, -1)
+
+
+def _relu_relaxation(lower: np.ndarray, upper: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Linear bounds lower_slope * x <= relu(x) <= upper_slope * x + upper_offset on [lower, upper].
+    Unstable neurons get the chord as upper bound and, as in CROWN, the lower slope 0 or 1 of smaller area.
+    """
+    unstable = (lower < 0.0) & (upper > 0.0)
+    upper_slope = (lower >= 0.0).astype(np.float64)
+    upper_slope[unstable] = upper[unstable] / (upper[unstable] - lower[unstable])
+    upper_offset = np.zeros_like(lower)
+    upper_offset[unstable] = -upper_slope[unstable] * lower[unstable]
+    lower_slope = (lower >= 0.0).astype(np.float64)
+    lower_slope[unstable] = (upper[unstable] > -lower[unstable]).astype(np.float64)
+    return lower_slope, upper_slope, upper_offset
+
+
+def _backward_bounds(
+    steps: list[tuple],
+    last_step: int,
+    target: str,
+    input_name: str,
+    input_bounds: np.ndarray,
+    sizes: dict[str, int],
+    relaxations: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Back-substitutes the identity of the target tensor through the steps up to last_step down to the input,
+    with separate coefficients for the lower and the upper bound, and evaluates the result on the input box.
+    :param relaxations: the ReLU relaxations of the steps before last_step, by step index
+    :return: lower and upper bound of every feature of the target
+    """
+    identity = np.eye(sizes[target])
+    # per tensor: coefficients of the lower and of the upper bound
+    coefficients: dict[str, list[np.ndarray]] = {target: [identity, identity.copy()]}
+    constants = [np.zeros(sizes[target]), np.zeros(sizes[target])]
+
+    def accumulate(name: str, lower: np.ndarray, upper: np.ndarray):
+        if name in coefficients:
+            coefficients[name][0] += lower
+            coefficients[name][1] += upper
+        else:
+            coefficients[name] = [lower, upper]
+
+    for index in range(last_step, -1, -1):
+        op_type, inputs, output_name, parameters = steps[index]
+        if output_name not in coefficients:
+            continue
+        lower_coefficients, upper_coefficients = coefficients.pop(output_name)
+        if op_type == "Gemm":
+            weight, bias = parameters
+            constants[0] += lower_coefficients @ bias
+            constants[1] += upper_coefficients @ bias
+            accumulate(inputs[0], lower_coefficients @ weight.T, upper_coefficients @ weight.T)
+        elif op_type == "Conv":
+            weight, bias, geometry = parameters
+            constants[0] += lower_coefficients @ bias
+            constants[1] += upper_coefficients @ bias
+            # both bounds in one transposed convolution
+            stacked = _conv_transpose(np.concatenate([lower_coefficients, upper_coefficients]), weight, geometry)
+            accumulate(inputs[0], stacked[:sizes[target]], stacked[sizes[target]:])
+        elif op_type == "Affine":
+            scale, shift = parameters
+            constants[0] += lower_coefficients @ shift
+            constants[1] += upper_coefficients @ shift
+            accumulate(inputs[0], lower_coefficients * scale, upper_coefficients * scale)
+        elif op_type == "Sum":
+            accumulate(inputs[0], lower_coefficients, upper_coefficients)
+            # a negative sign swaps which bound of the second tensor is needed
+            if parameters[0] > 0:
+                accumulate(inputs[1], lower_coefficients, upper_coefficients)
+            else:
+                accumulate(inputs[1], -lower_coefficients, -upper_coefficients)
+        elif op_type == "Reshape":
+            accumulate(inputs[0], lower_coefficients, upper_coefficients)
+        elif op_type == "Relu":
+            lower_slope, upper_slope, upper_offset = relaxations[index]
+            # the lower bound takes the lower relaxation for positive and the upper one for negative coefficients
+            positive, negative = np.maximum(lower_coefficients, 0.0), np.minimum(lower_coefficients, 0.0)
+            constants[0] += negative @ upper_offset
+            new_lower = positive * lower_slope + negative * upper_slope
+            positive, negative = np.maximum(upper_coefficients, 0.0), np.minimum(upper_coefficients, 0.0)
+            constants[1] += positive @ upper_offset
+            accumulate(inputs[0], new_lower, positive * upper_slope + negative * lower_slope)
+        elif op_type == "Gather":
+            new_lower = np.zeros((sizes[target], sizes[inputs[0]]))
+            new_upper = np.zeros((sizes[target], sizes[inputs[0]]))
+            np.add.at(new_lower.T, parameters[0], lower_coefficients.T)
+            np.add.at(new_upper.T, parameters[0], upper_coefficients.T)
+            accumulate(inputs[0], new_lower, new_upper)
+        else:
+            splits = np.cumsum([sizes[name] for name in inputs])[:-1]
+            for name, lower_part, upper_part in zip(inputs, np.split(lower_coefficients, splits, axis=1),
+                                                    np.split(upper_coefficients, splits, axis=1)):
+                accumulate(name, lower_part, upper_part)
+
+    if input_name in coefficients:
+        lower_coefficients, upper_coefficients = coefficients.pop(input_name)
+        center = (input_bounds[:, 0] + input_bounds[:, 1]) * 0.5
+        radius = (input_bounds[:, 1] - input_bounds[:, 0]) * 0.5
+        constants[0] += lower_coefficients @ center - np.abs(lower_coefficients) @ radius
+        constants[1] += upper_coefficients @ center + np.abs(upper_coefficients) @ radius
+    if coefficients:
+        raise ValueError(f"Could not back-substitute tensor {next(iter(coefficients))!r}.")
+    return constants[0], constants[1]
+
+
+def calculate_output_bounds_ir(network: NetworkIR, input_bounds: np.ndarray) -> np.ndarray:
+    """
+    NumPy-only CROWN / DeepPoly bound propagation for the models of box_ibp_numpy.py.
+    The network is run forward with interval bounds. Before every ReLU the bounds of its input are tightened by
+    back-substituting linear relaxations of all earlier ReLUs down to the input, the output bounds at the end.
+    The bounds of every layer are computed once and reused by the back-substitutions of later layers.
+    """
+    if input_bounds.ndim != 2 or input_bounds.shape[1] != 2:
+        raise ValueError("input_bounds must have shape (N, 2).")
+
+    input_bounds = input_bounds.astype(np.float64)
+    steps = compile_network(network, input_bounds.shape[0])
+    input_name = network.input_name
+    # interval bounds of every tensor, as one row of flattened features
+    lower_bounds: dict[str, np.ndarray] = {input_name: input_bounds[:, 0].reshape(1, -1)}
+    upper_bounds: dict[str, np.ndarray] = {input_name: input_bounds[:, 1].reshape(1, -1)}
+    sizes = {input_name: input_bounds.shape[0]}
+    relaxations: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+    tightened = {input_name}
+
+    def tighten(name: str, last_step: int):
+        if name in tightened:
+            return
+        lower, upper = _backward_bounds(steps, last_step, name, input_name, input_bounds, sizes, relaxations)
+        lower_bounds[name] = np.maximum(lower_bounds[name], lower)
+        upper_bounds[name] = np.minimum(upper_bounds[name], upper)
+        tightened.add(name)
+
+    for index, (op_type, inputs, output_name, parameters) in enumerate(steps):
+        lower, upper = lower_bounds[inputs[0]], upper_bounds[inputs[0]]
+        if op_type == "Gemm":
+            weight, bias = parameters
+            out_lower, out_upper = interval_gemm(lower, upper, split_weight(weight), bias)
+        elif op_type == "Conv":
+            weight, bias, geometry = parameters
+            out_lower, out_upper = interval_conv(lower, upper, np.maximum(weight, 0.0), np.minimum(weight, 0.0),
+                                                 bias, geometry)
+        elif op_type == "Affine":
+            out_lower, out_upper = interval_affine(lower, upper, *parameters)
+        elif op_type == "Sum":
+            other_lower, other_upper = lower_bounds[inputs[1]], upper_bounds[inputs[1]]
+            if parameters[0] > 0:
+                out_lower, out_upper = lower + other_lower, upper + other_upper
+            else:
+                out_lower, out_upper = lower - other_upper, upper - other_lower
+        elif op_type == "Reshape":
+            out_lower, out_upper = lower, upper
+        elif op_type == "Relu":
+            tighten(inputs[0], index - 1)
+            lower, upper = lower_bounds[inputs[0]], upper_bounds[inputs[0]]
+            relaxations[index] = _relu_relaxation(lower[0], upper[0])
+            out_lower, out_upper = np.maximum(lower, 0.0), np.maximum(upper, 0.0)
+        elif op_type == "Gather":
+            out_lower = lower[:, parameters[0]]
+            out_upper = upper[:, parameters[0]]
+        else:
+            out_lower = np.concatenate([lower_bounds[name] for name in inputs], axis=1)
+            out_upper = np.concatenate([upper_bounds[name] for name in inputs], axis=1)
+
+        lower_bounds[output_name] = out_lower
+        upper_bounds[output_name] = out_upper
+        sizes[output_name] = out_lower.shape[1]
+
+    output_name = network.output_names[0]
+    if output_name not in lower_bounds or output_name not in upper_bounds:
+        raise ValueError(f"Could not compute bounds for output tensor {output_name!r}.")
+    tighten(output_name, len(steps) - 1)
+
+    return np.stack([lower_bounds[output_name][0], upper_bounds[output_name][0]], axis=1)
+
+
+def calculate_output_bounds(onnx_model, input_bounds: np.ndarray) -> np.ndarray:
+    """
+    See calculate_output_bounds_ir, the network is decoded first.
+    """
+    return calculate_output_bounds_ir(NetworkIR.from_model(onnx_model), input_bounds)
@@ -1,24 +1,23 @@
 ALGORITHM_NAME = "Simple Zonotope"
 IS_DETERMINISTIC = True
+MAX_ORDER = 20  # generators per feature, order reduction encloses the smallest generators in a box above it
 
 import numpy as np
-from onnx import numpy_helper
 
-
-def _initializer_map(onnx_model) -> dict[str, np.ndarray]:
-    return {
-        initializer.name: np.asarray(numpy_helper.to_array(initializer), dtype=np.float64)
-        for initializer in onnx_model.graph.initializer
-    }
+from nn_verification_visualisation.controller.process_manager.network_compiler import compile_network, conv
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
 
 
-def _input_zonotope(input_bounds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+def _input_zonotope(input_bounds: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     lower = input_bounds[:, 0].astype(np.float64, copy=False)
     upper = input_bounds[:, 1].astype(np.float64, copy=False)
     center = (lower + upper) * 0.5
     radius = np.maximum(0.0, (upper - lower) * 0.5)
-    generators = np.diag(radius)
-    return center, generators
+    # noise symbol i is input i, fixed inputs need none
+    symbols = np.flatnonzero(radius)
+    generators = np.zeros((symbols.shape[0], center.shape[0]), dtype=np.float64)
+    generators[np.arange(symbols.shape[0]), symbols] = radius[symbols]
+    return center, generators, symbols
 
 
 def _zonotope_interval(center: np.ndarray, generators: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
@@ -26,6 +25,29 @@ def _zonotope_interval(center: np.ndarray, generators: np.ndarray) -> tuple[np.n
     return center - radius, center + radius
 
 
+def _generator_buffer(rows: int, features: int, spare_rows: int) -> np.ndarray:
+    """
+    Generator matrix of the given rows in a buffer with room for spare_rows more, see _extended_generators.
+    The spare rows are not written, so they cost no memory until they are used.
+    """
+    return np.empty((rows + spare_rows, features), dtype=np.float64)[:rows]
+
+
+def _extended_generators(generators: np.ndarray, new_rows: int, in_place: bool) -> np.ndarray:
+    """
+    :param in_place: whether the generators may be overwritten
+    :return: uninitialized generator matrix with new_rows more rows, that continues the buffer of the generators
+        in place if it has room, otherwise a new buffer that grows by half, so repeated growth is amortized
+    """
+    rows, features = generators.shape
+    buffer = generators.base
+    if (in_place and buffer is not None and buffer.ndim == 2 and buffer.flags.c_contiguous
+            and buffer.shape[0] >= rows + new_rows and buffer.shape[1] == features
+            and generators.ctypes.data == buffer.ctypes.data):
+        return buffer[:rows + new_rows]
+    return _generator_buffer(rows + new_rows, features, (rows + new_rows) // 2)
+
+
 def _apply_gemm(
     center: np.ndarray,
     generators: np.ndarray,
@@ -36,120 +58,205 @@ def _apply_gemm(
     if bias is not None:
         out_center = out_center + bias.reshape(-1)
 
-    if generators.size == 0:
-        out_generators = np.zeros((0, weight.shape[1]), dtype=np.float64)
-    else:
-        out_generators = generators @ weight
+    # room for the generators of a following ReLU, at most one per output
+    out_generators = _generator_buffer(generators.shape[0], weight.shape[1], weight.shape[1])
+    np.matmul(generators, weight, out=out_generators)
     return out_center, out_generators
 
 
-def _apply_relu(center: np.ndarray, generators: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+def _apply_relu(
+    center: np.ndarray,
+    generators: np.ndarray,
+    symbols: np.ndarray,
+    first_symbol: int,
+    in_place: bool,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    DeepZ ReLU transformer: an unstable neuron x in [lower, upper] is replaced by the parallelogram of minimal area,
+    slope * x + offset + offset * e with slope = upper / (upper - lower), offset = -slope * lower / 2
+    and a new noise symbol e per neuron. Stable neurons are kept or set to zero.
+    :param in_place: whether center and generators may be overwritten, the new generators then use the spare rows
+        of the generator buffer
+    """
     lower, upper = _zonotope_interval(center, generators)
 
-    stable_positive = lower >= 0.0
-    stable_negative = upper <= 0.0
-    unstable = ~(stable_positive | stable_negative)
+    unstable = (lower < 0.0) & (upper > 0.0)
+    slope = (lower >= 0.0).astype(np.float64)
+    slope[unstable] = upper[unstable] / (upper[unstable] - lower[unstable])
+    offset = np.zeros_like(center)
+    offset[unstable] = -0.5 * slope[unstable] * lower[unstable]
 
-    out_center = center.copy()
-    out_generators = generators.copy()
+    out_center = np.multiply(center, slope, out=center if in_place else None)
+    out_center += offset
 
-    if np.any(stable_negative):
-        out_center[stable_negative] = 0.0
-        if out_generators.size:
-            out_generators[:, stable_negative] = 0.0
+    unstable_indices = np.flatnonzero(unstable)
+    rows = generators.shape[0]
+    out_generators = _extended_generators(generators, len(unstable_indices), in_place)
+    # scaling the columns also moves the generators into the new buffer if there was no room
+    np.multiply(generators, slope, out=out_generators[:rows])
+    new_generators = out_generators[rows:]
+    new_generators.fill(0.0)
+    new_generators[np.arange(len(unstable_indices)), unstable_indices] = offset[unstable_indices]
+    symbols = np.concatenate([symbols, np.arange(first_symbol, first_symbol + len(unstable_indices))])
 
-    if np.any(unstable):
-        # For unstable ReLUs, fall back to the interval hull [0, upper].
-        # This is sound and keeps the implementation simple, at the cost of precision.
-        out_center[unstable] = upper[unstable] * 0.5
-        if out_generators.size:
-            out_generators[:, unstable] = 0.0
+    return out_center, out_generators, symbols
 
-        new_generators = np.zeros((int(np.sum(unstable)), center.shape[0]), dtype=np.float64)
-        unstable_indices = np.flatnonzero(unstable)
-        new_generators[np.arange(len(unstable_indices)), unstable_indices] = upper[unstable] * 0.5
-        out_generators = np.vstack([out_generators, new_generators]) if out_generators.size else new_generators
 
+def _reduce_order(
+    center: np.ndarray,
+    generators: np.ndarray,
+    symbols: np.ndarray,
+    first_symbol: int,
+    max_order: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Girard's order reduction for more than max_order generators per feature. Generators without effect are dropped
+    first. If still more than max_order * features remain, the ones with the smallest difference between their
+    1- and max-norm, i.e. the most box-like ones, are enclosed in a box of one new generator per feature, so that
+    at most max_order * features are left. The limit grows with the tensor, so wide layers are not turned into boxes.
+    :param first_symbol: first unused noise symbol, for the generators of the box
+    :param max_order: at least 1, a tensor of order 1 is a box
+    """
+    max_generators = max(max_order, 1) * center.shape[0]
+    if generators.shape[0] <= max_generators:
+        return center, generators, symbols
+    effective = np.any(generators != 0.0, axis=1)
+    if not effective.all():
+        generators, symbols = generators[effective], symbols[effective]
+        if generators.shape[0] <= max_generators:
+            return center, generators, symbols
+
+    magnitudes = np.abs(generators)
+    merged_count = generators.shape[0] - (max_generators - center.shape[0])
+    scores = magnitudes.sum(axis=1) - magnitudes.max(axis=1)
+    kept = np.ones(generators.shape[0], dtype=bool)
+    kept[np.argpartition(scores, merged_count - 1)[:merged_count]] = False
+
+    radius = magnitudes[~kept].sum(axis=0)
+    features = np.flatnonzero(radius)
+    box = np.zeros((features.shape[0], center.shape[0]), dtype=np.float64)
+    box[np.arange(features.shape[0]), features] = radius[features]
+    return (center, np.vstack([generators[kept], box]),
+            np.concatenate([symbols[kept], np.arange(first_symbol, first_symbol + features.shape[0])]))
+
+
+def _apply_gather(center: np.ndarray, generators: np.ndarray, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return center[indices], generators[:, indices]
+
+
+def _aligned_generators(
+    states: list[tuple[np.ndarray, np.ndarray, np.ndarray]],
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    # Generator rows are noise symbols shared between tensors. Tensors from earlier layers lack the symbols
+    # introduced after them and order reduction replaces symbols, so all generators are brought to the union
+    # of the symbols, with zero rows for the missing ones.
+    symbols = states[0][2]
+    if all(np.array_equal(symbols, own_symbols) for _, _, own_symbols in states[1:]):
+        return symbols, [generators for _, generators, _ in states]
+    symbols = np.unique(np.concatenate([own_symbols for _, _, own_symbols in states]))
+    aligned = []
+    for _, generators, own_symbols in states:
+        rows = np.zeros((symbols.shape[0], generators.shape[1]), dtype=np.float64)
+        rows[np.searchsorted(symbols, own_symbols)] = generators
+        aligned.append(rows)
+    return symbols, aligned
+
+
+def _apply_concat(
+    states: list[tuple[np.ndarray, np.ndarray, np.ndarray]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    symbols, aligned = _aligned_generators(states)
+    return np.concatenate([center for center, _, _ in states]), np.hstack(aligned), symbols
+
+
+def _apply_conv(
+    center: np.ndarray,
+    generators: np.ndarray,
+    weight: np.ndarray,
+    bias: np.ndarray,
+    geometry: tuple,
+) -> tuple[np.ndarray, np.ndarray]:
+    out_center = conv(center.reshape(1, -1), weight, geometry)[0] + bias
+    # all generators in one im2col product, with room for the generators of a following ReLU
+    out_generators = _generator_buffer(generators.shape[0], bias.shape[0], bias.shape[0])
+    conv(generators, weight, geometry, out=out_generators)
     return out_center, out_generators
 
 
-def calculate_output_bounds(onnx_model, input_bounds: np.ndarray) -> np.ndarray:
+def _apply_affine(
+    center: np.ndarray,
+    generators: np.ndarray,
+    scale: np.ndarray,
+    shift: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    return center * scale + shift, generators * scale
+
+
+def _apply_sum(
+    states: list[tuple[np.ndarray, np.ndarray, np.ndarray]],
+    sign: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    symbols, (generators, other_generators) = _aligned_generators(states)
+    return states[0][0] + sign * states[1][0], generators + sign * other_generators, symbols
+
+
+def calculate_output_bounds_ir(network: NetworkIR, input_bounds: np.ndarray) -> np.ndarray:
     """
     Sound zonotope-style propagation for feedforward ONNX models made from:
-    - Gemm
+    - Gemm, MatMul (+ Add) and 2D Conv
+    - Add / Sub / Mul / Div with constants, e.g. input normalization, and BatchNormalization
+    - Flatten and Reshape
     - Relu
+    - Gather / Concat on the feature axis (graph-tap output heads)
 
     Linear layers preserve the full zonotope.
-    Unstable ReLUs are overapproximated by replacing the affected coordinate with
-    an independent interval hull [0, upper], which is sound but coarse.
+    Unstable ReLUs are overapproximated by the DeepZ transformer, see _apply_relu.
+    After every ReLU the generators are reduced to at most MAX_ORDER per feature, see _reduce_order.
     """
     if input_bounds.ndim != 2 or input_bounds.shape[1] != 2:
         raise ValueError("input_bounds must have shape (N, 2).")
 
-    initializers = _initializer_map(onnx_model)
-    tensor_state: dict[str, tuple[np.ndarray, np.ndarray]] = {
-        onnx_model.graph.input[0].name: _input_zonotope(input_bounds)
+    steps = compile_network(network, input_bounds.shape[0])
+    # zonotopes of the flattened features: center, generators and the noise symbol of every generator
+    tensor_state: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {
+        network.input_name: _input_zonotope(input_bounds)
     }
-
-    for node in onnx_model.graph.node:
-        if node.op_type == "Gemm":
-            if len(node.input) < 2:
-                raise ValueError(f"Gemm node {node.name!r} is missing inputs.")
-
-            inp_name = node.input[0]
-            weight_name = node.input[1]
-            bias_name = node.input[2] if len(node.input) > 2 and node.input[2] else None
-
-            if inp_name not in tensor_state:
-                raise ValueError(f"Missing zonotope for input tensor {inp_name!r}.")
-            if weight_name not in initializers:
-                raise ValueError(f"Gemm weight initializer {weight_name!r} was not found.")
-
-            trans_a = 0
-            trans_b = 0
-            alpha = 1.0
-            beta = 1.0
-            for attribute in node.attribute:
-                if attribute.name == "transA":
-                    trans_a = attribute.i
-                elif attribute.name == "transB":
-                    trans_b = attribute.i
-                elif attribute.name == "alpha":
-                    alpha = attribute.f
-                elif attribute.name == "beta":
-                    beta = attribute.f
-
-            if trans_a:
-                raise ValueError(f"Gemm node {node.name!r} uses transA=1, which is not supported.")
-
-            weight = initializers[weight_name]
-            if trans_b:
-                weight = weight.T
-            weight = alpha * weight
-
-            bias = None
-            if bias_name is not None:
-                if bias_name not in initializers:
-                    raise ValueError(f"Gemm bias initializer {bias_name!r} was not found.")
-                bias = beta * initializers[bias_name]
-
-            out_state = _apply_gemm(*tensor_state[inp_name], weight, bias)
-        elif node.op_type == "Relu":
-            inp_name = node.input[0]
-            if inp_name not in tensor_state:
-                raise ValueError(f"Missing zonotope for input tensor {inp_name!r}.")
-            out_state = _apply_relu(*tensor_state[inp_name])
+    next_symbol = input_bounds.shape[0]
+
+    for op_type, inputs, output_name, parameters in steps:
+        center, generators, symbols = state = tensor_state[inputs[0]]
+        if op_type == "Gemm":
+            out_state = (*_apply_gemm(center, generators, *parameters), symbols)
+        elif op_type == "Conv":
+            out_state = (*_apply_conv(center, generators, *parameters), symbols)
+        elif op_type == "Affine":
+            out_state = (*_apply_affine(center, generators, *parameters), symbols)
+        elif op_type == "Sum":
+            out_state = _apply_sum([tensor_state[name] for name in inputs], parameters[0])
+        elif op_type == "Reshape":
+            out_state = state
+        elif op_type == "Relu":
+            out_state = _apply_relu(center, generators, symbols, next_symbol, *parameters)
+            next_symbol = max(next_symbol, int(out_state[2].max(initial=-1)) + 1)
+            out_state = _reduce_order(*out_state, next_symbol, MAX_ORDER)
+        elif op_type == "Gather":
+            out_state = (*_apply_gather(center, generators, parameters[0]), symbols)
         else:
-            raise ValueError(
-                f"Unsupported ONNX operator {node.op_type!r} in node {node.name!r}. "
-                "This simple zonotope algorithm currently supports Gemm and Relu only."
-            )
+            out_state = _apply_concat([tensor_state[name] for name in inputs])
 
-        tensor_state[node.output[0]] = out_state
+        next_symbol = max(next_symbol, int(out_state[2].max(initial=-1)) + 1)
+        tensor_state[output_name] = out_state
 
-    output_name = onnx_model.graph.output[0].name
+    output_name = network.output_names[0]
     if output_name not in tensor_state:
         raise ValueError(f"Could not compute bounds for output tensor {output_name!r}.")
 
-    lower, upper = _zonotope_interval(*tensor_state[output_name])
+    lower, upper = _zonotope_interval(*tensor_state[output_name][:2])
     return np.stack([lower.reshape(-1), upper.reshape(-1)], axis=1)
+
+
+def calculate_output_bounds(onnx_model, input_bounds: np.ndarray) -> np.ndarray:
+    """
+    See calculate_output_bounds_ir, the network is decoded first.
+    """
+    return calculate_output_bounds_ir(NetworkIR.from_model(onnx_model), input_bounds)
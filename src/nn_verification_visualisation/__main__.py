@@ -9,6 +9,7 @@ from PySide6.QtWidgets import QApplication
 from nn_verification_visualisation.view.base_view.color_manager import ColorManager
 from nn_verification_visualisation.view.base_view.main_window import MainWindow
 
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool
 from nn_verification_visualisation.model.data.storage import Storage
 from nn_verification_visualisation.model.data_loader.save_state_loader import SaveStateLoader
 from nn_verification_visualisation.view.dialogs.info_popup import InfoPopup
@@ -37,6 +38,13 @@ def main():
 
     window.showMaximized()
 
+    # the algorithm workers warm up in the background while the user sets up the first comparison,
+    # with a verification server all jobs run there and no local workers are needed
+    worker_pool = None
+    if storage.verification_server is None:
+        worker_pool = WorkerPool()
+        worker_pool.start()
+
     if has_existing_state_file and not load_res.is_success:
         text = f"Could not load saved project:\n{load_res.error}"
         dialog = InfoPopup(window.base_view.active_view.close_dialog, text, InfoType.WARNING)
@@ -48,7 +56,12 @@ def main():
             dialog = InfoPopup(window.base_view.active_view.close_dialog, message, InfoType.WARNING)
             window.base_view.active_view.open_dialog(dialog)
 
-    app.aboutToQuit.connect(storage.save_to_disk)
+    def on_quit():
+        storage.save_to_disk()
+        if worker_pool is not None:
+            worker_pool.shutdown()
+
+    app.aboutToQuit.connect(on_quit)
 
     sys.exit(app.exec())
 
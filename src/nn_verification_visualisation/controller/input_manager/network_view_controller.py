@@ -117,13 +117,7 @@ class NetworkViewController:
 
     @staticmethod
     def get_layer_dimensions_from_network(network: NeuralNetwork):
-        layer_dimensions = []  # list of the number of nodes per Layer
-        for layer in network.model.graph.initializer:  # adds the 1.dim of the matrix, dim of the 1. layer
-            if len(layer.dims) == 2:
-                layer_dimensions.append(layer.dims[0])
-        layer_dimensions.append(
-            network.model.graph.output[0].type.tensor_type.shape.dim[-1].dim_value)  # adds the output layer dim
-        return layer_dimensions
+        return NeuralNetworkLoader.get_layer_dimensions(network.model)
 
     def remove_neural_network(self, network: NetworkVerificationConfig) -> bool:
         '''
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from logging import Logger
 import threading
+import time
 from time import sleep
 from typing import TYPE_CHECKING
 
@@ -11,11 +12,22 @@ from onnx import ModelProto
 
 import numpy as np
 
-from multiprocessing import Process, Queue
-
-from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+from queue import Queue
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor, \
+    PartialResult
+from nn_verification_visualisation.controller.process_manager.direction_refinement import UNIFORM_DIRECTIONS, \
+    DEFAULT_DIRECTION_TOLERANCE
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics, measure, \
+    POLYGON_PHASE, append_metrics_log, received_metrics
+from nn_verification_visualisation.controller.process_manager.network_modifier import DEFAULT_OUTPUT_LAYER_MODE
+from nn_verification_visualisation.controller.process_manager.polygon import polygon_from_bounds, \
+    display_polygon, result_polygon
+from nn_verification_visualisation.controller.process_manager.verification_server import worker_pool_for
+from nn_verification_visualisation.controller.process_manager.worker_pool import JobState
 from nn_verification_visualisation.model.data_loader.algorithm_file_observer import AlgorithmFileObserver
 from nn_verification_visualisation.model.data.diagram_config import DiagramConfig
+from nn_verification_visualisation.model.data.neural_network import NeuralNetwork
 from nn_verification_visualisation.model.data.plot_generation_config import PlotGenerationConfig
 from nn_verification_visualisation.model.data.storage import Storage
 from nn_verification_visualisation.utils.result import Result, Failure, Success
@@ -29,11 +41,25 @@ if TYPE_CHECKING:
 
 
 def execute_algorithm_wrapper(index, queue, model: ModelProto, input_bounds: np.ndarray, algorithm_path: str,
-                              selected_neurons: list[tuple[int, int]], num_directions: int) -> None:
+                              selected_neurons: list[tuple[int, int]], num_directions: int,
+                              output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE,
+                              direction_mode: str = UNIFORM_DIRECTIONS,
+                              direction_tolerance: float = DEFAULT_DIRECTION_TOLERANCE,
+                              direction_time_budget: float | None = None,
+                              neural_network: NeuralNetwork | None = None) -> None:
     try:
+        def on_partial(bounds: np.ndarray, directions: list[tuple[float, float]]):
+            queue.put((index, PartialResult([(low, high) for low, high in bounds.tolist()], directions,
+                                            display_polygon(bounds, directions))))
+
         executor = AlgorithmExecutor()
+        metrics = JobMetrics()
         execution_res = executor.execute_algorithm(model, input_bounds, algorithm_path,
-                                                   selected_neurons, num_directions)
+                                                   selected_neurons, num_directions, output_layer_mode,
+                                                   on_partial=on_partial, direction_mode=direction_mode,
+                                                   direction_tolerance=direction_tolerance,
+                                                   direction_time_budget=direction_time_budget, metrics=metrics,
+                                                   neural_network=neural_network)
 
         if not execution_res.is_success:
             queue.put((index, Failure(execution_res.error)))
@@ -49,13 +75,63 @@ def execute_algorithm_wrapper(index, queue, model: ModelProto, input_bounds: np.
         for bounds in output_bound_np.tolist():
             output_bounds.append((bounds[0], bounds[1]))
 
+        # the polygon is computed here, so the user interface doesn't compete with the listener for the GIL
+        with measure(metrics, POLYGON_PHASE):
+            polygon = display_polygon(output_bound_np, directions)
+
         # Send back tuple: (index, Result)
-        queue.put((index, Success((output_bounds, directions))))
+        metrics.finished_at = time.time()
+        queue.put((index, Success((output_bounds, directions, polygon), metrics)))
 
     except Exception as e:
         queue.put((index, Failure(e)))
 
 
+def execute_batched_algorithm_wrapper(indices, queue, model: ModelProto, input_bounds: np.ndarray,
+                                      algorithm_path: str, neuron_pairs: list[list[tuple[int, int]]],
+                                      num_directions: int, output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE,
+                                      direction_mode: str = UNIFORM_DIRECTIONS,
+                                      direction_tolerance: float = DEFAULT_DIRECTION_TOLERANCE,
+                                      direction_time_budget: float | None = None,
+                                      neural_network: NeuralNetwork | None = None) -> None:
+    """
+    Runs the algorithm once for several neuron pairs and puts one (index, Result) per pair, like
+    execute_algorithm_wrapper does for a single pair.
+    """
+    try:
+        def on_partial(pair_index: int, bounds: np.ndarray, directions: list[tuple[float, float]]):
+            queue.put((indices[pair_index], PartialResult([(low, high) for low, high in bounds.tolist()],
+                                                          directions, display_polygon(bounds, directions))))
+
+        executor = AlgorithmExecutor()
+        metrics = JobMetrics(batch_size=indices.__len__())
+        execution_res = executor.execute_algorithm_batch(model, input_bounds, algorithm_path, neuron_pairs,
+                                                         num_directions, output_layer_mode, on_partial=on_partial,
+                                                         direction_mode=direction_mode,
+                                                         direction_tolerance=direction_tolerance,
+                                                         direction_time_budget=direction_time_budget,
+                                                         metrics=metrics, neural_network=neural_network)
+        if not execution_res.is_success:
+            for index in indices:
+                queue.put((index, Failure(execution_res.error)))
+            return
+
+        for index, (output_bound_np, directions) in zip(indices, execution_res.data):
+            if output_bound_np.shape[1] != 2:
+                queue.put((index, Failure(Exception(f"Algorithm returned false bounds"))))
+                continue
+            output_bounds = [(bounds[0], bounds[1]) for bounds in output_bound_np.tolist()]
+            pair_metrics = metrics.copy()
+            with measure(pair_metrics, POLYGON_PHASE):
+                polygon = display_polygon(output_bound_np, directions)
+            pair_metrics.finished_at = time.time()
+            queue.put((index, Success((output_bounds, directions, polygon), pair_metrics)))
+
+    except Exception as e:
+        for index in indices:
+            queue.put((index, Failure(e)))
+
+
 class PlotViewController:
     """
     Class representing a plot view.
@@ -73,6 +149,7 @@ class PlotViewController:
         self.node_pairs = []
         self.node_pair_bounds = []
         self.diagram_selections = {}
+        self.__next_priority = 1
 
         # start listening for algorithm changes
         AlgorithmFileObserver()
@@ -103,39 +180,49 @@ class PlotViewController:
         polygons: list[list[tuple[float, float]] | None] = [None] * len(plot_generation_configs)
 
         result_queue = Queue()
-        algorithm_processes: list[Process | None] = []
+        job_ids: list[int] = []
+        # the pre-warmed pool of this process, or the client of a shared verification server
+        worker_pool = worker_pool_for(Storage().verification_server)
 
         diagram_config = DiagramConfig(plot_generation_configs, polygons)
 
         def terminate_algorithm_process(process_index: int) -> bool:
-            if process_index >= len(algorithm_processes) or not algorithm_processes[process_index]:
+            if process_index >= len(job_ids):
                 return False
+            # the pool reports the cancellation through the job's callback
+            return worker_pool.cancel(job_ids[process_index])
 
-            process = algorithm_processes[process_index]
-
-            if process.is_alive():
-                logger.info(f"Terminating algorithm process {process_index}")
-                process.terminate()
-                process.join()
-                result_queue.put((process_index, Failure(Exception("Cancelled by User"))))
-                return True
-
-            return False
+        def prioritize_algorithm_processes():
+            # the most recently shown loading tab is computed first
+            worker_pool.prioritize(job_ids, self.__next_priority)
+            self.__next_priority += 1
 
         def result_listener():
             results_received = 0
             total_tasks = len(plot_generation_configs)
 
+            finished: set[int] = set()
             while results_received < total_tasks:
                 # wait for a result from the queue
                 result_index, result = result_queue.get()
 
+                if isinstance(result, PartialResult):
+                    # intermediate bounds of a running algorithm, late ones of cancelled pairs are dropped
+                    if result_index not in finished and result.directions:
+                        polygon = result_polygon((result.output_bounds, result.directions, result.polygon))
+                        loading_screen.on_partial.emit((result_index, polygon, result.directions.__len__()))
+                    continue
+                finished.add(result_index)
+
                 print(f"RESULT: {result_index}: {result.is_success}")
 
                 if result.is_success:
-                    bounds_list, directions_list = result.data
-
-                    polygons[result_index] = self.compute_polygon(bounds_list, directions_list)
+                    # the worker sends the polygon along, only results of earlier versions from the cache lack it
+                    metrics = received_metrics(result.metrics)
+                    polygons[result_index] = result_polygon(result.data)
+                    if metrics is not None:
+                        result = Success(result.data, metrics)
+                        self.__log_metrics(plot_generation_configs[result_index], metrics)
                 else:
                     logger.error(f"Algorithm {result_index} failed: {result.error}")
 
@@ -147,20 +234,36 @@ class PlotViewController:
 
             print(f"Done: {results_received}/{total_tasks}, \n Polygons {str(polygons)}")
 
-        # start algorithm processes
+        loading_screen = ComparisonLoadingWidget(diagram_config, self, terminate_algorithm_process,
+                                                 prioritize_algorithm_processes)
+
+        def on_state(index: int, state: JobState):
+            loading_screen.on_status.emit((index, Status.Queued if state == JobState.Queued else Status.Ongoing))
+
+        # queue the jobs on the pre-warmed worker pool
         for index, plot_generation_config in enumerate(plot_generation_configs):
             model: ModelProto = plot_generation_config.nnconfig.network.model
             input_bounds: np.ndarray = AlgorithmExecutor.input_bounds_to_numpy(plot_generation_config.nnconfig.saved_bounds[plot_generation_config.bounds_index])
             algorithm_path: str = plot_generation_config.algorithm.path
             selected_neurons: list[tuple[int, int]] = plot_generation_config.selected_neurons
             num_directions: int = Storage().num_directions
-
-            new_process = Process(target=execute_algorithm_wrapper,
-                                  args=(index, result_queue, model, input_bounds, algorithm_path, selected_neurons, num_directions), )
-            algorithm_processes.append(new_process)
-            new_process.start()
-
-        loading_screen = ComparisonLoadingWidget(diagram_config, self, terminate_algorithm_process)
+            output_layer_mode: str = Storage().output_layer_mode
+            direction_options = {}
+            if Storage().direction_mode != UNIFORM_DIRECTIONS:
+                direction_options = {"direction_mode": Storage().direction_mode,
+                                     "direction_tolerance": Storage().direction_tolerance,
+                                     "direction_time_budget": Storage().direction_time_budget}
+
+            job_ids.append(worker_pool.submit(model, input_bounds, algorithm_path, selected_neurons, num_directions,
+                                              lambda result, index=index: result_queue.put((index, result)),
+                                              output_layer_mode, priority=self.__next_priority,
+                                              on_state=lambda state, index=index: on_state(index, state),
+                                              is_deterministic=plot_generation_config.algorithm.is_deterministic,
+                                              on_partial=lambda partial, index=index:
+                                              result_queue.put((index, partial)),
+                                              time_limit=Storage().job_time_limit,
+                                              memory_limit=Storage().job_memory_limit,
+                                              options=direction_options))
 
         listener = threading.Thread(target=result_listener)
         listener.daemon = True
@@ -168,6 +271,19 @@ class PlotViewController:
 
         self.current_plot_view.add_loading_tab(loading_screen)
 
+    def __log_metrics(self, plot_generation_config: PlotGenerationConfig, metrics: JobMetrics):
+        """
+        Appends the metrics of a finished pair to the metrics log of the storage.
+        """
+        path = Storage().job_metrics_log
+        if path is None:
+            return
+        append_metrics_log(path, metrics, algorithm=plot_generation_config.algorithm.name,
+                           network=plot_generation_config.nnconfig.network.name,
+                           neurons=[list(neuron) for neuron in plot_generation_config.selected_neurons],
+                           num_directions=Storage().num_directions, output_layer_mode=Storage().output_layer_mode,
+                           direction_mode=Storage().direction_mode)
+
     def create_diagram_tab(self, base: ComparisonLoadingWidget):
         # remove failed algorithms from diagram config:
         diagram_config = base.diagram_config
@@ -206,45 +322,4 @@ class PlotViewController:
         :param directions: directions
         :return: polygon list
         """
-        def clip_polygon(poly: list[tuple[float, float]], a: float, b: float, c: float):
-            def inside(p: tuple[float, float]) -> bool:
-                return a * p[0] + b * p[1] <= c + 1e-9
-
-            def intersect(p1: tuple[float, float], p2: tuple[float, float]):
-                x1, y1 = p1
-                x2, y2 = p2
-                dx = x2 - x1
-                dy = y2 - y1
-                denom = a * dx + b * dy
-                if abs(denom) < 1e-12:
-                    return p2
-                t = (c - a * x1 - b * y1) / denom
-                return (x1 + t * dx, y1 + t * dy)
-
-            out: list[tuple[float, float]] = []
-            for i in range(len(poly)):
-                curr = poly[i]
-                prev = poly[i - 1]
-                curr_in = inside(curr)
-                prev_in = inside(prev)
-                if curr_in:
-                    if not prev_in:
-                        out.append(intersect(prev, curr))
-                    out.append(curr)
-                elif prev_in:
-                    out.append(intersect(prev, curr))
-            return out
-
-        max_bound = max(abs(v) for (low, high) in bounds for v in (low, high))
-        m = max(5.0, max_bound * 2.0 + 1.0)
-        poly: list[tuple[float, float]] = [(-m, -m), (m, -m), (m, m), (-m, m)]
-
-        for i, (low, high) in enumerate(bounds):
-            a, b = directions[i]
-            poly = clip_polygon(poly, a, b, high)
-            if not poly:
-                break
-            poly = clip_polygon(poly, -a, -b, -low)
-            if not poly:
-                break
-        return poly
+        return polygon_from_bounds(bounds, directions)
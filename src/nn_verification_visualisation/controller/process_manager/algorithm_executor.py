@@ -1,46 +1,318 @@
 from __future__ import annotations
 
+import inspect
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
 from logging import Logger
+from typing import Callable
 
 import numpy
 import numpy as np
 import onnx
 from onnx import ModelProto
 
-from nn_verification_visualisation.controller.process_manager.network_modifier import NetworkModifier
-from nn_verification_visualisation.model.data.plot_generation_config import PlotGenerationConfig
-from nn_verification_visualisation.model.data.storage import Storage
+from nn_verification_visualisation.controller.process_manager.direction_refinement import UNIFORM_DIRECTIONS, \
+    ADAPTIVE_DIRECTIONS, DIRECTION_MODES, DEFAULT_DIRECTION_TOLERANCE, angle_directions, initial_angles, \
+    refinement_angles
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics, measure, MODIFY_PHASE, \
+    ALGORITHM_PHASE
+from nn_verification_visualisation.controller.process_manager.network_modifier import NetworkModifier, \
+    DEFAULT_OUTPUT_LAYER_MODE, TAP_OUTPUT_LAYER_MODE, OUTPUT_LAYER_MODE_LABELS
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
+from nn_verification_visualisation.model.data.neural_network import NeuralNetwork
 from nn_verification_visualisation.model.data_loader.algorithm_loader import AlgorithmLoader
 from nn_verification_visualisation.utils.result import Result, Success, Failure
 
 
+@dataclass
+class PartialResult:
+    """
+    Bounds of the directions an algorithm has finished so far, sent while it is still running.
+    Only algorithms whose calculate_output_bounds is a generator produce them.
+    """
+    output_bounds: list[tuple[float, float]]
+    directions: list[tuple[float, float]]
+    polygon: np.ndarray | None = None  # display_polygon of the bounds, computed by the worker
+
+
 class AlgorithmExecutor:
     """
     Class to execute algorithm.
     """
 
     def execute_algorithm(self, model: ModelProto, input_bounds: np.ndarray, algorithm_path: str,
-                          selected_neurons: list[tuple[int, int]], num_directions: int) -> Result[
+                          selected_neurons: list[tuple[int, int]], num_directions: int,
+                          output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE,
+                          on_partial: Callable[[np.ndarray, list[tuple[float, float]]], None] | None = None,
+                          direction_mode: str = UNIFORM_DIRECTIONS,
+                          direction_tolerance: float = DEFAULT_DIRECTION_TOLERANCE,
+                          direction_time_budget: float | None = None,
+                          metrics: JobMetrics | None = None,
+                          neural_network: NeuralNetwork | None = None) -> Result[
         tuple[np.ndarray, list[tuple[float, float]]]]:
-
+        """
+        :param num_directions: amount of directions, the maximal amount in the adaptive direction mode
+        :param on_partial: called with the bounds and directions finished so far whenever a generator algorithm
+            yields, see collect_output_bounds, or a refinement round is done
+        :param direction_mode: UNIFORM_DIRECTIONS or ADAPTIVE_DIRECTIONS, see adaptive_bounds
+        :param direction_tolerance: accepted polygon error of the adaptive mode, relative to the polygon size
+        :param direction_time_budget: seconds after which the adaptive mode stops refining, None for no limit
+        :param metrics: receives the time and memory of building the output head and of the algorithm
+        :param neural_network: the network of the model, its NetworkIR is used instead of decoding the model again,
+            e.g. the one a worker keeps with its cached model
+        """
         try:
+            if output_layer_mode not in OUTPUT_LAYER_MODE_LABELS:
+                raise ValueError(f"Invalid output_layer_mode: {output_layer_mode}")
+            if direction_mode not in DIRECTION_MODES:
+                raise ValueError(f"Invalid direction_mode: {direction_mode}")
             # InputBounds (QAbstractTableModel) -> np.ndarray (N, 2)
             fn_res = AlgorithmLoader.load_calculate_output_bounds(algorithm_path)
             if not fn_res.is_success:
                 raise fn_res.error
+            ir_fn_res = AlgorithmLoader.load_calculate_output_bounds_ir(algorithm_path)
+            if not ir_fn_res.is_success:
+                raise ir_fn_res.error
+            network = AlgorithmExecutor.network_of(model, output_layer_mode, ir_fn_res.data, neural_network)
+
+            if direction_mode == ADAPTIVE_DIRECTIONS:
+                def evaluate(pending: list[list[float]]) -> list[np.ndarray]:
+                    return [np.asarray(self.run_algorithm(fn_res.data, model, input_bounds, selected_neurons,
+                                                          angle_directions(pending[0]), output_layer_mode,
+                                                          metrics=metrics, calculate_output_bounds_ir=ir_fn_res.data,
+                                                          network=network))]
+
+                on_round = None
+                if on_partial is not None:
+                    def on_round(pair_index: int, bounds: np.ndarray, directions: list[tuple[float, float]]):
+                        on_partial(bounds, directions)
+
+                return Success(AlgorithmExecutor.adaptive_bounds(evaluate, 1, num_directions, direction_tolerance,
+                                                                 direction_time_budget, on_round)[0])
+
             directions = AlgorithmExecutor.calculate_directions(self, num_directions)
-            modified_model = NetworkModifier.custom_output_layer(NetworkModifier(), model, selected_neurons,
-                                                             directions)
-            output_bounds = fn_res.data(modified_model, input_bounds)
+
+            on_progress = None
+            if on_partial is not None:
+                def on_progress(bounds: np.ndarray, finished: np.ndarray, indices: np.ndarray):
+                    on_partial(bounds[finished], [directions[i] for i in np.flatnonzero(finished)])
+
+            output_bounds = self.run_algorithm(fn_res.data, model, input_bounds, selected_neurons, directions,
+                                               output_layer_mode, on_progress, metrics, ir_fn_res.data, network)
             return Success((output_bounds, directions))
         except BaseException as e:
-            tb = e.__traceback__
-            import traceback
-            from logging import Logger
-            logger = Logger(__name__)
-            logger.error(f"Error while executing algorithm: {e}, traceback: {traceback.format_tb(tb)}")
-            traceback.print_tb(tb)
-            return Failure(e)
+            return AlgorithmExecutor.__failure(e)
+
+    def execute_algorithm_batch(self, model: ModelProto, input_bounds: np.ndarray, algorithm_path: str,
+                                neuron_pairs: list[list[tuple[int, int]]], num_directions: int,
+                                output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE,
+                                on_partial: Callable[[int, np.ndarray, list[tuple[float, float]]], None] | None = None,
+                                direction_mode: str = UNIFORM_DIRECTIONS,
+                                direction_tolerance: float = DEFAULT_DIRECTION_TOLERANCE,
+                                direction_time_budget: float | None = None,
+                                metrics: JobMetrics | None = None,
+                                neural_network: NeuralNetwork | None = None
+                                ) -> Result[list[tuple[np.ndarray, list[tuple[float, float]]]]]:
+        """
+        Runs the algorithm once for several neuron selections on the same network, bounds and algorithm.
+        The output head projects the directions of all selections together, see NetworkModifier.batched_selection,
+        so the network is only propagated once instead of once per selection.
+        :param neuron_pairs: the neuron selections
+        :param on_partial: like for execute_algorithm, additionally gets the index of the selection
+        :param metrics: like for execute_algorithm, measures the shared run of all selections
+        :param neural_network: like for execute_algorithm
+        :return: output bounds and directions per selection, in the order of neuron_pairs
+        """
+        try:
+            if output_layer_mode not in OUTPUT_LAYER_MODE_LABELS:
+                raise ValueError(f"Invalid output_layer_mode: {output_layer_mode}")
+            if direction_mode not in DIRECTION_MODES:
+                raise ValueError(f"Invalid direction_mode: {direction_mode}")
+            fn_res = AlgorithmLoader.load_calculate_output_bounds(algorithm_path)
+            if not fn_res.is_success:
+                raise fn_res.error
+            ir_fn_res = AlgorithmLoader.load_calculate_output_bounds_ir(algorithm_path)
+            if not ir_fn_res.is_success:
+                raise ir_fn_res.error
+            network = AlgorithmExecutor.network_of(model, output_layer_mode, ir_fn_res.data, neural_network)
+
+            if direction_mode == ADAPTIVE_DIRECTIONS:
+                # every round runs the selections that still need directions together
+                def evaluate(pending: list[list[float]]) -> list[np.ndarray]:
+                    active = [index for index, angles in enumerate(pending) if angles]
+                    neurons, batched_directions = NetworkModifier.batched_selection_per_pair(
+                        [neuron_pairs[index] for index in active],
+                        [angle_directions(pending[index]) for index in active])
+                    output_bounds = np.asarray(self.run_algorithm(fn_res.data, model, input_bounds, neurons,
+                                                                  batched_directions, output_layer_mode,
+                                                                  metrics=metrics,
+                                                                  calculate_output_bounds_ir=ir_fn_res.data,
+                                                                  network=network))
+                    if output_bounds.shape[0] != batched_directions.__len__():
+                        raise ValueError(f"Algorithm returned {output_bounds.shape[0]} bounds, "
+                                         f"expected {batched_directions.__len__()}")
+                    pair_bounds = [np.zeros((0, 2)) for _ in pending]
+                    splits = np.cumsum([pending[index].__len__() for index in active])[:-1]
+                    for index, bounds in zip(active, np.split(output_bounds, splits)):
+                        pair_bounds[index] = bounds
+                    return pair_bounds
+
+                return Success(AlgorithmExecutor.adaptive_bounds(evaluate, neuron_pairs.__len__(), num_directions,
+                                                                 direction_tolerance, direction_time_budget,
+                                                                 on_partial))
+            directions = AlgorithmExecutor.calculate_directions(self, num_directions)
+            neurons, batched_directions = NetworkModifier.batched_selection(neuron_pairs, directions)
+
+            on_progress = None
+            if on_partial is not None:
+                def on_progress(bounds: np.ndarray, finished: np.ndarray, indices: np.ndarray):
+                    for pair_index in np.unique(indices // directions.__len__()):
+                        rows = slice(pair_index * directions.__len__(), (pair_index + 1) * directions.__len__())
+                        pair_finished = finished[rows]
+                        on_partial(int(pair_index), bounds[rows][pair_finished],
+                                   [directions[i] for i in np.flatnonzero(pair_finished)])
+
+            output_bounds = np.asarray(self.run_algorithm(fn_res.data, model, input_bounds, neurons,
+                                                          batched_directions, output_layer_mode, on_progress,
+                                                          metrics, ir_fn_res.data, network))
+            if output_bounds.shape[0] != neuron_pairs.__len__() * directions.__len__():
+                raise ValueError(f"Algorithm returned {output_bounds.shape[0]} bounds, "
+                                 f"expected {neuron_pairs.__len__() * directions.__len__()}")
+            return Success([(pair_bounds, directions)
+                            for pair_bounds in np.split(output_bounds, neuron_pairs.__len__())])
+        except BaseException as e:
+            return AlgorithmExecutor.__failure(e)
+
+    @staticmethod
+    def adaptive_bounds(evaluate: Callable[[list[list[float]]], list[np.ndarray]], pair_count: int,
+                        num_directions: int, tolerance: float, time_budget: float | None = None,
+                        on_round: Callable[[int, np.ndarray, list[tuple[float, float]]], None] | None = None) -> list[
+            tuple[np.ndarray, list[tuple[float, float]]]]:
+        """
+        Adaptive direction mode: starts with a few uniformly spaced directions and only adds directions between
+        neighbouring polygon edges whose gap is larger than the tolerance, see refinement_angles.
+        Smooth polygon sides need no further directions, so the polygon gets the accuracy of num_directions
+        uniform directions with far fewer algorithm outputs.
+        :param evaluate: computes the bounds of the given angles per selection, angle_directions creates the directions
+        :param pair_count: number of neuron selections
+        :param num_directions: maximal number of directions per selection
+        :param tolerance: accepted gap relative to the polygon size
+        :param time_budget: seconds after which no further round is started, None for no limit
+        :param on_round: called with the selection index, bounds and directions after every round
+        :return: output bounds and directions per selection, ordered by angle
+        """
+        start = time.monotonic()
+        angles: list[list[float]] = [[] for _ in range(pair_count)]
+        bounds = [np.zeros((0, 2)) for _ in range(pair_count)]
+        pending = [initial_angles(num_directions) for _ in range(pair_count)]
+        while any(pending):
+            for pair_index, new_bounds in enumerate(evaluate(pending)):
+                if not pending[pair_index]:
+                    continue
+                angles[pair_index] += pending[pair_index]
+                bounds[pair_index] = np.vstack([bounds[pair_index], np.asarray(new_bounds, dtype=float).reshape(-1, 2)])
+                if on_round is not None:
+                    on_round(pair_index, bounds[pair_index], angle_directions(angles[pair_index]))
+            if time_budget is not None and time.monotonic() - start > time_budget:
+                break
+            pending = [refinement_angles(angles[pair_index], bounds[pair_index], tolerance,
+                                         num_directions - angles[pair_index].__len__())
+                       for pair_index in range(pair_count)]
+
+        results = []
+        for pair_angles, pair_bounds in zip(angles, bounds):
+            order = np.argsort(pair_angles)
+            results.append((pair_bounds[order], angle_directions([pair_angles[i] for i in order])))
+        return results
+
+    @staticmethod
+    def run_algorithm(calculate_output_bounds, model: ModelProto, input_bounds: np.ndarray,
+                      neurons: list[tuple[int, int]], directions: list[tuple[float, ...]],
+                      output_layer_mode: str, on_progress: Callable | None = None,
+                      metrics: JobMetrics | None = None,
+                      calculate_output_bounds_ir: Callable | None = None,
+                      network: NetworkIR | None = None) -> np.ndarray:
+        """
+        Adds the output head for the directions to the network and runs the algorithm on it.
+        :param calculate_output_bounds: the loaded algorithm function
+        :param on_progress: see collect_output_bounds
+        :param metrics: records the MODIFY_PHASE and the ALGORITHM_PHASE
+        :param calculate_output_bounds_ir: the optional NetworkIR function of the algorithm, used in the tap mode,
+            where the head shares the decoded weights of the NetworkIR of the model
+        :param network: the NetworkIR of the model, see network_of, it is decoded for this run if it is None
+        :return: the output bounds of the algorithm, one row per direction
+        """
+        with ExitStack() as stack:
+            tapped = None
+            with measure(metrics, MODIFY_PHASE):
+                if output_layer_mode == TAP_OUTPUT_LAYER_MODE:
+                    if calculate_output_bounds_ir is not None and network is None:
+                        network = NetworkIR.from_model(model)  # before the head is added to the model
+                    # the head is added to the model for the run and removed again, nothing is copied
+                    modified_model = stack.enter_context(NetworkModifier().tapped_network(model, neurons, directions))
+                    if calculate_output_bounds_ir is not None:
+                        tapped = NetworkIR.from_model(modified_model, reuse=network)
+                else:
+                    modified_model = NetworkModifier.custom_output_layer(NetworkModifier(), model, neurons,
+                                                                         directions)
+            with measure(metrics, ALGORITHM_PHASE):
+                if tapped is not None:
+                    output = calculate_output_bounds_ir(tapped, input_bounds)
+                else:
+                    output = calculate_output_bounds(modified_model, input_bounds)
+                # generators compute while they are collected
+                return AlgorithmExecutor.collect_output_bounds(output, directions.__len__(), on_progress)
+
+    @staticmethod
+    def network_of(model: ModelProto, output_layer_mode: str, calculate_output_bounds_ir: Callable | None,
+                   neural_network: NeuralNetwork | None = None) -> NetworkIR | None:
+        """
+        Only the tap mode shares the weights of the model with the algorithm, the bridge mode rewrites them.
+        :param neural_network: the network of the model, its NetworkIR is built once and kept with it, without it
+            the model is decoded for the runs of this job
+        :return: the NetworkIR of the model if run_algorithm uses it, else None
+        """
+        if output_layer_mode != TAP_OUTPUT_LAYER_MODE or calculate_output_bounds_ir is None:
+            return None
+        if neural_network is not None:
+            return neural_network.ir
+        return NetworkIR.from_model(model)
+
+    @staticmethod
+    def collect_output_bounds(output, row_count: int, on_progress: Callable | None = None) -> np.ndarray:
+        """
+        Algorithms may return all bounds at once or be a generator that yields (indices, bounds) chunks,
+        where indices are output rows and bounds the np.ndarray (len(indices), 2) of these rows.
+        :param output: return value of calculate_output_bounds
+        :param row_count: number of output rows, i.e. directions
+        :param on_progress: called as on_progress(bounds, finished, indices) after every chunk with all bounds,
+            the mask of the finished rows and the rows of the chunk
+        :return: the output bounds, one row per direction
+        """
+        if not inspect.isgenerator(output):
+            return output
+        bounds = np.zeros((row_count, 2))
+        finished = np.zeros(row_count, dtype=bool)
+        for indices, chunk in output:
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+            bounds[indices] = np.asarray(chunk, dtype=float).reshape(-1, 2)
+            finished[indices] = True
+            if on_progress is not None:
+                on_progress(bounds, finished, indices)
+        if not finished.all():
+            raise ValueError(f"The algorithm yielded bounds for {np.count_nonzero(finished)} of {row_count} directions")
+        return bounds
+
+    @staticmethod
+    def __failure(e: BaseException) -> Failure:
+        tb = e.__traceback__
+        import traceback
+        from logging import Logger
+        logger = Logger(__name__)
+        logger.error(f"Error while executing algorithm: {e}, traceback: {traceback.format_tb(tb)}")
+        traceback.print_tb(tb)
+        return Failure(e)
 
     @staticmethod
     def input_bounds_to_numpy(bounds_model) -> np.ndarray:
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+import numpy as np
+from onnx import ModelProto
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+from nn_verification_visualisation.controller.process_manager.batch_runner import run_job, run_job_batch
+from nn_verification_visualisation.controller.process_manager.network_modifier import DEFAULT_OUTPUT_LAYER_MODE
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool
+from nn_verification_visualisation.utils.result import Result
+
+IN_FLIGHT_PER_WORKER = 2
+
+
+@dataclass
+class PairRequest:
+    """
+    One algorithm run on a neuron pair, with the arguments of WorkerPool.submit.
+    """
+    model: ModelProto
+    input_bounds: np.ndarray
+    algorithm_path: str
+    selected_neurons: list[tuple[int, int]]
+    num_directions: int
+    output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE
+    is_deterministic: bool = False
+    priority: int = 0
+    time_limit: float | None = None
+    memory_limit: int | None = None
+    options: dict = field(default_factory=dict)
+
+    @staticmethod
+    def from_plot_generation_config(config, num_directions: int, **kwargs) -> PairRequest:
+        '''
+        :param config: a PlotGenerationConfig, like the plot view computes it
+        :param kwargs: further fields of the request
+        '''
+        bounds = AlgorithmExecutor.input_bounds_to_numpy(config.nnconfig.saved_bounds[config.bounds_index])
+        kwargs.setdefault("is_deterministic", config.algorithm.is_deterministic)
+        return PairRequest(config.nnconfig.network.model, bounds, config.algorithm.path,
+                           list(config.selected_neurons), num_directions, **kwargs)
+
+
+@dataclass
+class PairResult:
+    """
+    Result of the request with the given index, see run_pairs.
+    """
+    index: int
+    request: PairRequest
+    result: Result  # Success((bounds, directions, polygon)) with JobMetrics, or the Failure of the run
+
+
+def default_async_pool() -> WorkerPool:
+    '''
+    :return: the worker pool of the process, created with the job functions of the batch mode if there is none yet,
+        so services don't need PySide6
+    '''
+    return WorkerPool(target=run_job, batch_target=run_job_batch)
+
+
+async def _requests(requests: Iterable[PairRequest] | AsyncIterable[PairRequest]) -> AsyncIterator[PairRequest]:
+    if isinstance(requests, AsyncIterable):
+        async for request in requests:
+            yield request
+    else:
+        for request in requests:
+            yield request
+
+
+async def run_pairs(requests: Iterable[PairRequest] | AsyncIterable[PairRequest], pool: WorkerPool | None = None,
+                    max_in_flight: int | None = None) -> AsyncIterator[PairResult]:
+    '''
+    Runs the requests on the worker pool and yields their results as they finish, without a thread per job:
+        async for pair in run_pairs(requests):
+            print(pair.index, pair.result.is_success)
+    Backpressure: at most max_in_flight requests are submitted at once, further requests are only read and
+    submitted while the consumer takes results, so a slow consumer slows down the submission.
+    Cancelling the consuming task or leaving the loop early cancels the submitted requests that are not finished.
+    :param requests: the requests, may be generated lazily or asynchronously
+    :param pool: the pool to run on, defaults to default_async_pool
+    :param max_in_flight: maximal number of submitted but not yet consumed requests,
+        defaults to IN_FLIGHT_PER_WORKER per worker
+    :return: async iterator of the results in the order they finish
+    '''
+    pool = pool if pool is not None else default_async_pool()
+    limit = max(1, max_in_flight or IN_FLIGHT_PER_WORKER * pool.size)
+    loop = asyncio.get_running_loop()
+    finished: asyncio.Queue[tuple[int, Result]] = asyncio.Queue()
+    pending = _requests(requests)
+    submitted: dict[int, PairRequest] = {}
+    job_ids: dict[int, int] = {}
+    exhausted = False
+    next_index = 0
+
+    def on_result(index: int, result: Result):
+        # called by the router thread of the pool
+        try:
+            loop.call_soon_threadsafe(finished.put_nowait, (index, result))
+        except RuntimeError:
+            pass  # the event loop is closed, nobody waits for the result anymore
+
+    try:
+        while True:
+            while not exhausted and submitted.__len__() < limit:
+                try:
+                    request = await pending.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                index, next_index = next_index, next_index + 1
+                submitted[index] = request
+                job_ids[index] = pool.submit(request.model, request.input_bounds, request.algorithm_path,
+                                             request.selected_neurons, request.num_directions,
+                                             lambda result, index=index: on_result(index, result),
+                                             request.output_layer_mode, priority=request.priority,
+                                             is_deterministic=request.is_deterministic,
+                                             time_limit=request.time_limit, memory_limit=request.memory_limit,
+                                             options=request.options)
+            if not submitted:
+                return
+            index, result = await finished.get()
+            job_ids.pop(index, None)
+            yield PairResult(index, submitted.pop(index), result)
+    finally:
+        for job_id in job_ids.values():
+            pool.cancel(job_id)
+        await pending.aclose()
+
+
+async def run_pair(request: PairRequest, pool: WorkerPool | None = None) -> Result:
+    '''
+    Runs a single request, see run_pairs.
+    :return: the result of the request
+    '''
+    async with aclosing(run_pairs([request], pool)) as pairs:
+        async for pair in pairs:
+            return pair.result
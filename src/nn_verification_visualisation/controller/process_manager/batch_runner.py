@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from queue import Queue
+from typing import Callable
+
+import numpy as np
+from onnx import ModelProto
+
+try:
+    import yaml
+except ImportError:  # YAML job files are optional, JSON always works
+    yaml = None
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor, PartialResult
+from nn_verification_visualisation.controller.process_manager.direction_refinement import UNIFORM_DIRECTIONS, \
+    DIRECTION_MODES, DEFAULT_DIRECTION_TOLERANCE
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics, measure, \
+    POLYGON_PHASE, append_metrics_log, received_metrics, package_version
+from nn_verification_visualisation.controller.process_manager.network_modifier import DEFAULT_OUTPUT_LAYER_MODE, \
+    OUTPUT_LAYER_MODE_LABELS
+from nn_verification_visualisation.controller.process_manager.polygon import display_polygon, result_polygon
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool
+from nn_verification_visualisation.model.data.algorithm import Algorithm
+from nn_verification_visualisation.model.data_loader.algorithm_loader import AlgorithmLoader
+from nn_verification_visualisation.model.data_loader.input_bounds_loader import InputBoundsLoader
+from nn_verification_visualisation.model.data_loader.neural_network_loader import NeuralNetworkLoader
+from nn_verification_visualisation.utils.result import Result, Success, Failure
+
+# The batch mode runs on servers without a display, nothing in here may import PySide6.
+
+DEFAULT_NUM_DIRECTIONS = 32
+SAVE_STATE_FILE = "save_state.json"
+RESULTS_FILE = "results.json"
+METRICS_FILE = "metrics.jsonl"
+
+
+@dataclass
+class BatchNetwork:
+    """
+    A network of a job file together with its input bounds and the neuron pairs to compute.
+    """
+    name: str
+    path: str
+    model: ModelProto
+    layers_dimensions: list[int]
+    bounds: np.ndarray
+    neuron_pairs: list[list[tuple[int, int]]]
+
+
+@dataclass
+class BatchJob:
+    """
+    A comparison matrix read from a job file: every algorithm runs on every neuron pair of every network.
+    """
+    networks: list[BatchNetwork]
+    algorithms: list[Algorithm]
+    num_directions: int = DEFAULT_NUM_DIRECTIONS
+    output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE
+    options: dict = field(default_factory=dict)  # direction mode, see AlgorithmExecutor.execute_algorithm
+    time_limit: float | None = None
+    memory_limit: int | None = None
+    workers: int | None = None
+
+    def computations(self) -> list[tuple[int, int, list[tuple[int, int]]]]:
+        '''
+        :return: (network index, algorithm index, neurons) of every single algorithm run, ordered by network
+        '''
+        return [(network_index, algorithm_index, pair)
+                for network_index, network in enumerate(self.networks)
+                for pair in network.neuron_pairs
+                for algorithm_index in range(self.algorithms.__len__())]
+
+
+@dataclass
+class PairOutcome:
+    """
+    Result of one algorithm run of a batch.
+    """
+    network_index: int
+    algorithm_index: int
+    selected_neurons: list[tuple[int, int]]
+    result: Result  # Success((bounds, directions, polygon)) or the Failure of the run
+    polygon: list[tuple[float, float]] | None = None
+    metrics: JobMetrics | None = None
+
+
+def _parse_pairs(raw) -> list[list[tuple[int, int]]]:
+    return [[(int(layer), int(index)) for layer, index in pair] for pair in raw]
+
+
+def _read_document(path: Path) -> dict:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        if yaml is None:
+            raise ImportError("Reading YAML job files needs PyYAML, use a JSON job file or install pyyaml")
+        document = yaml.safe_load(text)
+    else:
+        document = json.loads(text)
+    if not isinstance(document, dict):
+        raise ValueError(f"{path} has to contain an object with networks and algorithms")
+    return document
+
+
+def load_job_file(file_path: str) -> Result[BatchJob]:
+    '''
+    Reads a JSON or YAML job file. Relative paths are relative to the job file. Example:
+    {
+        "networks": [{"path": "NN3.onnx", "bounds": "B1.csv"},
+                     {"path": "NN4.onnx", "bounds": [[-1, 1], [-1, 1]], "neuron_pairs": [[[1, 0], [1, 1]]]}],
+        "algorithms": ["../algorithms/box_ibp_numpy.py", "../algorithms/simple_zonotope.py"],
+        "neuron_pairs": [[[1, 0], [2, 1]], [[2, 0], [2, 1]]],
+        "num_directions": 32
+    }
+    The bounds are a .csv or .vnnlib file or the list of (lower, upper) per input. neuron_pairs of a network
+    replace the top-level ones. Further optional keys: output_layer_mode, direction_mode, direction_tolerance,
+    direction_time_budget, time_limit, memory_limit and workers.
+    :param file_path: path of the job file
+    :return: the job with loaded networks, bounds and algorithms
+    '''
+    try:
+        path = Path(file_path)
+        document = _read_document(path)
+
+        def resolve(relative: str) -> str:
+            resolved = Path(relative).expanduser()
+            return str(resolved if resolved.is_absolute() else (path.parent / resolved).resolve())
+
+        default_pairs = _parse_pairs(document.get("neuron_pairs") or [])
+        networks: list[BatchNetwork] = []
+        for network_index, item in enumerate(document.get("networks") or []):
+            if isinstance(item, str):
+                item = {"path": item}
+            if "path" not in item:
+                raise ValueError(f"Network {network_index + 1} has no path")
+            loaded = NeuralNetworkLoader().load_neural_network(resolve(item["path"]))
+            if not loaded.is_success:
+                raise loaded.error
+            network = loaded.data
+            layers_dimensions = NeuralNetworkLoader.get_layer_dimensions(network.model)
+            input_count = layers_dimensions[0]
+
+            bounds = item.get("bounds")
+            if bounds is None:
+                raise ValueError(f"Network {network.name} has no bounds")
+            if isinstance(bounds, str):
+                bounds_res = InputBoundsLoader().load_input_bounds_for_inputs(resolve(bounds), input_count)
+                if not bounds_res.is_success:
+                    raise bounds_res.error
+                if sorted(bounds_res.data) != list(range(input_count)):
+                    raise ValueError(f"{bounds} does not bound all {input_count} inputs of {network.name}")
+                bounds = [bounds_res.data[i] for i in range(input_count)]
+            bounds = np.asarray(bounds, dtype=float)
+            if bounds.shape != (input_count, 2) or np.any(bounds[:, 0] > bounds[:, 1]):
+                raise ValueError(f"The bounds of {network.name} have to be {input_count} (lower, upper) pairs")
+
+            pairs = _parse_pairs(item["neuron_pairs"]) if "neuron_pairs" in item else default_pairs
+            if not pairs:
+                raise ValueError(f"Network {network.name} has no neuron pairs")
+            networks.append(BatchNetwork(network.name, str(Path(network.path).resolve()), network.model,
+                                         [int(dimension) for dimension in layers_dimensions], bounds, pairs))
+        if not networks:
+            raise ValueError("The job file contains no networks")
+
+        algorithms: list[Algorithm] = []
+        for item in document.get("algorithms") or []:
+            loaded = AlgorithmLoader.load_algorithm(resolve(item["path"] if isinstance(item, dict) else item))
+            if not loaded.is_success:
+                raise loaded.error
+            algorithms.append(loaded.data)
+        if not algorithms:
+            raise ValueError("The job file contains no algorithms")
+
+        num_directions = int(document.get("num_directions", DEFAULT_NUM_DIRECTIONS))
+        if num_directions < 1:
+            raise ValueError("num_directions has to be positive")
+        output_layer_mode = str(document.get("output_layer_mode", DEFAULT_OUTPUT_LAYER_MODE))
+        if output_layer_mode not in OUTPUT_LAYER_MODE_LABELS:
+            raise ValueError(f"Invalid output_layer_mode: {output_layer_mode}")
+        direction_mode = str(document.get("direction_mode", UNIFORM_DIRECTIONS))
+        if direction_mode not in DIRECTION_MODES:
+            raise ValueError(f"Invalid direction_mode: {direction_mode}")
+        options = {}
+        if direction_mode != UNIFORM_DIRECTIONS:
+            options = {"direction_mode": direction_mode,
+                       "direction_tolerance": float(document.get("direction_tolerance", DEFAULT_DIRECTION_TOLERANCE)),
+                       "direction_time_budget": document.get("direction_time_budget")}
+
+        return Success(BatchJob(networks, algorithms, num_directions, output_layer_mode, options,
+                                document.get("time_limit"), document.get("memory_limit"), document.get("workers")))
+    except BaseException as e:
+        return Failure(e)
+
+
+def run_job(index, queue, model: ModelProto, input_bounds: np.ndarray, algorithm_path: str,
+            selected_neurons: list[tuple[int, int]], num_directions: int,
+            output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE, **options) -> None:
+    '''
+    Job function of the batch mode for a single pair, see run_job_batch.
+    '''
+    run_job_batch([index], queue, model, input_bounds, algorithm_path, [selected_neurons], num_directions,
+                  output_layer_mode, **options)
+
+
+def run_job_batch(indices, queue, model: ModelProto, input_bounds: np.ndarray, algorithm_path: str,
+                  neuron_pairs: list[list[tuple[int, int]]], num_directions: int,
+                  output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE, **options) -> None:
+    '''
+    Job function of the batch mode. Puts (index, Result) per pair like the job functions of the plot view,
+    with the same (bounds, directions, polygon) data, so both share the result cache, and the same PartialResults.
+    :param options: the direction mode and the cached neural_network of the worker, see
+        AlgorithmExecutor.execute_algorithm_batch
+    '''
+    try:
+        def on_partial(pair_index: int, bounds: np.ndarray, directions: list[tuple[float, float]]):
+            queue.put((indices[pair_index], PartialResult([(low, high) for low, high in bounds.tolist()],
+                                                          directions, display_polygon(bounds, directions))))
+
+        metrics = JobMetrics(batch_size=indices.__len__())
+        execution_res = AlgorithmExecutor().execute_algorithm_batch(model, input_bounds, algorithm_path,
+                                                                    neuron_pairs, num_directions,
+                                                                    output_layer_mode, on_partial=on_partial,
+                                                                    metrics=metrics, **options)
+        if not execution_res.is_success:
+            for index in indices:
+                queue.put((index, Failure(execution_res.error)))
+            return
+        for index, (output_bounds, directions) in zip(indices, execution_res.data):
+            if output_bounds.ndim != 2 or output_bounds.shape[1] != 2:
+                queue.put((index, Failure(Exception("Algorithm returned false bounds"))))
+                continue
+            pair_metrics = metrics.copy()
+            with measure(pair_metrics, POLYGON_PHASE):
+                polygon = display_polygon(output_bounds, directions)
+            pair_metrics.finished_at = time.time()
+            queue.put((index, Success(([(low, high) for low, high in output_bounds.tolist()], directions, polygon),
+                                      pair_metrics)))
+    except Exception as e:
+        for index in indices:
+            queue.put((index, Failure(e)))
+
+
+def run_batch(job: BatchJob, on_outcome: Callable[[PairOutcome, int], None] | None = None,
+              use_cache: bool = True, pool: WorkerPool | None = None) -> list[PairOutcome]:
+    '''
+    Runs every computation of the job in parallel on the worker pool, the workers also compute the polygons.
+    :param on_outcome: called with every outcome and the number of finished computations as they finish
+    :param use_cache: whether results of deterministic algorithms are reused and stored, see ResultCache
+    :param pool: the pool to run on, it is not shut down. Defaults to a dedicated pool with the job functions of the
+        batch mode, which is shut down at the end, the shared WorkerPool is not used.
+    :return: the outcomes in the order of BatchJob.computations
+    '''
+    owns_pool = pool is None
+    if owns_pool:
+        pool = WorkerPool.dedicated(size=job.workers, target=run_job, batch_target=run_job_batch)
+    computations = job.computations()
+    results = Queue()
+    outcomes: list[PairOutcome | None] = [None] * computations.__len__()
+    try:
+        for index, (network_index, algorithm_index, neurons) in enumerate(computations):
+            network = job.networks[network_index]
+            algorithm = job.algorithms[algorithm_index]
+            pool.submit(network.model, network.bounds, algorithm.path, neurons, job.num_directions,
+                        lambda result, index=index: results.put((index, result)), job.output_layer_mode,
+                        is_deterministic=use_cache and algorithm.is_deterministic, time_limit=job.time_limit,
+                        memory_limit=job.memory_limit, options=job.options)
+
+        for finished in range(1, computations.__len__() + 1):
+            index, result = results.get()
+            network_index, algorithm_index, neurons = computations[index]
+            outcome = PairOutcome(network_index, algorithm_index, neurons, result)
+            if result.is_success:
+                outcome.metrics = received_metrics(result.metrics)
+                outcome.polygon = result_polygon(result.data)
+            outcomes[index] = outcome
+            if on_outcome is not None:
+                on_outcome(outcome, finished)
+    finally:
+        if owns_pool:
+            pool.shutdown()
+    return outcomes
+
+
+def save_state_document(job: BatchJob, outcomes: list[PairOutcome]) -> dict:
+    '''
+    Builds a save-state in the format of SaveStateExporter, so the results can be opened in the user interface.
+    Every network gets one diagram with its successful pairs, each plot compares the algorithms on one neuron pair.
+    '''
+    networks = []
+    for network in job.networks:
+        bounds = {"values": network.bounds.tolist(), "sample": None}
+        networks.append({
+            "network": {"name": network.name, "path": network.path},
+            "layers_dimensions": network.layers_dimensions,
+            "activation_values": [],
+            "selected_bounds_index": 0,
+            "bounds": bounds,
+            "saved_bounds": [bounds],
+        })
+
+    diagrams = []
+    for network_index in range(job.networks.__len__()):
+        done = [outcome for outcome in outcomes
+                if outcome.network_index == network_index and outcome.result.is_success]
+        if not done:
+            continue
+        plots: dict[tuple, list[int]] = {}
+        for index, outcome in enumerate(done):
+            plots.setdefault(tuple(outcome.selected_neurons), []).append(index)
+        diagrams.append({
+            "plot_generation_configs": [{
+                "nn_index": network_index,
+                "algorithm": {
+                    "name": job.algorithms[outcome.algorithm_index].name,
+                    "path": job.algorithms[outcome.algorithm_index].path,
+                    "is_deterministic": job.algorithms[outcome.algorithm_index].is_deterministic,
+                },
+                "selected_neurons": [[layer, index] for layer, index in outcome.selected_neurons],
+                "parameters": [],
+                "bounds_index": 0,
+            } for outcome in done],
+            "polygons": [[[float(x), float(y)] for x, y in outcome.polygon] for outcome in done],
+            "plots": list(plots.values()),
+        })
+    return {"format": "nnvv_save_state", "version": 1, "loaded_networks": networks, "diagrams": diagrams}
+
+
+def write_batch_output(job: BatchJob, outcomes: list[PairOutcome], directory: str) -> Result[Path]:
+    '''
+    Writes the save-state, the bounds, polygons and timings of every pair and appends the timings to the
+    metrics log of the directory.
+    :param directory: output directory, created if needed
+    :return: path of the save-state file
+    '''
+    try:
+        output = Path(directory)
+        output.mkdir(parents=True, exist_ok=True)
+        pairs = []
+        for outcome in outcomes:
+            network = job.networks[outcome.network_index]
+            algorithm = job.algorithms[outcome.algorithm_index]
+            details = {"network": network.name, "algorithm": algorithm.name,
+                       "neurons": [[layer, index] for layer, index in outcome.selected_neurons]}
+            entry = dict(details)
+            if outcome.result.is_success:
+                bounds, directions = outcome.result.data[:2]
+                entry.update(status="done", bounds=[list(row) for row in bounds],
+                             directions=[list(direction) for direction in directions],
+                             polygon=[list(vertex) for vertex in outcome.polygon],
+                             metrics=outcome.metrics.to_dict() if outcome.metrics is not None else None)
+            else:
+                entry.update(status="failed", error=f"{type(outcome.result.error).__name__}: {outcome.result.error}")
+            pairs.append(entry)
+            if outcome.metrics is not None:
+                append_metrics_log(str(output / METRICS_FILE), outcome.metrics, **details,
+                                   num_directions=job.num_directions, output_layer_mode=job.output_layer_mode,
+                                   direction_mode=job.options.get("direction_mode", UNIFORM_DIRECTIONS))
+
+        (output / RESULTS_FILE).write_text(json.dumps({"version": package_version(), "pairs": pairs}),
+                                           encoding="utf-8")
+        save_state_path = output / SAVE_STATE_FILE
+        save_state_path.write_text(json.dumps(save_state_document(job, outcomes), ensure_ascii=False),
+                                   encoding="utf-8")
+        return Success(save_state_path)
+    except BaseException as e:
+        return Failure(e)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import numpy as np
+
+from nn_verification_visualisation.controller.process_manager.polygon import polygon_from_bounds
+
+UNIFORM_DIRECTIONS = "uniform"
+ADAPTIVE_DIRECTIONS = "adaptive"
+DIRECTION_MODES = (UNIFORM_DIRECTIONS, ADAPTIVE_DIRECTIONS)
+INITIAL_ADAPTIVE_DIRECTIONS = 8
+DEFAULT_DIRECTION_TOLERANCE = 1e-3
+
+
+def angle_directions(angles: list[float]) -> list[tuple[float, float]]:
+    '''
+    Directions (sin(angle), cos(angle)) like AlgorithmExecutor.calculate_directions creates them.
+    :param angles: angles in [0, pi)
+    :return: the directions
+    '''
+    return [(float(np.sin(angle)) + 1e-9, float(np.cos(angle)) + 1e-9) for angle in angles]
+
+
+def initial_angles(num_directions: int) -> list[float]:
+    '''
+    :param num_directions: the maximal number of directions
+    :return: the uniformly spaced angles the adaptive refinement starts with
+    '''
+    count = max(1, min(num_directions, INITIAL_ADAPTIVE_DIRECTIONS))
+    return [float(np.pi * i / count) for i in range(count)]
+
+
+def refinement_angles(angles: list[float], bounds: np.ndarray, tolerance: float, limit: int) -> list[float]:
+    '''
+    Finds the directions that would tighten the polygon the most.
+    Every direction bounds the polygon from two sides, so the edge normals are the angles and the angles + pi.
+    The exact set touches the edge of every normal, so between two neighbouring normals its support in the middle
+    normal is at least the smallest value any point of one of the two edges reaches, while the polygon reaches
+    its vertex between them. The difference is the gap, it is zero at real vertices and on straight sides.
+    :param angles: angles of the evaluated directions
+    :param bounds: np.ndarray (len(angles), 2) with the bounds of these directions
+    :param tolerance: gaps up to tolerance times the size of the polygon are accepted
+    :param limit: maximal number of new angles
+    :return: the new angles, largest gap first
+    '''
+    if limit <= 0 or angles.__len__() == 0:
+        return []
+    polygon = np.asarray(polygon_from_bounds(bounds, angle_directions(angles)))
+    if polygon.shape[0] < 3:
+        return []
+    size = max(float(np.ptp(polygon, axis=0).max()), 1e-12)
+
+    normal_angles = np.sort(np.concatenate([np.asarray(angles), np.asarray(angles) + np.pi]))
+    following = np.roll(normal_angles, -1)
+    following[-1] += 2 * np.pi
+    middle = (normal_angles + following) / 2
+
+    def projections(normal_angle: np.ndarray) -> np.ndarray:
+        return np.column_stack([np.sin(normal_angle), np.cos(normal_angle)]) @ polygon.T
+
+    # the vertices on the edge of every normal
+    edge_projections = projections(normal_angles)
+    on_edge = edge_projections >= edge_projections.max(axis=1, keepdims=True) - 1e-9 * size
+    middle_projections = projections(middle)
+    reached = np.maximum(np.where(on_edge, middle_projections, np.inf).min(axis=1),
+                         np.where(np.roll(on_edge, -1, axis=0), middle_projections, np.inf).min(axis=1))
+    gaps = middle_projections.max(axis=1) - reached
+
+    new_angles: list[float] = []
+    known = list(angles)
+    for index in np.argsort(-gaps):
+        if gaps[index] <= tolerance * size or new_angles.__len__() >= limit:
+            break
+        angle = float(middle[index] % np.pi)
+        # opposite normals lead to the same direction
+        if any(min(abs(angle - other) % np.pi, np.pi - abs(angle - other) % np.pi) < 1e-9 for other in known):
+            continue
+        new_angles.append(angle)
+        known.append(angle)
+    return new_angles
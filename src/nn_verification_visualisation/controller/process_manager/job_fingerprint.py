@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from nn_verification_visualisation.controller.process_manager import network_compiler
+from nn_verification_visualisation.model.data import network_ir
+
+# modules of the package that algorithms import, e.g. the NumPy ones, their results change with these files as well
+ALGORITHM_SUPPORT_MODULES = (network_compiler, network_ir)
+
+# absolute path -> ((mtime_ns, size), sha256)
+_file_hashes: dict[str, tuple[tuple[int, int], str]] = {}
+
+
+def file_hash(path: str) -> str:
+    '''
+    Content hash of a file, computed again only after the file was changed.
+    :param path: path to the file
+    :return: sha256 hex digest
+    '''
+    abs_path = str(Path(path).resolve())
+    stat = os.stat(abs_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _file_hashes.get(abs_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    digest = hashlib.sha256(Path(abs_path).read_bytes()).hexdigest()
+    _file_hashes[abs_path] = (version, digest)
+    return digest
+
+
+def job_fingerprint(model_key: str, input_bounds: np.ndarray, algorithm_path: str,
+                    selected_neurons: list[tuple[int, int]], num_directions: int, output_layer_mode: str,
+                    options: dict | None = None) -> str:
+    '''
+    Identifies an algorithm execution by everything its result depends on, two jobs with the same
+    fingerprint compute the same output bounds.
+    :param model_key: content hash of the network, see ModelStore
+    :param input_bounds: np.ndarray (N, 2) with [lower, upper]
+    :param algorithm_path: path to the algorithm file, its content is hashed together with the
+        ALGORITHM_SUPPORT_MODULES
+    :param selected_neurons: the selected neuron tuple
+    :param num_directions: amount of directions
+    :param output_layer_mode: how the output layer is built, see NetworkModifier
+    :param options: further keyword arguments of the job function, e.g. the direction mode
+    :return: sha256 hex digest
+    '''
+    bounds = np.ascontiguousarray(input_bounds, dtype=np.float64)
+    description = {
+        "model": model_key,
+        "bounds_shape": list(bounds.shape),
+        "bounds": hashlib.sha256(bounds.tobytes()).hexdigest(),
+        "algorithm": file_hash(algorithm_path),
+        "algorithm_support": [file_hash(module.__file__) for module in ALGORITHM_SUPPORT_MODULES],
+        "neurons": [[int(layer), int(index)] for layer, index in selected_neurons],
+        "num_directions": int(num_directions),
+        "output_layer_mode": output_layer_mode,
+        "options": options or {},
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from importlib.metadata import version, PackageNotFoundError
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:  # not available on Windows, the peaks are unknown there
+    resource = None
+
+DISPATCH_PHASE = "dispatch"
+MODIFY_PHASE = "modify"
+ALGORITHM_PHASE = "algorithm"
+POLYGON_PHASE = "polygon"
+HANDOFF_PHASE = "handoff"
+PHASES = (DISPATCH_PHASE, MODIFY_PHASE, ALGORITHM_PHASE, POLYGON_PHASE, HANDOFF_PHASE)
+PACKAGE_NAME = "nn_verification_visualisation"
+
+
+def peak_rss() -> int | None:
+    '''
+    :return: highest resident set size of this process in bytes since the last reset_peak_rss, None if unknown
+    '''
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss can't be reset and is in kilobytes on Linux, but in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss() -> None:
+    '''
+    Resets the peak of peak_rss to the current resident set size, so the next peak belongs to the next phase.
+    Only Linux supports this, elsewhere the peak of the whole process is measured.
+    '''
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+@dataclass
+class JobMetrics:
+    """
+    Wall-clock seconds and peak resident memory of the phases of one algorithm job:
+    dispatch - from submitting the job until the worker attached to the model
+    modify - building the output head for the directions, see NetworkModifier
+    algorithm - the algorithm itself
+    polygon - computing the polygon from the bounds
+    handoff - from the result leaving the worker until the user interface received it
+    The worker measures the first four phases, the result listener the handoff.
+    """
+    seconds: dict[str, float] = field(default_factory=dict)
+    peak_rss: dict[str, int | None] = field(default_factory=dict)
+    batch_size: int = 1
+    finished_at: float | None = None  # time.time() when the worker sent the result
+
+    def record(self, phase: str, seconds: float, peak: int | None) -> None:
+        '''
+        Adds a measurement, phases that run several times add up their seconds and keep their highest peak.
+        '''
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        previous = self.peak_rss.get(phase)
+        self.peak_rss[phase] = peak if previous is None or (peak is not None and peak > previous) else previous
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        '''
+        Measures the with block as the given phase.
+        '''
+        reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start, peak_rss())
+
+    def copy(self) -> JobMetrics:
+        return JobMetrics(dict(self.seconds), dict(self.peak_rss), self.batch_size, self.finished_at)
+
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    def summary(self) -> str:
+        '''
+        :return: one line per measured phase, e.g. "algorithm: 1.204 s, peak 180 MiB"
+        '''
+        lines = []
+        for phase in sorted(self.seconds, key=lambda name: PHASES.index(name) if name in PHASES else PHASES.__len__()):
+            line = f"{phase}: {self.seconds[phase]:.3f} s"
+            if self.peak_rss.get(phase) is not None:
+                line += f", peak {self.peak_rss[phase] / 1024 ** 2:.0f} MiB"
+            lines.append(line)
+        if self.batch_size > 1:
+            lines.append(f"modify and algorithm shared by {self.batch_size} pairs")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {"seconds": dict(self.seconds), "peak_rss": dict(self.peak_rss), "batch_size": self.batch_size}
+
+
+def measure(metrics: JobMetrics | None, phase: str):
+    '''
+    :return: JobMetrics.measure of the phase, or a context that measures nothing if metrics is None
+    '''
+    return metrics.measure(phase) if metrics is not None else nullcontext()
+
+
+def received_metrics(metrics: object) -> JobMetrics | None:
+    '''
+    Copies the metrics of a result that just arrived from a worker and records its HANDOFF_PHASE.
+    Results of identical jobs share their metrics object, so every receiver works on its own copy.
+    :param metrics: the metrics attribute of the result
+    :return: the copy, None if the result has no JobMetrics
+    '''
+    if not isinstance(metrics, JobMetrics):
+        return None
+    metrics = metrics.copy()
+    if metrics.finished_at is not None:
+        metrics.record(HANDOFF_PHASE, max(time.time() - metrics.finished_at, 0.0), peak_rss())
+        reset_peak_rss()
+    return metrics
+
+
+def package_version() -> str:
+    try:
+        return version(PACKAGE_NAME)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def append_metrics_log(path: str, metrics: JobMetrics, **details) -> bool:
+    '''
+    Appends the metrics as one JSON line, so the performance can be compared across releases.
+    :param path: the JSON-lines file, its directory is created if needed
+    :param details: further JSON values of the job, e.g. the algorithm and the number of directions
+    :return: whether the line was written
+    '''
+    record = {"time": datetime.now(timezone.utc).isoformat(), "version": package_version(), **details,
+              **metrics.to_dict()}
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+from onnx import ModelProto
+
+MAX_REMEMBERED_MODELS = 32
+SHARED_MEMORY_DIRECTORY = "/dev/shm"
+# references to a remembered model that nobody else holds: the entry and the argument of sys.getrefcount
+_UNUSED_REFERENCES = 2
+
+
+class ModelStore:
+    """
+    Publishes every network once as a memory-mapped file named after its content hash, so worker processes
+    read the model from the shared page cache instead of receiving a pickled copy per job.
+    On Linux the files live in /dev/shm and never touch the disk. They are removed by clear, when the store is
+    collected and at the exit of the interpreter.
+    """
+
+    def __init__(self, directory: str | None = None):
+        '''
+        :param directory: parent directory of the store, defaults to shared memory if available
+        '''
+        if directory is None and os.path.isdir(SHARED_MEMORY_DIRECTORY):
+            directory = SHARED_MEMORY_DIRECTORY
+        self._parent_directory = directory
+        self._directory: Path | None = None
+        self._remove_directory: weakref.finalize | None = None
+        self._lock = threading.Lock()
+        # remembers the hash per model object, so a network is serialized once and not once per job
+        self._keys: OrderedDict[int, tuple[ModelProto, str]] = OrderedDict()
+
+    def publish(self, model: ModelProto) -> tuple[str, str]:
+        '''
+        Writes the serialized model into the store unless a model with the same content is already published.
+        :param model: the network
+        :return: content hash of the model and path of its file
+        '''
+        with self._lock:
+            self._forget_unused()
+            entry = self._keys.get(id(model))
+            if entry is not None and entry[0] is model:
+                self._keys.move_to_end(id(model))
+                key = entry[1]
+                path = self._path(key)
+                if path.exists():
+                    return key, str(path)
+
+        data = model.SerializeToString()
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._keys[id(model)] = (model, key)
+            while self._keys.__len__() > MAX_REMEMBERED_MODELS:
+                self._keys.popitem(last=False)
+            path = self._path(key)
+            if not path.exists():
+                temporary = path.with_suffix(".tmp")
+                temporary.write_bytes(data)
+                temporary.replace(path)  # workers never see a half written file
+        return key, str(path)
+
+    @staticmethod
+    def attach(path: str) -> ModelProto:
+        '''
+        Parses a published model straight from its memory mapping.
+        :param path: path returned by publish
+        :return: the network
+        '''
+        model = ModelProto()
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            with memoryview(mapping) as view:
+                model.ParseFromString(view)
+        return model
+
+    def clear(self) -> None:
+        '''
+        Removes every published model.
+        '''
+        with self._lock:
+            self._keys.clear()
+            if self._remove_directory is not None:
+                self._remove_directory()
+                self._remove_directory = None
+                self._directory = None
+
+    def _forget_unused(self) -> None:
+        # ModelProto does not support weak references, so the entries keep their model alive and an id can't be
+        # reused while it is remembered. A model only the store still references belongs to a removed network.
+        unused = [model_id for model_id, entry in self._keys.items()
+                  if sys.getrefcount(entry[0]) <= _UNUSED_REFERENCES]
+        for model_id in unused:
+            del self._keys[model_id]
+
+    def _path(self, key: str) -> Path:
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="nnvv_models_", dir=self._parent_directory))
+            # also runs at exit, so the shared memory is given back if clear is never called
+            self._remove_directory = weakref.finalize(self, shutil.rmtree, str(self._directory), True)
+        return self._directory / f"{key}.onnx"
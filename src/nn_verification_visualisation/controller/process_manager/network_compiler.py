@@ -0,0 +1,367 @@
+from collections import Counter
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
+
+
+def _constant_value(node) -> np.ndarray:
+    value = next(iter(node.attributes.values()), None)
+    if value is None:
+        raise ValueError(f"Constant node {node.name!r} has no value.")
+    return np.asarray(value, dtype=np.float64)
+
+
+def _input_shape(network, input_size: int) -> tuple[int, ...]:
+    """
+    Shape of one input sample, without the batch axis. Inputs of unknown shape are a flat feature vector.
+    """
+    dims = network.input_shape
+    if dims and all(dims) and int(np.prod(dims)) == input_size:
+        return dims
+    return (input_size,)
+
+
+def _feature_vector(value: np.ndarray, shape: tuple[int, ...]) -> np.ndarray:
+    """
+    Broadcasts a constant operand to one value per feature of a tensor of the given shape.
+    """
+    value = np.asarray(value, dtype=np.float64)
+    while value.ndim > len(shape):
+        if value.shape[0] != 1:
+            raise ValueError(f"Constant of shape {value.shape} does not broadcast to a tensor of shape {shape}.")
+        value = value[0]
+    return np.broadcast_to(value, shape).reshape(-1)
+
+
+def _gather_indices(node, initializers: dict[str, np.ndarray]) -> np.ndarray:
+    indices_name = node.inputs[1]
+    if indices_name not in initializers:
+        raise ValueError(f"Gather indices initializer {indices_name!r} was not found.")
+    axis = node.attributes.get("axis", 0)
+    if axis not in (1, -1):
+        raise ValueError(f"Gather node {node.name!r} uses axis={axis}, only the feature axis is supported.")
+    return initializers[indices_name].astype(np.int64).reshape(-1)
+
+
+def _gemm_parameters(node, initializers: dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    if len(node.inputs) < 2:
+        raise ValueError(f"Gemm node {node.name!r} is missing inputs.")
+
+    weight_name = node.inputs[1]
+    bias_name = node.inputs[2] if len(node.inputs) > 2 and node.inputs[2] else None
+
+    if weight_name not in initializers:
+        raise ValueError(f"Gemm weight initializer {weight_name!r} was not found.")
+
+    attributes = node.attributes
+    if attributes.get("transA", 0):
+        raise ValueError(f"Gemm node {node.name!r} uses transA=1, which is not supported.")
+
+    weight = initializers[weight_name]
+    if attributes.get("transB", 0):
+        weight = weight.T
+    weight = attributes.get("alpha", 1.0) * weight
+
+    bias = np.zeros(weight.shape[1])
+    if bias_name is not None:
+        if bias_name not in initializers:
+            raise ValueError(f"Gemm bias initializer {bias_name!r} was not found.")
+        bias = bias + attributes.get("beta", 1.0) * initializers[bias_name].reshape(-1)
+    return weight, bias
+
+
+def conv_geometry(node, input_shape: tuple[int, ...], weight: np.ndarray) -> tuple:
+    """
+    :return: input shape, strides, pads (top, left, bottom, right), dilations, group and output shape of a 2D Conv
+    """
+    if weight.ndim != 4 or len(input_shape) != 3:
+        raise ValueError(f"Conv node {node.name!r} is not a 2D convolution, which is the only supported one.")
+    attributes = node.attributes
+    strides = tuple(attributes.get("strides", (1, 1)))
+    dilations = tuple(attributes.get("dilations", (1, 1)))
+    group = attributes.get("group", 1)
+    kernel = tuple((size - 1) * dilation + 1 for size, dilation in zip(weight.shape[2:], dilations))
+    auto_pad = attributes.get("auto_pad", b"NOTSET")
+    auto_pad = auto_pad.decode() if isinstance(auto_pad, bytes) else auto_pad
+    if auto_pad in ("NOTSET", "VALID"):
+        pads = tuple(attributes.get("pads", (0, 0, 0, 0))) if auto_pad == "NOTSET" else (0, 0, 0, 0)
+    else:
+        totals = [max((-(-size // stride) - 1) * stride + extent - size, 0)
+                  for size, stride, extent in zip(input_shape[1:], strides, kernel)]
+        first = [total // 2 if auto_pad == "SAME_UPPER" else total - total // 2 for total in totals]
+        pads = (first[0], first[1], totals[0] - first[0], totals[1] - first[1])
+    if input_shape[0] != weight.shape[1] * group:
+        raise ValueError(f"Conv node {node.name!r} expects {weight.shape[1] * group} channels, got {input_shape[0]}.")
+    output_shape = (weight.shape[0],) + tuple(
+        (size + pads[axis] + pads[axis + 2] - extent) // stride + 1
+        for axis, (size, stride, extent) in enumerate(zip(input_shape[1:], strides, kernel)))
+    return input_shape, strides, pads, dilations, group, output_shape
+
+
+def conv(rows: np.ndarray, weight: np.ndarray, geometry: tuple, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Convolution of flattened samples, one per row, by im2col on a strided view of the padded input.
+    :param out: receives the result if given
+    :return: np.ndarray (rows, output features), without bias
+    """
+    input_shape, strides, pads, dilations, group, output_shape = geometry
+    images = rows.reshape((-1,) + input_shape)
+    if any(pads):
+        images = np.pad(images, ((0, 0), (0, 0), (pads[0], pads[2]), (pads[1], pads[3])))
+    kernel = tuple((size - 1) * dilation + 1 for size, dilation in zip(weight.shape[2:], dilations))
+    # (rows, channels, output height, output width, kernel height, kernel width)
+    windows = sliding_window_view(images, kernel, axis=(2, 3))[
+        :, :, ::strides[0], ::strides[1], ::dilations[0], ::dilations[1]]
+    group_channels = weight.shape[1]
+    group_outputs = weight.shape[0] // group
+    outputs = [
+        np.tensordot(windows[:, index * group_channels:(index + 1) * group_channels],
+                     weight[index * group_outputs:(index + 1) * group_outputs], axes=([1, 4, 5], [1, 2, 3]))
+        for index in range(group)
+    ]
+    output = outputs[0] if group == 1 else np.concatenate(outputs, axis=3)
+    if out is None:
+        return output.transpose(0, 3, 1, 2).reshape(rows.shape[0], -1)
+    out.reshape((rows.shape[0],) + output_shape)[...] = output.transpose(0, 3, 1, 2)
+    return out
+
+
+def _reshaped(node, input_shape: tuple[int, ...], target: np.ndarray) -> tuple[int, ...]:
+    full_shape = (1,) + input_shape
+    target = [full_shape[axis] if size == 0 else int(size) for axis, size in enumerate(target.reshape(-1))]
+    if -1 in target:
+        known = int(np.prod([size for size in target if size != -1]))
+        target[target.index(-1)] = int(np.prod(full_shape)) // max(known, 1)
+    if int(np.prod(target)) != int(np.prod(full_shape)) or target[0] != 1:
+        raise ValueError(f"Reshape node {node.name!r} changes the batch axis, which is not supported.")
+    return tuple(target[1:])
+
+
+def compile_network(network: NetworkIR, input_size: int) -> list[tuple]:
+    """
+    Reads the initializers and attributes of all nodes once, so bounding the network only does arithmetic.
+    Every node becomes one of the steps
+    - Gemm (weight, bias): x @ weight + bias, also MatMul with a constant weight
+    - Conv (weight, bias, geometry)
+    - Affine (scale, shift): x * scale + shift per feature, from Add / Sub / Mul / Div with a constant and
+      BatchNormalization. It is folded into a directly preceding Gemm, Conv or Affine where possible
+    - Sum (sign): x + sign * y of two tensors
+    - Reshape (): Flatten and Reshape, the flattened features stay the same
+    - Relu (in_place): in_place if nothing else reads the input, directly or through a Reshape
+    - Gather (indices) and Concat on the feature axis
+    The NumPy algorithms in the algorithms directory share these steps and only differ in how they propagate them.
+    :param network: the decoded network
+    :param input_size: number of input features
+    :return: one (op_type, input names, output name, parameters) step per node
+    """
+    initializers = dict(network.initializers)
+    consumers = Counter(name for node in network.layers for name in node.inputs)
+    consumers.update(network.output_names)
+    shapes: dict[str, tuple[int, ...]] = {network.input_name: _input_shape(network, input_size)}
+    steps = []
+
+    def tensor_input(node, position: int = 0) -> str:
+        name = node.inputs[position]
+        if name not in shapes:
+            raise ValueError(f"Missing bounds for input tensor {name!r}.")
+        return name
+
+    def constant_input(node, position: int) -> np.ndarray:
+        name = node.inputs[position]
+        if name not in initializers:
+            raise ValueError(f"{node.op_type} node {node.name!r} needs the constant {name!r}.")
+        return initializers[name]
+
+    def add_affine(node, name: str, scale: np.ndarray, shift: np.ndarray):
+        scale = _feature_vector(scale, shapes[name])
+        shift = _feature_vector(shift, shapes[name])
+        shapes[node.outputs[0]] = shapes[name]
+        previous = steps[-1] if steps else None
+        if previous is not None and previous[2] == name and consumers[name] == 1:
+            if previous[0] == "Affine":
+                previous_scale, previous_shift = previous[3]
+                steps[-1] = ("Affine", previous[1], node.outputs[0],
+                             (previous_scale * scale, previous_shift * scale + shift))
+                return
+            if previous[0] == "Gemm":
+                weight, bias = previous[3]
+                steps[-1] = ("Gemm", previous[1], node.outputs[0], (weight * scale, bias * scale + shift))
+                return
+            channel_scale = scale.reshape(shapes[name][0], -1)
+            if previous[0] == "Conv" and np.all(channel_scale == channel_scale[:, :1]):
+                weight, bias, geometry = previous[3]
+                steps[-1] = ("Conv", previous[1], node.outputs[0],
+                             (weight * channel_scale[:, 0, None, None, None], bias * scale + shift, geometry))
+                return
+        steps.append(("Affine", [name], node.outputs[0], (scale, shift)))
+
+    for node in network.layers:
+        if node.op_type == "Constant":
+            initializers[node.outputs[0]] = _constant_value(node)
+            continue
+
+        if node.op_type == "Gemm":
+            name = tensor_input(node)
+            weight, bias = _gemm_parameters(node, initializers)
+            steps.append(("Gemm", [name], node.outputs[0], (weight, bias)))
+            shapes[node.outputs[0]] = (weight.shape[1],)
+        elif node.op_type == "MatMul":
+            name = tensor_input(node)
+            weight = constant_input(node, 1)
+            if weight.ndim != 2 or len(shapes[name]) != 1:
+                raise ValueError(f"MatMul node {node.name!r} is only supported on feature vectors.")
+            steps.append(("Gemm", [name], node.outputs[0], (weight, np.zeros(weight.shape[1]))))
+            shapes[node.outputs[0]] = (weight.shape[1],)
+        elif node.op_type == "Conv":
+            name = tensor_input(node)
+            weight = constant_input(node, 1)
+            geometry = conv_geometry(node, shapes[name], weight)
+            output_shape = geometry[-1]
+            bias = np.zeros(output_shape)
+            if len(node.inputs) > 2 and node.inputs[2]:
+                bias = bias + constant_input(node, 2).reshape(-1, 1, 1)
+            steps.append(("Conv", [name], node.outputs[0], (weight, bias.reshape(-1), geometry)))
+            shapes[node.outputs[0]] = output_shape
+        elif node.op_type in ("Add", "Sub", "Mul", "Div"):
+            tensors = [name for name in node.inputs if name in shapes]
+            if len(tensors) == 2 and node.op_type in ("Add", "Sub"):
+                if shapes[tensors[0]] != shapes[tensors[1]]:
+                    raise ValueError(f"{node.op_type} node {node.name!r} adds tensors of different shapes.")
+                steps.append(("Sum", tensors, node.outputs[0], (1.0 if node.op_type == "Add" else -1.0,)))
+                shapes[node.outputs[0]] = shapes[tensors[0]]
+                continue
+            if len(tensors) != 1:
+                raise ValueError(f"{node.op_type} node {node.name!r} is only supported with one constant operand.")
+            tensor_first = node.inputs[0] in shapes
+            name = tensor_input(node, 0 if tensor_first else 1)
+            constant = constant_input(node, 1 if tensor_first else 0)
+            if node.op_type == "Add":
+                add_affine(node, name, np.ones(1), constant)
+            elif node.op_type == "Sub" and tensor_first:
+                add_affine(node, name, np.ones(1), -constant)
+            elif node.op_type == "Sub":
+                add_affine(node, name, -np.ones(1), constant)
+            elif node.op_type == "Mul":
+                add_affine(node, name, constant, np.zeros(1))
+            elif tensor_first:
+                add_affine(node, name, 1.0 / constant, np.zeros(1))
+            else:
+                raise ValueError(f"Div node {node.name!r} divides by a tensor, which is not supported.")
+        elif node.op_type == "BatchNormalization":
+            name = tensor_input(node)
+            scale, offset, mean, variance = (constant_input(node, position) for position in range(1, 5))
+            factor = scale / np.sqrt(variance + node.attributes.get("epsilon", 1e-5))
+            channel_axes = (-1,) + (1,) * (len(shapes[name]) - 1)
+            add_affine(node, name, factor.reshape(channel_axes), (offset - mean * factor).reshape(channel_axes))
+        elif node.op_type == "Flatten":
+            name = tensor_input(node)
+            if node.attributes.get("axis", 1) != 1:
+                raise ValueError(f"Flatten node {node.name!r} only supports axis=1.")
+            steps.append(("Reshape", [name], node.outputs[0], ()))
+            shapes[node.outputs[0]] = (int(np.prod(shapes[name])),)
+        elif node.op_type == "Reshape":
+            name = tensor_input(node)
+            steps.append(("Reshape", [name], node.outputs[0], ()))
+            shapes[node.outputs[0]] = _reshaped(node, shapes[name], constant_input(node, 1))
+        elif node.op_type == "Relu":
+            name = tensor_input(node)
+            steps.append(("Relu", [name], node.outputs[0], (False,)))
+            shapes[node.outputs[0]] = shapes[name]
+        elif node.op_type == "Gather":
+            name = tensor_input(node)
+            indices = _gather_indices(node, initializers)
+            steps.append(("Gather", [name], node.outputs[0], (indices,)))
+            shapes[node.outputs[0]] = (indices.shape[0],)
+        elif node.op_type == "Concat":
+            names = [tensor_input(node, position) for position in range(len(node.inputs))]
+            if node.attributes.get("axis", 1) not in (1, -len(shapes[names[0]])):
+                raise ValueError(f"Concat node {node.name!r} only supports the feature axis.")
+            if len({shapes[name][1:] for name in names}) != 1:
+                raise ValueError(f"Concat node {node.name!r} joins tensors of different shapes.")
+            steps.append(("Concat", names, node.outputs[0], ()))
+            shapes[node.outputs[0]] = (sum(shapes[name][0] for name in names),) + shapes[names[0]][1:]
+        else:
+            raise ValueError(
+                f"Unsupported ONNX operator {node.op_type!r} in node {node.name!r}. "
+                "The NumPy algorithms currently support Gemm, MatMul, Conv, Add, Sub, Mul, Div, "
+                "BatchNormalization, Flatten, Reshape, Relu, Gather and Concat only."
+            )
+
+    # Reshape outputs share the values of their input
+    exclusive = {network.input_name: consumers[network.input_name] == 1}
+    for index, (op_type, inputs, output_name, parameters) in enumerate(steps):
+        exclusive[output_name] = consumers[output_name] == 1 and (op_type != "Reshape" or exclusive[inputs[0]])
+        if op_type == "Relu":
+            steps[index] = (op_type, inputs, output_name, (exclusive[inputs[0]],))
+    return steps
+
+
+def split_weight(weight: np.ndarray) -> np.ndarray:
+    """
+    Positive and negative part of the weight side by side, so one product of the stacked lower and upper bounds
+    gives all four partial products of interval arithmetic.
+    """
+    return np.concatenate([np.maximum(weight, 0.0), np.minimum(weight, 0.0)], axis=1)
+
+
+def interval_gemm(
+    lower: np.ndarray,
+    upper: np.ndarray,
+    split: np.ndarray,
+    bias: np.ndarray | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Interval bounds of x @ weight + bias for one row of lower and upper bounds per box.
+    :param split: the weight, see split_weight
+    """
+    box_count = lower.shape[0]
+    out_features = split.shape[1] // 2
+    # (2B, F) @ (F, 2M): lower and upper bounds of all boxes times the positive and negative weights at once
+    products = np.concatenate([lower, upper]) @ split
+    lower_pos, lower_neg = products[:box_count, :out_features], products[:box_count, out_features:]
+    upper_pos, upper_neg = products[box_count:, :out_features], products[box_count:, out_features:]
+
+    out_lower = lower_pos + upper_neg
+    out_upper = upper_pos + lower_neg
+
+    if bias is not None:
+        out_lower += bias
+        out_upper += bias
+
+    return out_lower, out_upper
+
+
+def interval_conv(
+    lower: np.ndarray,
+    upper: np.ndarray,
+    weight_pos: np.ndarray,
+    weight_neg: np.ndarray,
+    bias: np.ndarray,
+    geometry: tuple,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Interval bounds of a Conv step, see conv, with the positive and negative part of its weight.
+    """
+    box_count = lower.shape[0]
+    stacked = np.concatenate([lower, upper])
+    products_pos = conv(stacked, weight_pos, geometry)
+    products_neg = conv(stacked, weight_neg, geometry)
+    out_lower = products_pos[:box_count] + products_neg[box_count:] + bias
+    out_upper = products_pos[box_count:] + products_neg[:box_count] + bias
+    return out_lower, out_upper
+
+
+def interval_affine(
+    lower: np.ndarray,
+    upper: np.ndarray,
+    scale: np.ndarray,
+    shift: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Interval bounds of an Affine step x * scale + shift.
+    """
+    scaled_lower = lower * scale
+    scaled_upper = upper * scale
+    return np.minimum(scaled_lower, scaled_upper) + shift, np.maximum(scaled_lower, scaled_upper) + shift
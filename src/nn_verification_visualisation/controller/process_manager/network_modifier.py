@@ -1,11 +1,19 @@
 import copy
+from contextlib import contextmanager
+from typing import Iterator
 
 import numpy as np
-from onnx import ModelProto, TensorProto, NodeProto
+from onnx import ModelProto, TensorProto, NodeProto, GraphProto
 import onnx
-from sympy import true
-from sympy.codegen.ast import none
 
+BRIDGE_OUTPUT_LAYER_MODE = "bridge"
+TAP_OUTPUT_LAYER_MODE = "tap"
+OUTPUT_LAYER_MODE_LABELS = {
+    BRIDGE_OUTPUT_LAYER_MODE: "Bridge neurons",
+    TAP_OUTPUT_LAYER_MODE: "Graph tap",
+}
+DEFAULT_OUTPUT_LAYER_MODE = BRIDGE_OUTPUT_LAYER_MODE
+LINEAR_LAYER_OPS = {"Gemm", "MatMul", "Conv"}
 
 class NetworkModifier:
     """
@@ -68,7 +76,9 @@ class NetworkModifier:
         :param directions: List of directions, that represent linear combinations of neurons
         :return: the new model
         '''
-        model = copy.deepcopy(static_model)     #deepcopies so the original model does not change
+        # copies so the original model does not change, without the layers behind the one after the deepest neuron
+        model = NetworkModifier.truncated_copy(self, static_model,
+                                               NetworkModifier.bridge_truncation_index(self, static_model, neurons))
         output_names = model.graph.node[-1].output
         if output_names.__len__() != 1:
             raise RuntimeError("The last layer of the network must have exactly one output")
@@ -85,101 +95,346 @@ class NetworkModifier:
         model.graph.output[0].type.tensor_type.shape.dim[-1].dim_value =  directions.__len__()  #modifies the output dim, so it matches with the initializers
 
         return model
+
+    def tapped_output_layer(self, static_model: ModelProto, neurons: list[tuple[int, int]],
+                            directions: list[tuple[float, float]], in_place: bool = False) -> ModelProto:
+        '''
+        Taps the tensors of the selected neurons directly and projects them with a small Gather + Gemm head.
+        The weight initializers of the network are shared as they are, nothing is decoded or rewritten, so the model
+        only grows by the head with len(neurons) x len(directions) parameters.
+        Unlike the bridge neurons, hidden neurons are tapped after their bias (pre-activation after bias).
+        The nodes behind the deepest tapped tensor are removed, see tap_truncation_index.
+        :param static_model: the whole network, which is not changed in this function unless in_place is set
+        :param neurons: List of neurons, that should be used for the calculation
+        :param directions: List of directions, that represent linear combinations of neurons
+        :param in_place: appends the head to static_model itself instead of a copy, see tapped_network
+        :return: the new model
+        '''
+        layer_outputs = NetworkModifier.layer_output_names(self, static_model)
+        for layer, _ in neurons:
+            if layer < 0 or layer >= layer_outputs.__len__():
+                raise ValueError(f"Layer {layer} does not exist, the network has {layer_outputs.__len__()} layers")
+
+        node_count = NetworkModifier.tap_truncation_index(self, static_model, neurons)
+        model = static_model
+        if in_place:
+            del model.graph.node[node_count:]
+        else:
+            # plain protobuf copy, the packed tensors are not decoded
+            model = NetworkModifier.truncated_copy(self, static_model, node_count)
+
+        # one Gather per tapped tensor, the neurons keep their column inside the gathered block
+        tapped_indices: dict[str, list[int]] = {}
+        columns: list[tuple[str, int]] = []
+        for layer, index in neurons:
+            indices = tapped_indices.setdefault(layer_outputs[layer], [])
+            columns.append((layer_outputs[layer], indices.__len__()))
+            indices.append(index)
+
+        gathered = []
+        block_offsets: dict[str, int] = {}
+        block_offset = 0
+        for position, (tensor_name, indices) in enumerate(tapped_indices.items()):
+            block_offsets[tensor_name] = block_offset
+            block_offset += indices.__len__()
+            indices_name = f"tap_indices_{position}"
+            model.graph.initializer.append(
+                onnx.numpy_helper.from_array(np.asarray(indices, dtype=np.int64), indices_name))
+            gathered.append(f"tap_gather_{position}")
+            model.graph.node.append(onnx.helper.make_node(
+                "Gather", [tensor_name, indices_name], [gathered[-1]], name=gathered[-1], axis=1))
+        tapped = gathered[0]
+        if gathered.__len__() > 1:
+            tapped = "tap_values"
+            model.graph.node.append(onnx.helper.make_node("Concat", gathered, [tapped], name=tapped, axis=1))
+
+        # row r of the head weights holds the direction components of the neuron gathered into column r
+        weights = np.zeros((neurons.__len__(), directions.__len__()), dtype=np.float32)
+        direction_rows = np.asarray(directions, dtype=np.float32).reshape(directions.__len__(), neurons.__len__()).T
+        for neuron_position, (tensor_name, column) in enumerate(columns):
+            weights[block_offsets[tensor_name] + column] = direction_rows[neuron_position]
+        model.graph.initializer.append(onnx.numpy_helper.from_array(weights, "output_initializer_W"))
+        model.graph.initializer.append(onnx.numpy_helper.from_array(
+            np.zeros(directions.__len__(), dtype=np.float32), "output_initializer_B"))
+        model.graph.node.append(onnx.helper.make_node(
+            "Gemm", [tapped, "output_initializer_W", "output_initializer_B"], ["tap_output"], name="new_output"))
+
+        output = onnx.ValueInfoProto()
+        output.CopyFrom(model.graph.output[0])
+        output.name = "tap_output"
+        output.type.tensor_type.shape.dim[-1].dim_value = directions.__len__()
+        del model.graph.output[:]
+        model.graph.output.append(output)
+        return model
+
+    @contextmanager
+    def tapped_network(self, model: ModelProto, neurons: list[tuple[int, int]],
+                       directions: list[tuple[float, float]]) -> Iterator[ModelProto]:
+        '''
+        Adds the tap head to the model itself for the duration of the with block and removes it afterwards,
+        so not even the protobuf copy of tapped_output_layer is made. Only the nodes behind the deepest tapped
+        tensor are copied, to restore them afterwards.
+        :param model: the whole network, it is the same again after the with block
+        :param neurons: List of neurons, that should be used for the calculation
+        :param directions: List of directions, that represent linear combinations of neurons
+        :return: the model with the head
+        '''
+        node_count = NetworkModifier.tap_truncation_index(self, model, neurons)
+        initializer_count = model.graph.initializer.__len__()
+        outputs = [copy.deepcopy(output) for output in model.graph.output]
+        removed = [copy.deepcopy(node) for node in model.graph.node[node_count:]]
+        try:
+            yield self.tapped_output_layer(model, neurons, directions, in_place=True)
+        finally:
+            del model.graph.node[node_count:]
+            model.graph.node.extend(removed)
+            del model.graph.initializer[initializer_count:]
+            del model.graph.output[:]
+            model.graph.output.extend(outputs)
+
+    @staticmethod
+    def batched_selection(neuron_pairs: list[list[tuple[int, int]]], directions: list[tuple[float, float]]) -> tuple[
+            list[tuple[int, int]], list[tuple[float, ...]]]:
+        '''
+        Combines several neuron selections into one, so a single output head projects the directions of all of them.
+        Every neuron is selected once, the directions of selection p become the output rows
+        p * len(directions) to (p + 1) * len(directions) - 1 and are zero outside of the neurons of p.
+        :param neuron_pairs: the neuron selections, e.g. one per diagram pair
+        :param directions: List of directions, used for every selection
+        :return: the combined neurons and the combined directions, usable by both output layer modes
+        '''
+        return NetworkModifier.batched_selection_per_pair(neuron_pairs, [directions] * neuron_pairs.__len__())
+
+    @staticmethod
+    def batched_selection_per_pair(neuron_pairs: list[list[tuple[int, int]]],
+                                   pair_directions: list[list[tuple[float, float]]]) -> tuple[
+            list[tuple[int, int]], list[tuple[float, ...]]]:
+        '''
+        Like batched_selection, but every selection has its own directions. Their rows follow each other in the
+        order of the selections.
+        :param neuron_pairs: the neuron selections
+        :param pair_directions: List of directions per selection
+        :return: the combined neurons and the combined directions
+        '''
+        neurons: list[tuple[int, int]] = []
+        positions: dict[tuple[int, int], int] = {}
+        for pair in neuron_pairs:
+            for layer, index in pair:
+                neuron = (int(layer), int(index))
+                if neuron not in positions:
+                    positions[neuron] = neurons.__len__()
+                    neurons.append(neuron)
+
+        batched_directions = np.zeros((sum(directions.__len__() for directions in pair_directions), neurons.__len__()))
+        first_row = 0
+        for pair, directions in zip(neuron_pairs, pair_directions):
+            rows = batched_directions[first_row:first_row + directions.__len__()]
+            first_row += directions.__len__()
+            for component, (layer, index) in enumerate(pair):
+                # += so a pair that selects one neuron twice gets the sum of both components
+                rows[:, positions[(int(layer), int(index))]] += np.asarray(directions, dtype=float)[:, component]
+        return neurons, [tuple(row) for row in batched_directions.tolist()]
+
+    @staticmethod
+    def layer_output_names(self, model: ModelProto) -> list[str]:
+        '''
+        Finds the tensor of every layer: layer 0 is the network input, layer k is the output of the k-th linear layer
+        after its bias, i.e. the pre-activation values.
+        :param model: the whole network
+        :return: the tensor names, indexed by layer
+        '''
+        initializer_names = {initializer.name for initializer in model.graph.initializer}
+        inputs = [element.name for element in model.graph.input if element.name not in initializer_names]
+        if not inputs:
+            raise RuntimeError("The network has no input")
+        consumers: dict[str, list[NodeProto]] = {}
+        for node in model.graph.node:
+            for name in node.input:
+                consumers.setdefault(name, []).append(node)
+
+        names = [inputs[0]]
+        for node in model.graph.node:
+            if node.op_type not in LINEAR_LAYER_OPS:
+                continue
+            name = node.output[0]
+            following = consumers.get(name, [])
+            if node.op_type != "Gemm" and following.__len__() == 1 and following[0].op_type == "Add":
+                name = following[0].output[0]   # MatMul / Conv with a separate bias
+            names.append(name)
+        return names
+
+    @staticmethod
+    def tap_truncation_index(self, model: ModelProto, neurons: list[tuple[int, int]]) -> int:
+        '''
+        :param model: the whole network
+        :param neurons: the tapped neurons
+        :return: number of leading nodes that compute the tensors of the neurons, the nodes after them only lead to
+            deeper layers
+        '''
+        layer_outputs = NetworkModifier.layer_output_names(self, model)
+        deepest = max((layer for layer, _ in neurons), default=layer_outputs.__len__() - 1)
+        if deepest <= 0 or deepest >= layer_outputs.__len__():
+            return 0 if deepest == 0 else model.graph.node.__len__()
+        for index, node in enumerate(model.graph.node):
+            if layer_outputs[deepest] in node.output:
+                return index + 1
+        return model.graph.node.__len__()
+
+    @staticmethod
+    def bridge_truncation_index(self, model: ModelProto, neurons: list[tuple[int, int]]) -> int:
+        '''
+        The bridge neurons count the layers by their initializers, layer k ends with the node that adds the bias
+        2 * (k - 1) + offset + 1. Neurons of layer 0 start their bridge in layer 1.
+        One layer behind the deepest neuron is kept, its bias takes the 500 of the bridges away again after the
+        relu, so the deepest neurons are clipped at -500 like the shallower ones and like on the whole network.
+        :param model: the whole network
+        :param neurons: the selected neurons
+        :return: number of leading nodes up to the layer behind the deepest neuron
+        '''
+        offset = 1 if model.graph.initializer and model.graph.initializer[0].dims.__len__() > 3 else 0
+        deepest = max((layer for layer, _ in neurons), default=0)
+        bias_index = 2 * max(deepest, 1) + offset + 1
+        if not neurons or bias_index >= model.graph.initializer.__len__():
+            return model.graph.node.__len__()
+        bias_name = model.graph.initializer[bias_index].name
+        for index, node in enumerate(model.graph.node):
+            if bias_name in node.input:
+                return index + 1
+        return model.graph.node.__len__()
+
+    @staticmethod
+    def truncated_copy(self, model: ModelProto, node_count: int) -> ModelProto:
+        '''
+        Copies the model with only its first node_count nodes. Initializers and graph inputs that no remaining node
+        reads are left out, so the layers behind the cut are not even copied.
+        :param model: the whole network, which is not changed
+        :param node_count: number of leading nodes that are kept
+        :return: the truncated copy, the graph outputs still have to be set by the caller
+        '''
+        if node_count >= model.graph.node.__len__():
+            truncated = ModelProto()
+            truncated.CopyFrom(model)
+            return truncated
+
+        graph = GraphProto()
+        for field, value in model.graph.ListFields():
+            if field.name not in ("node", "initializer", "input", "value_info"):
+                NetworkModifier._copy_field(graph, field, value)
+        graph.node.extend(model.graph.node[:node_count])
+        read = {name for node in graph.node for name in node.input}
+        produced = {name for node in graph.node for name in node.output}
+        initializer_names = {initializer.name for initializer in model.graph.initializer}
+        graph.initializer.extend(initializer for initializer in model.graph.initializer if initializer.name in read)
+        graph.input.extend(element for element in model.graph.input
+                           if element.name not in initializer_names or element.name in read)
+        graph.value_info.extend(element for element in model.graph.value_info if element.name in produced)
+
+        truncated = ModelProto()
+        for field, value in model.ListFields():
+            if field.name != "graph":
+                NetworkModifier._copy_field(truncated, field, value)
+        truncated.graph.CopyFrom(graph)
+        return truncated
+
+    @staticmethod
+    def _copy_field(target, field, value):
+        if hasattr(value, "extend"):    # repeated field
+            getattr(target, field.name).extend(value)
+        elif hasattr(value, "CopyFrom"):
+            getattr(target, field.name).CopyFrom(value)
+        else:
+            setattr(target, field.name, value)
+
     @staticmethod
     def change_initialiser_data_format(self, model:ModelProto) -> ModelProto:
         '''
-        This method forces the data format to be float data
+        This method forces the data format to be float32, stored as packed raw data.
+        Every tensor is converted as a whole, initializers that already hold float32 values are left untouched.
         :param model: the model that is changed
         :return: the model with the correct data format
         '''
-        for element in model.graph.initializer :
-            numpy_initializer = onnx.numpy_helper.to_array(element, np.float32)                 # saves the data as a numpy array
-            name = element.name
-            element.Clear()
-            for entry in np.nditer(numpy_initializer):
-                element.float_data.append(float(entry))                                        # adds the data back, forced as float
-            for dim in numpy_initializer.shape:
-                element.dims.append(dim)
-            element.data_type = 1
-            element.name = name
+        for element in model.graph.initializer:
+            if element.data_type == TensorProto.FLOAT:
+                continue
+            numpy_initializer = onnx.numpy_helper.to_array(element).astype(np.float32)    # converts the whole tensor at once
+            element.CopyFrom(onnx.numpy_helper.from_array(numpy_initializer, element.name))  # packed as raw data
         return model
 
     @staticmethod
-    def add_bridge_neurons(self, model: ModelProto, neurons: list[tuple[int, int]], directions: list[tuple[float, float]]) -> ModelProto:
+    def initializers_to_arrays(self, model: ModelProto, first_layer: int = 0) -> dict[int, np.ndarray]:
         '''
+        Decodes the initializers that are edited by the bridge neurons, each of them exactly once.
+        :param model: the whole network
+        :param first_layer: index of the first initializer that is decoded
+        :return: mapping from initializer index to its values as a float32 array
+        '''
+        return {
+            layer: onnx.numpy_helper.to_array(model.graph.initializer[layer]).astype(np.float32, copy=False)
+            for layer in range(max(first_layer, 0), model.graph.initializer.__len__())
+        }
 
+    @staticmethod
+    def arrays_to_initializers(self, model: ModelProto, arrays: dict[int, np.ndarray]) -> ModelProto:
+        '''
+        Writes the edited arrays back into the model as packed float32 initializers.
         :param model: the whole network
-        :param neurons: List of neurons, that should be used for the calculation
-        :param directions: List of directions, that represent linear combinations of neurons
+        :param arrays: mapping from initializer index to its new values
         :return: the modified model
         '''
-        offset = 0
-        if model.graph.initializer[0].dims.__len__() > 3:                     # adds an offset to the layer iteration if a preprocess layer exists (problem if there are more)
-            offset = 1
-        dirty_trick_constant = 500                                          # this is the constant for fooling relu on bridge neurons
-        for neuron in neurons:
-            NetworkModifier.modify_layers_post_activation(self,model, neuron, offset, dirty_trick_constant)
-        for neuron_ind in range(0, neurons.__len__()):          # changes the last initializer to match the output
-            if 2 * neurons[neuron_ind][0] + offset == model.graph.initializer.__len__() - 2 :
-                for direction in range(0, directions.__len__()):                    # adds the values of the directions into the last matrix multiplication
-                    model.graph.initializer[model.graph.initializer.__len__() - 2].float_data.remove(0)
-                    (model.graph.initializer[model.graph.initializer.__len__() - 2].float_data.insert(
-                     model.graph.initializer[model.graph.initializer.__len__() - 2].dims[1] * (neurons[neuron_ind][1] + 1 ) - 1,directions[direction][neuron_ind]))
-            else:
-                for direction in directions:
-                    model.graph.initializer[model.graph.initializer.__len__() - 2].float_data.append(direction[neuron_ind])
+        for layer, array in arrays.items():
+            element = model.graph.initializer[layer]
+            element.CopyFrom(onnx.numpy_helper.from_array(np.ascontiguousarray(array, dtype=np.float32), element.name))
         return model
 
     @staticmethod
-    def modify_layers_post_activation(self, model: ModelProto, neuron: tuple[int, int],
-                           offset:int, dirty_trick_constant:int) -> ModelProto:
-        for layer in range(2 * neuron[0] + offset,
-                           model.graph.initializer.__len__() - 1):  # goes through all layers following
-            if model.graph.initializer[layer].dims.__len__() < 3:
-                if layer != 2 * neuron[0] + offset:
-                    model.graph.initializer[layer].dims[
-                        0] += 1  # changes the dims off all following layers to the layer of the selected neuron
-                if model.graph.initializer[
-                    layer].dims.__len__() == 2 and layer != model.graph.initializer.__len__() - 2:  # adds connections to Matrix layers
-                    model.graph.initializer[layer].dims[1] += 1  # changes the 2 dim for the matrix multiplication
-                    if layer == 2 * neuron[0] + offset:
-                        for node in range(0, model.graph.initializer[layer].dims[0]):
-                            if node == neuron[1]:
-                                model.graph.initializer[layer].float_data.insert(
-                                    # adds the connections between the new neurons
-                                    (node + 1) * model.graph.initializer[layer].dims[1] - 1, 1)
-                            else:
-                                model.graph.initializer[layer].float_data.insert(
-                                    # adds the connections between old and new neurons
-                                    (node + 1) * model.graph.initializer[layer].dims[1] - 1, 0)
-                    else:
-                        for node in range(1, model.graph.initializer[layer].dims[0] - 1):
-                            model.graph.initializer[layer].float_data.insert(  # adds the connections to the new neurons
-                                node * model.graph.initializer[layer].dims[1] - 1, 0)
-                        model.graph.initializer[layer].float_data.append(0)
-                        for node in range(1, model.graph.initializer[layer].dims[1]):
-                            model.graph.initializer[layer].float_data.append(
-                                0)  # adds connections from new neurons to neurons in the next layer
-                        model.graph.initializer[layer].float_data.append(
-                            1)  # gives over the value to the new bridge neuron
-                else:  # adds the new biases for the new neurons
-                    if layer != model.graph.initializer.__len__() - 2:
-                        if layer == 2 * neuron[0] + 1 + offset and layer == model.graph.initializer.__len__() - 3:
-                            model.graph.initializer[layer].float_data.append(0)
-                        elif layer == 2 * neuron[0] + 1 + offset:
-                            model.graph.initializer[layer].float_data.append(dirty_trick_constant)  # dirty trick start
-                        elif layer == model.graph.initializer.__len__() - 3:
-                            model.graph.initializer[layer].float_data.append(
-                                -1 * dirty_trick_constant)  # dirty trick end
-                        else:
-                            model.graph.initializer[layer].float_data.append(0)
-        return model
+    def modify_layers_post_activation(self, arrays: dict[int, np.ndarray], neuron: tuple[int, int],
+                           offset:int, dirty_trick_constant:int, layer_count: int,
+                           copy_column: bool = False) -> dict[int, np.ndarray]:
+        '''
+        Adds one bridge neuron that carries the value of a neuron through all following layers.
+        :param arrays: the decoded initializers, see initializers_to_arrays
+        :param neuron: the neuron whose value is carried, the first layer of the bridge is 2 * neuron[0] + offset
+        :param offset: offset of the layer iteration if a preprocess layer exists
+        :param dirty_trick_constant: the constant for fooling relu on bridge neurons
+        :param layer_count: number of initializers, including the new output layer
+        :param copy_column: copies the incoming connections of neuron[1] instead of connecting to input neuron neuron[1]
+        :return: the modified arrays
+        '''
+        first_layer = 2 * neuron[0] + offset
+        for layer in range(first_layer, layer_count - 1):  # goes through all layers following
+            array = arrays[layer]
+            if array.ndim >= 3:
+                continue
+            if array.ndim == 2 and layer != layer_count - 2:  # adds connections to Matrix layers
+                if layer == first_layer:
+                    if copy_column:  # the bridge neuron gets the connections of the selected neuron
+                        column = array[:, neuron[1]:neuron[1] + 1]
+                    else:  # the bridge neuron is connected to the selected input neuron only
+                        column = np.zeros((array.shape[0], 1), dtype=np.float32)
+                        column[neuron[1], 0] = 1
+                    arrays[layer] = np.hstack([array, column])
+                else:  # gives over the value to the new bridge neuron, old and new neurons stay unconnected
+                    arrays[layer] = np.block([
+                        [array, np.zeros((array.shape[0], 1), dtype=np.float32)],
+                        [np.zeros((1, array.shape[1]), dtype=np.float32), np.ones((1, 1), dtype=np.float32)],
+                    ])
+            elif array.ndim < 2:  # adds the new biases for the new neurons
+                if layer == first_layer + 1 and layer == layer_count - 3:
+                    bias = 0
+                elif layer == first_layer + 1:
+                    bias = dirty_trick_constant  # dirty trick start
+                elif layer == layer_count - 3:
+                    bias = -1 * dirty_trick_constant  # dirty trick end
+                else:
+                    bias = 0
+                arrays[layer] = np.append(array.reshape(-1), np.float32(bias))
+        return arrays
 
     @staticmethod
     def add_bridge_neurons_before_activation(self, model: ModelProto, neurons: list[tuple[int, int]],
                            directions: list[tuple[float, float]]) -> ModelProto:
         '''
-
+        Every affected initializer is decoded once, grown with block concatenation and written back once.
         :param model: the whole network
         :param neurons: List of neurons, that should be used for the calculation
         :param directions: List of directions, that represent linear combinations of neurons
@@ -190,54 +445,20 @@ class NetworkModifier:
             0].dims.__len__() > 3:  # adds an offset to the layer iteration if a preprocess layer exists (problem if there are more)
             offset = 1
         dirty_trick_constant = 500  # this is the constant for fooling relu on bridge neurons
+        layer_count = model.graph.initializer.__len__()
+        first_layer = min([2 * max(neuron[0] - 1, 0) + offset for neuron in neurons], default=layer_count - 2)
+        arrays = NetworkModifier.initializers_to_arrays(self, model, first_layer)
         for neuron in neurons:
-            neuron_layer_id = 2 * (neuron[0] - 1) + offset
-            if neuron_layer_id >= 0 :
-                for layer in range(neuron_layer_id,
-                                   model.graph.initializer.__len__() - 1):  # goes through all layers following
-                    if model.graph.initializer[layer].dims.__len__() < 3:
-                        if layer != neuron_layer_id:
-                            model.graph.initializer[layer].dims[
-                                0] += 1  # changes the dims off all following layers to the layer of the selected neuron
-                        if model.graph.initializer[
-                            layer].dims.__len__() == 2 and layer != model.graph.initializer.__len__() - 2:  # adds connections to Matrix layers
-                            model.graph.initializer[layer].dims[1] += 1  # changes the 2 dim for the matrix multiplication
-                            if layer == neuron_layer_id:
-                                for node in range(0, model.graph.initializer[layer].dims[0]):
-                                    model.graph.initializer[layer].float_data.insert(
-                                            # adds the connections between the new neurons and the old neurons
-                                        (node + 1) * model.graph.initializer[layer].dims[1] - 1, model.graph.initializer[layer].float_data[
-                                            node * model.graph.initializer[layer].dims[1] + neuron[1]])
-                            else:
-                                for node in range(1, model.graph.initializer[layer].dims[0] - 1):
-                                    model.graph.initializer[layer].float_data.insert(
-                                        # adds the connections to the new neurons
-                                        node * model.graph.initializer[layer].dims[1] - 1, 0)
-                                model.graph.initializer[layer].float_data.append(0)
-                                for node in range(1, model.graph.initializer[layer].dims[1]):
-                                    model.graph.initializer[layer].float_data.append(
-                                        0)  # adds connections from new neurons to neurons in the next layer
-                                model.graph.initializer[layer].float_data.append(
-                                    1)  # gives over the value to the new bridge neuron
-                        else:  # adds the new biases for the new neurons
-                            if layer != model.graph.initializer.__len__() - 2:
-                                if layer == neuron_layer_id + 1 and layer == model.graph.initializer.__len__() - 3:
-                                    model.graph.initializer[layer].float_data.append(0)
-                                elif layer == neuron_layer_id + 1:
-                                    model.graph.initializer[layer].float_data.append(
-                                        dirty_trick_constant)  # dirty trick start
-                                elif layer == model.graph.initializer.__len__() - 3:
-                                    model.graph.initializer[layer].float_data.append(
-                                        -1 * dirty_trick_constant)  # dirty trick end
-                                else:
-                                    model.graph.initializer[layer].float_data.append(0)
-            else:
-                NetworkModifier.modify_layers_post_activation(self,model, neuron, offset, dirty_trick_constant) # If a neuron is selected from layer 0, use other method
-        for neuron_ind in range(0, neurons.__len__()):  # changes the last initializer to match the output
-                for direction in directions:
-                    model.graph.initializer[model.graph.initializer.__len__() - 2].float_data.append(
-                        direction[neuron_ind])
-        return model
+            if 2 * (neuron[0] - 1) + offset >= 0:  # the bridge neuron copies the weights of the selected neuron
+                NetworkModifier.modify_layers_post_activation(self, arrays, (neuron[0] - 1, neuron[1]), offset,
+                                                              dirty_trick_constant, layer_count, copy_column=True)
+            else:  # If a neuron is selected from layer 0, the bridge neuron starts at the input neuron
+                NetworkModifier.modify_layers_post_activation(self, arrays, neuron, offset, dirty_trick_constant,
+                                                              layer_count)
+        output_layer = layer_count - 2  # changes the last initializer to match the output
+        direction_rows = np.asarray(directions, dtype=np.float32).reshape(len(directions), len(neurons)).T
+        arrays[output_layer] = np.vstack([arrays[output_layer], direction_rows])
+        return NetworkModifier.arrays_to_initializers(self, model, arrays)
 
 
     @staticmethod
@@ -249,22 +470,11 @@ class NetworkModifier:
         :param directions: List of directions, that represent linear combinations of neurons
         :return: returns the new initializers for the new output layer
         '''
-        new_initializer1 = copy.deepcopy(model.graph.initializer[0])
-        new_initializer2 = copy.deepcopy(model.graph.initializer[0])
-        new_initializer1.name = "output_initializer_W"
-        new_initializer2.name = "output_initializer_B"
-        del new_initializer1.dims[:]
-        del new_initializer2.dims[:]
-
-        del new_initializer1.float_data[:]
-        del new_initializer2.float_data[:]      #creates the 2 new initalizers, without data
-        new_initializer1.dims.append(model.graph.initializer[model.graph.initializer.__len__() - 1].dims[0])
-        new_initializer1.dims.append(directions.__len__())
-        new_initializer2.dims.append(directions.__len__())
-        for i in range(new_initializer1.dims[0] * new_initializer1.dims[1]):    #adds data, so that dims matches the number of elements
-            new_initializer1.float_data.append(0)
-        for i in range(new_initializer2.dims[0]):
-            new_initializer2.float_data.append(0)
+        output_dim = model.graph.initializer[model.graph.initializer.__len__() - 1].dims[0]
+        new_initializer1 = onnx.numpy_helper.from_array(np.zeros((output_dim, directions.__len__()), dtype=np.float32),
+                                                        "output_initializer_W")
+        new_initializer2 = onnx.numpy_helper.from_array(np.zeros(directions.__len__(), dtype=np.float32),
+                                                        "output_initializer_B")    #creates the 2 new initalizers, filled with zeros
         return new_initializer1, new_initializer2
 
     @staticmethod
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import numpy as np
+
+ANGLE_TOLERANCE = 1e-12
+LENGTH_TOLERANCE = 1e-12  # relative to the largest offset
+DISPLAY_TOLERANCE = 1e-6  # relative to the size of the polygon, float32 can't tell closer vertices apart
+
+
+def polygon_from_bounds(bounds: list[tuple[float, float]] | np.ndarray,
+                        directions: list[tuple[float, float]] | np.ndarray) -> list[tuple[float, float]]:
+    """
+    Computes the polygon that is enclosed by the bounds of all directions,
+    i.e. low <= a * x + b * y <= high for every direction (a, b).
+    Infinite bounds don't constrain the polygon, it is clipped to a square around the bounds instead.
+    :param bounds: (low, high) per direction
+    :param directions: the directions
+    :return: the vertices of the polygon in counterclockwise order, empty if the bounds contradict each other
+    """
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2)
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 2)
+    count = min(bounds.shape[0], directions.shape[0])
+    bounds, directions = bounds[:count], directions[:count]
+
+    finite = np.abs(bounds[np.isfinite(bounds)])
+    margin = max(5.0, float(finite.max()) * 2.0 + 1.0) if finite.size else 5.0
+    square = np.array([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0], [0.0, -1.0]])
+    normals = np.concatenate([directions, -directions, square])
+    offsets = np.concatenate([bounds[:, 1], -bounds[:, 0], np.full(4, margin)])
+    return intersect_half_planes(normals, offsets)
+
+
+def display_polygon(bounds: list[tuple[float, float]] | np.ndarray,
+                    directions: list[tuple[float, float]] | np.ndarray) -> np.ndarray:
+    """
+    The polygon of polygon_from_bounds in the compact form the workers send to the user interface.
+    Vertices that can't be told apart from the previous one are left out.
+    :return: np.ndarray (V, 2) of float32, without rows if the bounds contradict each other
+    """
+    vertices = np.asarray(polygon_from_bounds(bounds, directions), dtype=np.float64).reshape(-1, 2)
+    if vertices.shape[0] > 3:
+        size = float(np.ptp(vertices, axis=0).max())
+        steps = np.abs(vertices - np.roll(vertices, 1, axis=0)).max(axis=1)
+        distinct = steps > DISPLAY_TOLERANCE * size
+        if np.count_nonzero(distinct) >= 3:
+            vertices = vertices[distinct]
+    return vertices.astype(np.float32)
+
+
+def result_polygon(data: tuple) -> list[tuple[float, float]]:
+    """
+    :param data: data of a successful job, (bounds, directions, polygon) with the polygon of display_polygon,
+        or (bounds, directions) of results that were cached before the workers computed the polygons,
+        a polygon of None is computed as well
+    :return: the vertices of the polygon
+    """
+    polygon = data[2] if data.__len__() > 2 and data[2] is not None else display_polygon(data[0], data[1])
+    return [(x, y) for x, y in np.asarray(polygon, dtype=np.float64).reshape(-1, 2).tolist()]
+
+
+def intersect_half_planes(normals: np.ndarray, offsets: np.ndarray) -> list[tuple[float, float]]:
+    """
+    Intersects the half-planes normal . p <= offset in one sweep over their angles.
+    The half-planes are sorted by the angle of their normals, then every round computes the edge every half-plane
+    would have between its two neighbours at once, and removes the half-planes whose edge is empty. Such a
+    half-plane contains the wedge of its neighbours, so the intersection stays the same, and half-planes that
+    survive a round only have to be tested again next to removed ones. When no edge is empty, the neighbours
+    intersect in the vertices of the polygon.
+    :param normals: np.ndarray (n, 2), the normals must cover all directions with gaps below pi,
+        e.g. by including the four axes
+    :param offsets: np.ndarray (n), +inf for half-planes without constraint
+    :return: the vertices of the polygon in counterclockwise order, empty if the intersection is empty
+    """
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.float64).reshape(-1)
+    lengths = np.hypot(normals[:, 0], normals[:, 1])
+    # a zero normal either holds everywhere or nowhere
+    if np.any((lengths == 0) & ~(offsets >= 0)):
+        return []
+    constraining = (lengths > 0) & (offsets < np.inf)
+    if np.any(np.isneginf(offsets[constraining])):
+        return []
+    normals = normals[constraining] / lengths[constraining, None]
+    offsets = offsets[constraining] / lengths[constraining]
+    tolerance = LENGTH_TOLERANCE * max(1.0, float(np.abs(offsets).max(initial=0.0)))
+
+    angles = np.arctan2(normals[:, 1], normals[:, 0]) % (2 * np.pi)
+    angles[angles > 2 * np.pi - ANGLE_TOLERANCE] -= 2 * np.pi
+    order = np.lexsort((offsets, angles))
+    angles, normals, offsets = angles[order], normals[order], offsets[order]
+    # of parallel half-planes with the same orientation only the tightest one matters
+    distinct = np.concatenate([[True], np.diff(angles) > ANGLE_TOLERANCE])
+    angles, normals, offsets = angles[distinct], normals[distinct], offsets[distinct]
+    if angles.__len__() < 3 or np.max((np.roll(angles, -1) - angles) % (2 * np.pi)) >= np.pi:
+        raise ValueError("The normals of the half-planes have to surround the origin")
+
+    # one row per half-plane: normal x, normal y, offset, angle
+    planes = np.column_stack([normals, offsets, angles])
+    while True:
+        following = np.concatenate([planes[1:], planes[:1]])
+        # vertex between every half-plane and the next one, by Cramer's rule
+        determinants = planes[:, 0] * following[:, 1] - planes[:, 1] * following[:, 0]
+        vertices = np.column_stack([planes[:, 2] * following[:, 1] - following[:, 2] * planes[:, 1],
+                                    planes[:, 0] * following[:, 2] - following[:, 0] * planes[:, 2]])
+        vertices /= determinants[:, None]
+        # signed length of the edge of every half-plane, walking counterclockwise
+        steps = vertices - np.concatenate([vertices[-1:], vertices[:-1]])
+        edges = steps[:, 1] * planes[:, 0] - steps[:, 0] * planes[:, 1]
+        neighbour_gaps = (following[:, 3] - np.concatenate([planes[-1:, 3], planes[:-1, 3]])) % (2 * np.pi)
+        removable = neighbour_gaps < np.pi - ANGLE_TOLERANCE
+        # without a wedge of the neighbours, a negative edge means the three half-planes have no common point
+        if np.any((edges < -tolerance) & ~removable):
+            return []
+        redundant = (edges <= tolerance) & removable
+        if not redundant.any():
+            return [(x, y) for x, y in vertices.tolist()]
+        planes = planes[~_removed_planes(planes, redundant, tolerance)]
+
+
+def _removed_planes(planes: np.ndarray, redundant: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Selects the redundant half-planes that can be removed together. A run of neighbouring redundant half-planes is
+    removed at once if each of them contains the wedge of the two half-planes around the run, as it happens when
+    many directions touch the same vertex. Otherwise every other half-plane of the run is removed, so the
+    neighbours that made a half-plane redundant stay.
+    :param planes: np.ndarray (n, 4) with normal, offset and angle per half-plane, sorted by angle
+    :param redundant: whether the edge of the half-plane between its neighbours is empty
+    :return: np.ndarray (n) of bool
+    """
+    count = redundant.__len__()
+    indices = np.arange(count)
+    if redundant.all():
+        return (indices % 2 == 0) & (indices < count - count % 2)
+    shift = int(np.argmin(redundant))  # start the runs after a half-plane that stays
+    flags = np.roll(redundant, -shift)
+    rolled = np.roll(planes, -shift, axis=0)
+    starts = np.flatnonzero(flags & ~np.concatenate([[False], flags[:-1]]))
+    ends = np.flatnonzero(flags & ~np.concatenate([flags[1:], [False]]))
+    before, after = rolled[starts - 1], rolled[(ends + 1) % count]
+    # apex of the wedge around every run, by Cramer's rule
+    determinants = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+    apexes = np.column_stack([before[:, 2] * after[:, 1] - after[:, 2] * before[:, 1],
+                              before[:, 0] * after[:, 2] - after[:, 0] * before[:, 2]])
+    wedges = ((after[:, 3] - before[:, 3]) % (2 * np.pi) < np.pi - ANGLE_TOLERANCE) & (determinants != 0)
+    apexes /= np.where(wedges, determinants, 1.0)[:, None]
+
+    members = np.flatnonzero(flags)
+    runs = np.cumsum(flags & ~np.concatenate([[False], flags[:-1]]))[members] - 1
+    contained = np.einsum("ij,ij->i", rolled[members, :2], apexes[runs]) <= rolled[members, 2] + tolerance
+    whole = wedges & np.logical_and.reduceat(contained, np.searchsorted(members, starts))
+    removed = np.zeros(count, dtype=bool)
+    removed[members] = whole[runs] | ((members - starts[runs]) % 2 == 0)
+    return np.roll(removed, shift)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+try:
+    import resource
+except ImportError:  # not available on Windows, only the watchdog limits the jobs there
+    resource = None
+
+TIME_LIMIT = "time"
+MEMORY_LIMIT = "memory"
+WATCHDOG_INTERVAL = 0.05
+
+
+class ResourceLimitExceeded(Exception):
+    """
+    A job used more wall-clock time or memory than it was allowed to.
+    """
+
+    def __init__(self, kind: str, limit: float):
+        '''
+        :param kind: TIME_LIMIT or MEMORY_LIMIT
+        :param limit: the exceeded limit in seconds or bytes
+        '''
+        super().__init__(kind, limit)   # the arguments are kept in args, so the exception survives pickling
+        self.kind = kind
+        self.limit = limit
+
+    def __str__(self) -> str:
+        if self.kind == TIME_LIMIT:
+            return f"The algorithm exceeded its time limit of {self.limit:g} s"
+        return f"The algorithm exceeded its memory limit of {self.limit / 1024 ** 2:.0f} MiB"
+
+
+def _memory_usage() -> tuple[int, int] | None:
+    '''
+    :return: virtual size and resident set size of this process in bytes, None if unknown
+    '''
+    try:
+        with open("/proc/self/statm") as file:
+            size, resident = file.read().split()[:2]
+    except (OSError, ValueError):
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    return int(size) * page_size, int(resident) * page_size
+
+
+@contextmanager
+def job_limits(time_limit: float | None, memory_limit: int | None,
+               on_exceeded: Callable[[ResourceLimitExceeded], None],
+               limit_address_space: bool = False) -> Iterator[None]:
+    '''
+    Limits the job that runs inside the with block.
+    A watchdog thread checks the wall-clock time and the resident memory and calls on_exceeded when one of them is
+    exceeded, on_exceeded has to stop the process, since the job itself can't be interrupted.
+    :param time_limit: seconds the job may run, None for no limit
+    :param memory_limit: bytes the resident memory of the process may reach, None for no limit
+    :param on_exceeded: called from the watchdog thread
+    :param limit_address_space: additionally caps the address space with setrlimit, so large allocations fail with
+        a MemoryError before they are made. Off by default, since e.g. torch and BLAS reserve far more address
+        space than they use and would fail although they stay within the limit.
+    '''
+    usage = _memory_usage() if memory_limit is not None else None
+    previous_limit = None
+    if limit_address_space and resource is not None and usage is not None:
+        virtual, resident = usage
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = virtual + max(memory_limit - resident, 0)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+            previous_limit = (soft, hard)
+        except (ValueError, OSError):
+            pass
+
+    stopped = threading.Event()
+    start = time.monotonic()
+
+    def watch():
+        while not stopped.wait(WATCHDOG_INTERVAL):
+            if time_limit is not None and time.monotonic() - start > time_limit:
+                on_exceeded(ResourceLimitExceeded(TIME_LIMIT, time_limit))
+                return
+            current = _memory_usage() if memory_limit is not None else None
+            if current is not None and current[1] > memory_limit:
+                on_exceeded(ResourceLimitExceeded(MEMORY_LIMIT, memory_limit))
+                return
+
+    watchdog = None
+    if time_limit is not None or usage is not None:
+        watchdog = threading.Thread(target=watch, daemon=True)
+        watchdog.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        if watchdog is not None:
+            watchdog.join()
+        if previous_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, previous_limit)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import ast
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+MAX_CACHE_BYTES = 256 * 1024 ** 2
+RESULT_FILE_SUFFIX = ".result"
+
+
+def default_cache_directory() -> str:
+    return str(Path.home() / ".nn_verification_visualisation" / "cache")
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache for the results of deterministic algorithms.
+    Every result is one file named after its job fingerprint, see job_fingerprint. The modification time of a
+    file is its last use, the least recently used files are removed once the cache grows beyond its size limit.
+    Results are stored as Python literals, so loading them never executes code.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = MAX_CACHE_BYTES):
+        '''
+        :param directory: directory of the cache, defaults to ~/.nn_verification_visualisation/cache
+        :param max_bytes: size limit of all cached results together
+        '''
+        self.directory = Path(directory or default_cache_directory())
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None   # total size of the files, computed on first write
+
+    def get(self, key: str):
+        '''
+        :param key: the job fingerprint
+        :return: the cached result data, None if there is none or it can't be read
+        '''
+        path = self._path(key)
+        try:
+            data = ast.literal_eval(path.read_text(encoding="utf-8"))
+            os.utime(path)  # marks the entry as recently used
+            return data
+        except (OSError, ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+
+    def put(self, key: str, data) -> bool:
+        '''
+        Stores the data of a successful result and evicts old entries if the cache is too large.
+        :param key: the job fingerprint
+        :param data: tuples, lists, numbers and strings only, numpy arrays are stored as lists and numpy scalars as
+            Python numbers
+        :return: whether the data was stored
+        '''
+        data = _plain(data)
+        text = repr(data)
+        try:
+            if ast.literal_eval(text) != data:
+                return False    # e.g. numpy arrays or nan, which can't be read back
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return False
+        encoded = text.encode("utf-8")
+        if encoded.__len__() > self.max_bytes:
+            return False
+
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self._path(key)
+                previous = path.stat().st_size if path.exists() else 0
+                temporary = path.with_suffix(".tmp")
+                temporary.write_bytes(encoded)
+                temporary.replace(path)
+            except OSError:
+                return False
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += encoded.__len__() - previous
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+        return True
+
+    def clear(self) -> None:
+        '''
+        Removes every cached result.
+        '''
+        with self._lock:
+            for path, _, _ in self._entries():
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+    def _evict(self, keep: Path) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+    def _entries(self) -> list[tuple[Path, int, int]]:
+        '''
+        :return: (path, size, last use) of every cached result
+        '''
+        entries = []
+        try:
+            paths = list(self.directory.glob(f"*{RESULT_FILE_SUFFIX}"))
+        except OSError:
+            return entries
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{RESULT_FILE_SUFFIX}"
+
+
+def _plain(data):
+    if isinstance(data, np.ndarray):
+        return data.tolist()
+    if isinstance(data, np.generic):   # e.g. the np.float64 directions, whose repr can't be read back
+        return data.item()
+    if isinstance(data, tuple):
+        return tuple(_plain(item) for item in data)
+    if isinstance(data, list):
+        return [_plain(item) for item in data]
+    return data
@@ -0,0 +1,706 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from logging import Logger
+from pathlib import Path
+from queue import Queue
+from typing import Callable
+
+import numpy as np
+import onnx
+from onnx import ModelProto
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import PartialResult
+from nn_verification_visualisation.controller.process_manager.batch_runner import run_job, run_job_batch
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics, package_version
+from nn_verification_visualisation.controller.process_manager.network_modifier import DEFAULT_OUTPUT_LAYER_MODE
+from nn_verification_visualisation.controller.process_manager.resource_limits import ResourceLimitExceeded
+from nn_verification_visualisation.controller.process_manager.result_cache import ResultCache
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool, JobState
+from nn_verification_visualisation.model.data.algorithm import Algorithm
+from nn_verification_visualisation.utils.result import Result, Success, Failure
+
+# JSON-RPC 2.0 with one JSON object per line. Clients call "info", "algorithms", "submit", "cancel" and
+# "prioritize", the server answers every call and sends the progress of submitted jobs as the notifications
+# "state", "partial" and "result". Like the batch mode, the server runs without PySide6 unless it observes the
+# algorithms directory, which goes through the Storage.
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+UNIX_PREFIX = "unix:"
+DEFAULT_TIMEOUT = 30.0
+MAX_REMEMBERED_MODELS = 8
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class RemoteCallError(Exception):
+    """
+    The server answered a call with a JSON-RPC error.
+    """
+
+    def __init__(self, code: int, message: str):
+        super().__init__(code, message)
+        self.code = code
+        self.message = message
+
+    def __str__(self) -> str:
+        return self.message
+
+
+def parse_address(address: str) -> tuple[int, str | tuple[str, int]]:
+    '''
+    :param address: "host:port", or "unix:" followed by the path of a Unix socket
+    :return: socket family and address, as the socket module expects them
+    :raises ValueError: for a malformed address
+    '''
+    if address.startswith(UNIX_PREFIX):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not supported on this platform")
+        path = address[UNIX_PREFIX.__len__():]
+        if not path:
+            raise ValueError(f"Missing socket path in {address!r}")
+        return socket.AF_UNIX, path
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Expected host:port or {UNIX_PREFIX}<path>, got {address!r}")
+    return socket.AF_INET, (host.strip("[]") or "127.0.0.1", int(port))
+
+
+def _json_default(value):
+    # numpy values of the algorithms, e.g. directions or the bounds of a cached result
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(message: dict) -> bytes:
+    return (json.dumps(message, default=_json_default) + "\n").encode("utf-8")
+
+
+def encode_result(result: Result) -> dict:
+    '''
+    :return: the JSON form of a job's Result, see decode_result
+    '''
+    if not result.is_success:
+        error = result.error
+        encoded = {"type": type(error).__name__, "message": str(error)}
+        if isinstance(error, ResourceLimitExceeded):
+            encoded.update(kind=error.kind, limit=error.limit)
+        return {"error": encoded}
+    encoded = {"data": result.data}
+    if isinstance(result.metrics, JobMetrics):
+        encoded["metrics"] = {**result.metrics.to_dict(), "finished_at": result.metrics.finished_at}
+    return encoded
+
+
+def decode_result(encoded: dict) -> Result:
+    '''
+    :return: the Result of encode_result, with (bounds, directions, polygon) like the local job functions
+    '''
+    if "error" in encoded:
+        error = encoded["error"]
+        if error.get("type") == ResourceLimitExceeded.__name__:
+            return Failure(ResourceLimitExceeded(error["kind"], error["limit"]))
+        return Failure(Exception(error.get("message", "Unknown error of the verification server")))
+    bounds, directions, *polygon = encoded["data"]
+    data = ([tuple(bound) for bound in bounds], [tuple(direction) for direction in directions])
+    if polygon:
+        data += (np.asarray(polygon[0], dtype=np.float32).reshape(-1, 2),)
+    metrics = None
+    if encoded.get("metrics") is not None:
+        metrics = JobMetrics(encoded["metrics"]["seconds"], encoded["metrics"]["peak_rss"],
+                             encoded["metrics"]["batch_size"], encoded["metrics"].get("finished_at"))
+    return Success(data, metrics)
+
+
+class _Session:
+    """
+    One client connection of the server. Its jobs are cancelled when the client disconnects.
+    :param jobs: job id of the client -> job id of the pool, None while the job is being submitted
+    """
+
+    def __init__(self, server: VerificationServer, connection: socket.socket, send: Callable[[bytes], None]):
+        self.server = server
+        self.connection = connection
+        self.models: dict[str, ModelProto] = {}
+        self.jobs: dict[int, int | None] = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        self._outgoing: Queue[bytes | None] = Queue()
+        self._send = send
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def _write(self) -> None:
+        # the router thread of the pool must never block on a slow client
+        while (message := self._outgoing.get()) is not None:
+            try:
+                self._send(message)
+            except OSError:
+                return
+
+    def notify(self, method: str, params: dict) -> None:
+        if not self.closed:
+            self._outgoing.put(_dumps({"jsonrpc": "2.0", "method": method, "params": params}))
+
+    def handle_line(self, line: bytes) -> None:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            self._respond(None, error=(PARSE_ERROR, f"Invalid JSON: {e}"))
+            return
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            self._respond(None, error=(INVALID_REQUEST, "Expected a JSON-RPC request object"))
+            return
+        call_id = request.get("id")
+        handler = getattr(self, f"rpc_{request['method']}", None)
+        if handler is None:
+            self._respond(call_id, error=(METHOD_NOT_FOUND, f"Unknown method {request['method']}"))
+            return
+        params = request.get("params") or {}
+        try:
+            result = handler(**params) if isinstance(params, dict) else handler(*params)
+        except (TypeError, ValueError, KeyError) as e:
+            self._respond(call_id, error=(INVALID_PARAMS, str(e)))
+            return
+        except Exception as e:
+            self.server.logger.error(f"Call {request['method']} failed: {e}")
+            self._respond(call_id, error=(SERVER_ERROR, str(e)))
+            return
+        if call_id is not None:
+            self._respond(call_id, result)
+
+    def _respond(self, call_id, result=None, error: tuple[int, str] | None = None) -> None:
+        response = {"jsonrpc": "2.0", "id": call_id}
+        if error is not None:
+            response["error"] = {"code": error[0], "message": error[1]}
+        else:
+            response["result"] = result
+        self._outgoing.put(_dumps(response))
+
+    def rpc_info(self) -> dict:
+        return {"workers": self.server.pool.size, "version": package_version()}
+
+    def rpc_algorithms(self) -> list[dict]:
+        return [{"name": algorithm.name, "path": algorithm.path, "is_deterministic": algorithm.is_deterministic}
+                for algorithm in self.server.algorithms]
+
+    def rpc_submit(self, job: int, model_key: str, input_bounds: list, algorithm: str,
+                   selected_neurons: list, num_directions: int, model: str | None = None,
+                   output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE, priority: int = 0,
+                   time_limit: float | None = None, memory_limit: int | None = None,
+                   options: dict | None = None) -> None:
+        '''
+        Queues a job on the pool. The model is only sent with the first job on it, later jobs refer to its key.
+        :param job: id of the job chosen by the client, used by the notifications and cancel
+        :param model: base64 encoded ONNX model
+        :param algorithm: name of an algorithm of the registry, clients can't run files of their own
+        '''
+        if model is not None:
+            self.models[model_key] = onnx.load_from_string(base64.b64decode(model))
+        if model_key not in self.models:
+            raise ValueError(f"Unknown model {model_key}, send the model with the first job on it")
+        registered = self.server.find_algorithm(algorithm)
+        if registered is None:
+            raise ValueError(f"Algorithm {algorithm} is not available on the server")
+        bounds = np.asarray(input_bounds, dtype=np.float64).reshape(-1, 2)
+        with self.lock:
+            if job in self.jobs:
+                raise ValueError(f"Job {job} was already submitted")
+            self.jobs[job] = None
+
+        def on_result(result: Result):
+            with self.lock:
+                self.jobs.pop(job, None)
+            self.notify("result", {"job": job, "result": encode_result(result)})
+
+        def on_partial(partial: object):
+            if isinstance(partial, PartialResult):
+                self.notify("partial", {"job": job, "output_bounds": partial.output_bounds,
+                                        "directions": partial.directions, "polygon": partial.polygon})
+
+        pool_job = self.server.pool.submit(
+            self.models[model_key], bounds, registered.path, [tuple(neuron) for neuron in selected_neurons],
+            num_directions, on_result, output_layer_mode, priority=priority,
+            on_state=lambda state: self.notify("state", {"job": job, "state": state.name}),
+            is_deterministic=registered.is_deterministic, on_partial=on_partial, time_limit=time_limit,
+            memory_limit=memory_limit, options=options)
+        with self.lock:
+            if job in self.jobs:  # not answered from the cache yet
+                self.jobs[job] = pool_job
+        return None
+
+    def rpc_cancel(self, job: int) -> bool:
+        with self.lock:
+            pool_job = self.jobs.get(job)
+        return pool_job is not None and self.server.pool.cancel(pool_job)
+
+    def rpc_prioritize(self, jobs: list[int], priority: int) -> None:
+        with self.lock:
+            pool_jobs = [self.jobs[job] for job in jobs if self.jobs.get(job) is not None]
+        self.server.pool.prioritize(pool_jobs, priority)
+
+    def disconnect(self) -> None:
+        '''
+        Closes the connection, the handler of the connection then closes the session.
+        '''
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self.closed = True
+        with self.lock:
+            pool_jobs = [pool_job for pool_job in self.jobs.values() if pool_job is not None]
+        for pool_job in pool_jobs:
+            self.server.pool.cancel(pool_job)
+        self._outgoing.put(None)
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        session = _Session(self.server.verification_server, self.request, self.wfile.write)
+        self.server.verification_server.add_session(session)
+        try:
+            for line in self.rfile:
+                if line.strip():
+                    session.handle_line(line)
+        except OSError:
+            pass
+        finally:
+            session.close()
+            self.server.verification_server.remove_session(session)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # Windows
+    _UnixServer = None
+
+
+class VerificationServer:
+    """
+    Shares the worker pool, the algorithm registry and the result cache of one machine with several clients,
+    e.g. the user interfaces of several analysts and batch tools, see RemoteWorkerPool.
+    Only meant for trusted networks: clients can't run their own files, but there is no authentication.
+    """
+    logger = Logger(__name__)
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, pool: WorkerPool | None = None,
+                 algorithms: list[Algorithm] | None = None):
+        '''
+        :param address: "host:port" or "unix:<path>", port 0 picks a free port, see address
+        :param pool: the pool to run the jobs on, defaults to a pool with the job functions of the batch mode
+            and the result cache of the user
+        :param algorithms: the algorithms clients may run, defaults to the algorithms of the Storage,
+            which an AlgorithmFileObserver keeps in sync with the algorithms directory
+        '''
+        self.family, self._bind_address = parse_address(address)
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else WorkerPool(target=run_job, batch_target=run_job_batch,
+                                                             result_cache=ResultCache())
+        self._observer = None
+        if algorithms is None:
+            from nn_verification_visualisation.model.data.storage import Storage
+            from nn_verification_visualisation.model.data_loader.algorithm_file_observer import \
+                AlgorithmFileObserver
+            self._observer = AlgorithmFileObserver()
+            algorithms = Storage().algorithms
+        self.algorithms = algorithms
+        self._server: socketserver.BaseServer | None = None
+        self._thread: threading.Thread | None = None
+        self._sessions: set[_Session] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def address(self) -> str:
+        '''
+        :return: the address clients connect to, with the actual port once the server is bound
+        '''
+        if self.family != socket.AF_INET:
+            return UNIX_PREFIX + self._bind_address
+        host, port = self._server.server_address[:2] if self._server is not None else self._bind_address
+        return f"{host}:{port}"
+
+    def find_algorithm(self, name: str) -> Algorithm | None:
+        '''
+        :param name: name, path or file name without extension of a registered algorithm
+        '''
+        for algorithm in list(self.algorithms):
+            if name in (algorithm.name, algorithm.path, Path(algorithm.path).stem):
+                return algorithm
+        return None
+
+    def bind(self) -> None:
+        '''
+        Opens the socket and starts the pool. Does nothing if already bound.
+        '''
+        if self._server is not None:
+            return
+        if self.family == socket.AF_INET:
+            self._server = _TCPServer(self._bind_address, _ConnectionHandler)
+        else:
+            if _UnixServer is None:
+                raise OSError("Unix sockets are not supported on this platform")
+            if os.path.exists(self._bind_address):
+                os.unlink(self._bind_address)  # left over by a server that was killed
+            self._server = _UnixServer(self._bind_address, _ConnectionHandler)
+        self._server.verification_server = self
+        self.pool.start()
+        self.logger.info(f"Verification server listening on {self.address}")
+
+    def start(self) -> str:
+        '''
+        Serves in a background thread.
+        :return: the address of the server
+        '''
+        self.bind()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self.address
+
+    def serve_forever(self) -> None:
+        '''
+        Serves in the calling thread until shutdown is called from another thread or the process is interrupted.
+        '''
+        self.bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        '''
+        Disconnects all clients, cancels their jobs and stops the pool if the server created it.
+        '''
+        server, self._server = self._server, None
+        if server is None:
+            return
+        if self._thread is not None:
+            server.shutdown()
+            self._thread.join(timeout=1)
+            self._thread = None
+        server.server_close()
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.disconnect()
+        if self.family != socket.AF_INET and os.path.exists(self._bind_address):
+            os.unlink(self._bind_address)
+        if self._observer is not None and hasattr(self._observer, "observer"):
+            self._observer.stop()
+        if self._owns_pool:
+            self.pool.shutdown()
+
+    def add_session(self, session: _Session) -> None:
+        with self._lock:
+            self._sessions.add(session)
+
+    def remove_session(self, session: _Session) -> None:
+        with self._lock:
+            self._sessions.discard(session)
+
+
+@dataclass
+class _RemoteJob:
+    on_result: Callable[[Result], None]
+    on_state: Callable[[JobState], None] | None
+    on_partial: Callable[[object], None] | None
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: object = None
+    error: Exception | None = None
+    on_done: Callable[[object, Exception | None], None] | None = None
+
+
+class RemoteWorkerPool:
+    """
+    Runs jobs on a VerificationServer, with the interface of WorkerPool, so the plot view and run_pairs can use
+    either. Algorithms are looked up on the server by their file name. Callbacks are called from a background thread.
+    If the connection is lost, the unfinished jobs fail and the next submit reconnects.
+    """
+    logger = Logger(__name__)
+
+    def __init__(self, address: str, timeout: float = DEFAULT_TIMEOUT):
+        '''
+        :param address: address of the server, see parse_address
+        :param timeout: seconds to wait for the server to answer a call
+        '''
+        self.family, self._address = parse_address(address)
+        self.address = address
+        self.timeout = timeout
+        self.workers = 1
+        self._lock = threading.RLock()
+        self._socket: socket.socket | None = None
+        self._jobs: dict[int, _RemoteJob] = {}
+        self._calls: dict[int, _Call] = {}
+        self._uploaded: set[str] = set()
+        self._model_keys: OrderedDict[int, tuple[ModelProto, str]] = OrderedDict()
+        self._next_id = 0
+
+    @property
+    def size(self) -> int:
+        '''
+        :return: number of workers of the server, e.g. to size the backpressure of run_pairs
+        '''
+        self.start()
+        return self.workers
+
+    def start(self) -> None:
+        '''
+        Connects to the server. Does nothing if already connected.
+        :raises OSError: if the server is unreachable
+        '''
+        with self._lock:
+            if self._socket is not None:
+                return
+            connection = socket.socket(self.family, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            try:
+                connection.connect(self._address)
+            except OSError:
+                connection.close()
+                raise
+            connection.settimeout(None)
+            self._socket = connection
+            self._uploaded.clear()
+            threading.Thread(target=self._read, args=(connection,), daemon=True).start()
+        self.workers = max(1, int(self._call("info")["workers"]))
+
+    def shutdown(self) -> None:
+        '''
+        Disconnects, the server cancels the unfinished jobs, which are dropped without a callback.
+        '''
+        with self._lock:
+            connection, self._socket = self._socket, None
+            self._jobs.clear()
+        if connection is not None:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            connection.close()
+
+    def algorithms(self) -> list[Algorithm]:
+        '''
+        :return: the algorithms of the server
+        '''
+        self.start()
+        return [Algorithm(entry["name"], entry["path"], entry["is_deterministic"])
+                for entry in self._call("algorithms")]
+
+    def submit(self, model: ModelProto, input_bounds: np.ndarray, algorithm_path: str,
+               selected_neurons: list[tuple[int, int]], num_directions: int,
+               on_result: Callable[[Result], None],
+               output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE, priority: int = 0,
+               on_state: Callable[[JobState], None] | None = None, is_deterministic: bool = False,
+               on_partial: Callable[[object], None] | None = None, time_limit: float | None = None,
+               memory_limit: int | None = None, options: dict | None = None) -> int:
+        '''
+        Sends a job to the server, see WorkerPool.submit. Whether a result may be reused is decided by the
+        algorithm registry of the server, is_deterministic is ignored.
+        :param algorithm_path: path of the algorithm, the server runs its own algorithm with the same file name
+        :return: id of the job, see cancel
+        '''
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = _RemoteJob(on_result, on_state, on_partial)
+
+        def on_submitted(result: object, error: Exception | None):
+            if error is not None:  # e.g. an algorithm the server doesn't have
+                self._finish(job_id, Failure(error))
+
+        try:
+            self.start()
+            model_key, data = self._model_key(model)
+            params = {"job": job_id, "model_key": model_key,
+                      "input_bounds": np.asarray(input_bounds, dtype=np.float64).tolist(),
+                      "algorithm": Path(algorithm_path).stem,
+                      "selected_neurons": [list(neuron) for neuron in selected_neurons],
+                      "num_directions": num_directions, "output_layer_mode": output_layer_mode,
+                      "priority": priority, "time_limit": time_limit, "memory_limit": memory_limit,
+                      "options": dict(options or {})}
+            with self._lock:
+                if model_key not in self._uploaded:
+                    params["model"] = base64.b64encode(data or model.SerializeToString()).decode("ascii")
+                    self._uploaded.add(model_key)
+            self._call("submit", params, on_submitted)
+        except OSError as e:
+            self._finish(job_id, Failure(ConnectionError(f"Verification server {self.address} unreachable: {e}")))
+        return job_id
+
+    def prioritize(self, job_ids: list[int], priority: int) -> None:
+        '''
+        Changes the priority of jobs that are still queued on the server.
+        '''
+        try:
+            self._call("prioritize", {"jobs": list(job_ids), "priority": priority}, lambda result, error: None)
+        except OSError:
+            pass
+
+    def cancel(self, job_id: int) -> bool:
+        '''
+        Cancels a queued or running job, see WorkerPool.cancel.
+        :return: whether the job was still queued or running
+        '''
+        with self._lock:
+            if job_id not in self._jobs:
+                return False
+        try:
+            return bool(self._call("cancel", {"job": job_id}))
+        except (OSError, RemoteCallError):
+            return self._finish(job_id, Failure(Exception("Cancelled by User")))
+
+    def _model_key(self, model: ModelProto) -> tuple[str, bytes | None]:
+        # like the ModelStore, a network is serialized once and not once per job
+        with self._lock:
+            entry = self._model_keys.get(id(model))
+            if entry is not None and entry[0] is model:
+                return entry[1], None
+        data = model.SerializeToString()
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._model_keys[id(model)] = (model, key)
+            while self._model_keys.__len__() > MAX_REMEMBERED_MODELS:
+                self._model_keys.popitem(last=False)
+        return key, data
+
+    def _call(self, method: str, params: dict | None = None,
+              on_done: Callable[[object, Exception | None], None] | None = None):
+        '''
+        Calls a method of the server.
+        :param on_done: called with the result and the error once the server answered, the call then returns
+            immediately, otherwise it waits for the answer
+        :return: the result of the call if it waited for it
+        :raises RemoteCallError: if the server answered with an error
+        :raises OSError: if the connection is lost or the server doesn't answer in time
+        '''
+        with self._lock:
+            connection = self._socket
+            if connection is None:
+                raise ConnectionError(f"Not connected to {self.address}")
+            call_id = self._next_id
+            self._next_id += 1
+            call = self._calls[call_id] = _Call(on_done=on_done)
+            message = {"jsonrpc": "2.0", "id": call_id, "method": method}
+            if params is not None:
+                message["params"] = params
+            try:
+                connection.sendall(_dumps(message))
+            except OSError:
+                self._calls.pop(call_id, None)
+                raise
+        if on_done is not None:
+            return None
+        if not call.done.wait(self.timeout):
+            with self._lock:
+                self._calls.pop(call_id, None)
+            raise TimeoutError(f"Verification server {self.address} did not answer {method}")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _read(self, connection: socket.socket) -> None:
+        try:
+            with connection.makefile("rb") as lines:
+                for line in lines:
+                    self._receive(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        self._disconnected(connection)
+
+    def _receive(self, message: dict) -> None:
+        if "id" in message and "method" not in message:
+            with self._lock:
+                call = self._calls.pop(message["id"], None)
+            if call is None:
+                return
+            if "error" in message:
+                error = message["error"]
+                call.error = RemoteCallError(error.get("code", SERVER_ERROR), error.get("message", ""))
+            else:
+                call.result = message.get("result")
+            call.done.set()
+            if call.on_done is not None:
+                call.on_done(call.result, call.error)
+            return
+        params = message.get("params") or {}
+        with self._lock:
+            job = self._jobs.get(params.get("job"))
+        if job is None:
+            return  # e.g. a late notification of a cancelled job
+        method = message.get("method")
+        if method == "result":
+            self._finish(params["job"], decode_result(params["result"]))
+        elif method == "state" and job.on_state is not None:
+            job.on_state(JobState[params["state"]])
+        elif method == "partial" and job.on_partial is not None:
+            polygon = params.get("polygon")
+            job.on_partial(PartialResult([tuple(bound) for bound in params["output_bounds"]],
+                                         [tuple(direction) for direction in params["directions"]],
+                                         np.asarray(polygon, dtype=np.float32) if polygon is not None else None))
+
+    def _finish(self, job_id: int, result: Result) -> bool:
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.on_result(result)
+        return True
+
+    def _disconnected(self, connection: socket.socket) -> None:
+        with self._lock:
+            if self._socket is not connection:
+                return  # shut down on purpose
+            self._socket = None
+            calls, self._calls = self._calls, {}
+            job_ids = list(self._jobs)
+        connection.close()
+        error = ConnectionError(f"Lost the connection to the verification server {self.address}")
+        for call in calls.values():
+            call.error = error
+            call.done.set()
+        for job_id in job_ids:
+            self._finish(job_id, Failure(error))
+
+
+_remote_pools: dict[str, RemoteWorkerPool] = {}
+_remote_pools_lock = threading.Lock()
+
+
+def worker_pool_for(address: str | None) -> WorkerPool | RemoteWorkerPool:
+    '''
+    :param address: address of a verification server, None to compute in this process
+    :return: the pool of the process, or the client of the server, which is kept and reused for later calls
+    '''
+    if address is None:
+        return WorkerPool()
+    with _remote_pools_lock:
+        if address not in _remote_pools:
+            _remote_pools[address] = RemoteWorkerPool(address)
+        return _remote_pools[address]
@@ -0,0 +1,618 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from logging import Logger
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from onnx import ModelProto
+
+from nn_verification_visualisation.controller.process_manager.job_fingerprint import job_fingerprint
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics, DISPATCH_PHASE, \
+    peak_rss, reset_peak_rss
+from nn_verification_visualisation.controller.process_manager.model_store import ModelStore
+from nn_verification_visualisation.controller.process_manager.network_modifier import DEFAULT_OUTPUT_LAYER_MODE
+from nn_verification_visualisation.controller.process_manager.resource_limits import job_limits, \
+    ResourceLimitExceeded, MEMORY_LIMIT
+from nn_verification_visualisation.controller.process_manager.result_cache import ResultCache
+from nn_verification_visualisation.model.data.neural_network import NeuralNetwork
+from nn_verification_visualisation.utils.result import Result, Success, Failure
+from nn_verification_visualisation.utils.singleton import SingletonMeta
+
+MAX_CACHED_MODELS = 8
+MAX_COMPLETED_RESULTS = 256
+MAX_BATCH_SIZE = 32
+CANCELLED_MESSAGE = "Cancelled by User"
+MEMORY_BUDGET_FRACTION = 0.75
+WORKER_BASE_MEMORY = 256 * 1024 ** 2
+JOB_MODEL_MEMORY_FACTOR = 4
+BLAS_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+                         "NUMEXPR_NUM_THREADS")
+
+
+class JobState(Enum):
+    Queued = 0
+    Running = 1
+    Done = 2
+
+
+def available_memory() -> int | None:
+    '''
+    :return: currently available physical memory in bytes, None if the platform does not tell
+    '''
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_pool_size() -> int:
+    '''
+    One worker per core, but not more than the available memory can hold next to each other.
+    '''
+    size = os.cpu_count() or 1
+    memory = available_memory()
+    if memory is not None:
+        size = min(size, int(memory * MEMORY_BUDGET_FRACTION // WORKER_BASE_MEMORY))
+    return max(1, size)
+
+
+@contextmanager
+def _blas_threads(count: int):
+    '''
+    Sets the thread count of the BLAS libraries for processes spawned inside the with block,
+    so parallel workers do not oversubscribe the cores.
+    '''
+    previous = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+    for name in BLAS_THREAD_VARIABLES:
+        os.environ[name] = str(count)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@dataclass
+class AlgorithmJob:
+    """
+    One algorithm execution as it is sent to a worker.
+    The model is not part of the job, the worker attaches to its published file, see ModelStore.
+    """
+    model_key: str
+    model_path: str
+    input_bounds: np.ndarray
+    algorithm_path: str
+    selected_neurons: list[tuple[int, int]]
+    num_directions: int
+    output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE
+    time_limit: float | None = None
+    memory_limit: int | None = None
+    options: dict = field(default_factory=dict)
+    submitted_at: float | None = None  # time.time() of the submission, for the dispatch time in JobMetrics
+    limit_address_space: bool = False  # see job_limits
+
+
+class _ConnectionQueue:
+    """
+    Queue-like adapter, so job targets can put their (index, Result) into the result pipe of their worker.
+    While the address space is capped to a memory limit, a failure with a MemoryError is reported as
+    ResourceLimitExceeded.
+    Results with JobMetrics get the dispatch time of their job added.
+    """
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.memory_limit: int | None = None
+        self.dispatch: dict[int, tuple[float, int | None]] = {}  # job id -> seconds and peak of the dispatch
+        self._lock = threading.Lock()   # the watchdog of job_limits sends as well
+
+    def put(self, item) -> None:
+        if self.memory_limit is not None and isinstance(item[1], Failure) and isinstance(item[1].error, MemoryError):
+            item = (item[0], Failure(ResourceLimitExceeded(MEMORY_LIMIT, self.memory_limit)))
+        if isinstance(item[1], Result) and isinstance(item[1].metrics, JobMetrics) and item[0] in self.dispatch:
+            item[1].metrics.record(DISPATCH_PHASE, *self.dispatch[item[0]])
+        with self._lock:
+            self.connection.send(item)
+
+
+def _worker_loop(target: Callable, batch_target: Callable | None, task_connection: Connection,
+                 result_connection: Connection) -> None:
+    '''
+    Main function of a worker process. The heavy imports happen once here instead of once per job,
+    parsed models and imported algorithm modules stay cached between jobs. The models are cached as NeuralNetworks,
+    so their NetworkIR is built once per worker and dropped together with the model.
+    :param target: job function, called as target(job_id, queue, model, input_bounds, algorithm_path,
+        selected_neurons, num_directions, output_layer_mode, neural_network=NeuralNetwork, **options)
+    :param batch_target: job function for several jobs that only differ in their neurons, called as
+        batch_target(job_ids, queue, model, input_bounds, algorithm_path, neuron_pairs, num_directions,
+        output_layer_mode, neural_network=NeuralNetwork, **options), it puts one result per job
+    :param task_connection: receives (job_ids, AlgorithmJobs) tuples, None stops the worker
+    :param result_connection: sends (job_id, Result) tuples back
+    A job that exceeds its time or memory limit fails with ResourceLimitExceeded and the worker exits,
+    the pool replaces it.
+    '''
+    import onnxruntime  # noqa: F401  pre-warms the runtime for algorithms that use it
+    from nn_verification_visualisation.model.data_loader.algorithm_loader import AlgorithmLoader
+
+    results = _ConnectionQueue(result_connection)
+    networks: OrderedDict[str, NeuralNetwork] = OrderedDict()
+    algorithm_versions: dict[str, int] = {}
+    while True:
+        try:
+            task = task_connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        job_ids, jobs = task
+        job = jobs[0]
+        reset_peak_rss()
+        try:
+            if job.model_key not in networks:
+                networks[job.model_key] = NeuralNetwork(job.model_key, job.model_path,
+                                                        ModelStore.attach(job.model_path))
+            networks.move_to_end(job.model_key)
+            while networks.__len__() > MAX_CACHED_MODELS:
+                networks.popitem(last=False)
+            network = networks[job.model_key]
+            dispatched, peak = time.time(), peak_rss()
+            results.dispatch = {job_id: (max(dispatched - batched_job.submitted_at, 0.0), peak)
+                                for job_id, batched_job in zip(job_ids, jobs) if batched_job.submitted_at is not None}
+
+            # an edited algorithm file has to be imported again
+            abs_path = str(Path(job.algorithm_path).resolve())
+            version = os.stat(abs_path).st_mtime_ns if os.path.exists(abs_path) else 0
+            if algorithm_versions.get(abs_path) != version:
+                AlgorithmLoader.forget(abs_path)
+                algorithm_versions[abs_path] = version
+
+            def on_exceeded(error: ResourceLimitExceeded, job_ids=job_ids):
+                for job_id in job_ids:
+                    results.put((job_id, Failure(error)))
+                os._exit(1)  # the running algorithm can't be interrupted otherwise
+
+            results.memory_limit = job.memory_limit if job.limit_address_space else None
+            with job_limits(job.time_limit, job.memory_limit, on_exceeded, job.limit_address_space):
+                if jobs.__len__() == 1:
+                    target(job_ids[0], results, network.model, job.input_bounds, job.algorithm_path,
+                           job.selected_neurons, job.num_directions, job.output_layer_mode,
+                           neural_network=network, **job.options)
+                else:
+                    batch_target(job_ids, results, network.model, job.input_bounds, job.algorithm_path,
+                                 [batched_job.selected_neurons for batched_job in jobs], job.num_directions,
+                                 job.output_layer_mode, neural_network=network, **job.options)
+        except BaseException as e:
+            for job_id in job_ids:
+                results.put((job_id, Failure(e)))
+        finally:
+            results.memory_limit = None
+            results.dispatch = {}
+
+
+class _Worker:
+    """
+    Parent side of a worker process.
+    """
+
+    def __init__(self, process, task_connection: Connection, result_connection: Connection):
+        self.process = process
+        self.task_connection = task_connection
+        self.result_connection = result_connection
+        self.task_ids: list[int] = []
+        self.memory = 0
+        self.retired = False
+
+
+@dataclass
+class _Subscriber:
+    """
+    A job waiting for a task.
+    """
+    on_result: Callable[[Result], None]
+    on_state: Callable[[JobState], None] | None
+    on_partial: Callable[[object], None] | None
+    priority: int
+
+
+class _Task:
+    """
+    One computation in the parent. Identical jobs share a task, each of them is a subscriber.
+    Tasks with the same batch key only differ in their neurons and can run as one batch.
+    :param subscribers: job id -> subscriber
+    """
+
+    def __init__(self, task_id: int, job: AlgorithmJob, fingerprint: str | None, batch_key: tuple, memory: int):
+        self.task_id = task_id
+        self.job = job
+        self.fingerprint = fingerprint
+        self.batch_key = batch_key
+        self.is_deterministic = False
+        self.memory = memory
+        self.subscribers: dict[int, _Subscriber] = {}
+        self.state = JobState.Queued
+
+    @property
+    def priority(self) -> int:
+        return max(subscriber.priority for subscriber in self.subscribers.values())
+
+
+class WorkerPool(metaclass=SingletonMeta):
+    """
+    Long-lived pool of pre-warmed algorithm worker processes, created once per app session.
+    Queued jobs are dispatched by priority and then first in, first out, as long as a worker is idle and the
+    estimated memory of the running jobs stays within the budget. Every job can be cancelled on its own.
+    Jobs with the same fingerprint are computed once and the result is handed to all of them,
+    results of deterministic algorithms are also reused for later jobs and kept in the on-disk result cache.
+    Queued jobs on the same network, bounds and algorithm are handed to a worker as one batch, which runs the
+    algorithm once for all their neuron pairs. Batches are split over the idle workers.
+    """
+    logger = Logger(__name__)
+
+    def __init__(self, size: int | None = None, target: Callable | None = None, memory_budget: int | None = None,
+                 batch_target: Callable | None = None, max_batch_size: int = MAX_BATCH_SIZE,
+                 result_cache: ResultCache | None = None, limit_address_space: bool = False):
+        '''
+        :param size: number of worker processes, defaults to default_pool_size
+        :param target: job function run by the workers, defaults to execute_algorithm_wrapper
+        :param memory_budget: bytes the running jobs may use together, defaults to a share of the available memory
+        :param batch_target: job function for batches, defaults to execute_batched_algorithm_wrapper together
+            with the default target, jobs are not batched without it
+        :param max_batch_size: maximal number of jobs in one batch
+        :param result_cache: persistent cache for results of deterministic algorithms, defaults to the user cache
+        :param limit_address_space: caps the address space of the jobs to their memory limit as well, by default
+            only the resident memory is watched, see job_limits
+        '''
+        if target is None:
+            from nn_verification_visualisation.controller.input_manager.plot_view_controller import \
+                execute_algorithm_wrapper, execute_batched_algorithm_wrapper
+            target = execute_algorithm_wrapper
+            batch_target = batch_target or execute_batched_algorithm_wrapper
+        memory = available_memory()
+        if memory_budget is None:
+            memory_budget = int(memory * MEMORY_BUDGET_FRACTION) if memory is not None else None
+        self.size = max(1, size or default_pool_size())
+        self.target = target
+        self.batch_target = batch_target
+        self.max_batch_size = max(1, max_batch_size)
+        self.memory_budget = memory_budget
+        # a single runaway job must not take the whole machine down
+        self.default_memory_limit = int(memory * MEMORY_BUDGET_FRACTION) if memory is not None else None
+        self.limit_address_space = limit_address_space
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.RLock()
+        self._workers: list[_Worker] = []
+        self._retiring: list[_Worker] = []
+        self._tasks: dict[int, _Task] = {}
+        self._task_of_job: dict[int, int] = {}
+        self._task_of_fingerprint: dict[str, int] = {}
+        self._completed: OrderedDict[str, Result] = OrderedDict()
+        self._model_store = ModelStore()
+        self._result_cache = result_cache if result_cache is not None else ResultCache()
+        self._next_id = 0
+        self._running = False
+        self._router: threading.Thread | None = None
+        self._wakeup_reader, self._wakeup_writer = self._context.Pipe(duplex=False)
+
+    @staticmethod
+    def dedicated(*args, **kwargs) -> WorkerPool:
+        '''
+        Creates a pool next to the shared instance, for a user that shuts its pool down when it is done,
+        e.g. a batch run. Takes the arguments of the constructor.
+        :return: the new pool, it is not returned by WorkerPool()
+        '''
+        pool = WorkerPool.__new__(WorkerPool)
+        pool.__init__(*args, **kwargs)
+        return pool
+
+    def start(self) -> None:
+        '''
+        Starts the worker processes, so they are warm when the first job arrives. Does nothing if already started.
+        '''
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            for _ in range(self.size):
+                self._workers.append(self._spawn_worker())
+            self._router = threading.Thread(target=self._route_results, daemon=True)
+            self._router.start()
+
+    def shutdown(self) -> None:
+        '''
+        Stops all workers, queued and running jobs are dropped without a callback.
+        '''
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            workers = list(self._workers)
+            self._workers.clear()
+            self._tasks.clear()
+            self._task_of_job.clear()
+            self._task_of_fingerprint.clear()
+            self._completed.clear()
+        for worker in workers:
+            try:
+                worker.task_connection.send(None)
+            except OSError:
+                pass
+        for worker in workers:
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        self._model_store.clear()
+        self._wakeup_writer.send(None)
+        if self._router is not None:
+            self._router.join(timeout=1)
+
+    def submit(self, model: ModelProto, input_bounds: np.ndarray, algorithm_path: str,
+               selected_neurons: list[tuple[int, int]], num_directions: int,
+               on_result: Callable[[Result], None],
+               output_layer_mode: str = DEFAULT_OUTPUT_LAYER_MODE, priority: int = 0,
+               on_state: Callable[[JobState], None] | None = None, is_deterministic: bool = False,
+               on_partial: Callable[[object], None] | None = None, time_limit: float | None = None,
+               memory_limit: int | None = None, options: dict | None = None) -> int:
+        '''
+        Queues one algorithm execution, or joins an identical one that is already queued or running.
+        :param on_result: called with the Result of the job, from a background thread
+        :param priority: jobs with a higher priority are started first
+        :param on_state: called whenever the job is queued or starts running
+        :param is_deterministic: allows to answer the job with the result of an identical earlier job,
+            also from an earlier session
+        :param on_partial: called with every intermediate result the job function puts before its Result,
+            from a background thread
+        :param time_limit: seconds the job may run, None for no limit
+        :param memory_limit: bytes the worker may use for the job, defaults to a share of the available memory
+        :param options: further keyword arguments for the job function
+        :return: id of the job, see cancel
+        '''
+        self.start()
+        model_key, model_path = self._model_store.publish(model)
+        if memory_limit is None:
+            memory_limit = self.default_memory_limit
+        job = AlgorithmJob(model_key, model_path, input_bounds, algorithm_path, list(selected_neurons),
+                           num_directions, output_layer_mode, time_limit, memory_limit, dict(options or {}),
+                           time.time(), self.limit_address_space)
+        try:
+            fingerprint = job_fingerprint(model_key, input_bounds, algorithm_path, selected_neurons, num_directions,
+                                          output_layer_mode, job.options)
+        except OSError:
+            fingerprint = None  # e.g. a missing algorithm file, the worker reports the error
+        bounds = np.ascontiguousarray(input_bounds, dtype=np.float64)
+        batch_key = (model_key, bounds.shape, bounds.tobytes(), str(Path(algorithm_path).resolve()), num_directions,
+                     output_layer_mode, time_limit, memory_limit, repr(sorted(job.options.items())))
+        memory = WORKER_BASE_MEMORY + JOB_MODEL_MEMORY_FACTOR * os.path.getsize(model_path)
+
+        cached = None
+        if is_deterministic and fingerprint is not None:
+            with self._lock:
+                in_memory = fingerprint in self._completed
+            if not in_memory:
+                data = self._result_cache.get(fingerprint)
+                cached = Success(data) if data is not None else None
+
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            completed = self._completed.get(fingerprint) if is_deterministic and fingerprint is not None else None
+            if completed is None and cached is not None:
+                completed = self._completed[fingerprint] = cached
+            if completed is None:
+                task_id = self._task_of_fingerprint.get(fingerprint) if fingerprint is not None else None
+                if task_id is None:
+                    task_id = self._next_id
+                    self._next_id += 1
+                    self._tasks[task_id] = _Task(task_id, job, fingerprint, batch_key, memory)
+                    if fingerprint is not None:
+                        self._task_of_fingerprint[fingerprint] = task_id
+                task = self._tasks[task_id]
+                task.subscribers[job_id] = _Subscriber(on_result, on_state, on_partial, priority)
+                task.is_deterministic = task.is_deterministic or is_deterministic
+                self._task_of_job[job_id] = task_id
+                state = task.state
+            else:
+                self._completed.move_to_end(fingerprint)
+
+        if completed is not None:
+            on_result(completed)
+            return job_id
+        if on_state is not None:
+            on_state(state)
+        self._dispatch()
+        return job_id
+
+    def prioritize(self, job_ids: list[int], priority: int) -> None:
+        '''
+        Changes the priority of jobs that are still queued, e.g. to run the visible diagram first.
+        '''
+        with self._lock:
+            for job_id in job_ids:
+                task = self._tasks.get(self._task_of_job.get(job_id))
+                if task is not None:
+                    task.subscribers[job_id].priority = priority
+
+    def get_state(self, job_id: int) -> JobState:
+        '''
+        :return: state of the job, finished and cancelled jobs are Done
+        '''
+        with self._lock:
+            task = self._tasks.get(self._task_of_job.get(job_id))
+            return task.state if task is not None else JobState.Done
+
+    def cancel(self, job_id: int) -> bool:
+        '''
+        Cancels a queued or running job. The computation itself only stops when no identical job waits for it,
+        a running computation's worker is then terminated and replaced.
+        :return: whether the job was still queued or running
+        '''
+        with self._lock:
+            task = self._tasks.get(self._task_of_job.pop(job_id, None))
+            if task is None:
+                return False
+            on_result = task.subscribers.pop(job_id).on_result
+            if not task.subscribers:
+                self._forget(task)
+                if task.state == JobState.Running:
+                    for index, worker in enumerate(self._workers):
+                        if task.task_id in worker.task_ids:
+                            worker.task_ids.remove(task.task_id)
+                            if worker.task_ids:
+                                break  # the rest of its batch still needs the worker
+                            self.logger.info(f"Terminating algorithm job {job_id}")
+                            worker.retired = True
+                            worker.process.terminate()
+                            self._retiring.append(worker)
+                            self._workers[index] = self._spawn_worker()
+                            break
+        self._wakeup_writer.send(None)
+        on_result(Failure(Exception(CANCELLED_MESSAGE)))
+        self._dispatch()
+        return True
+
+    def _forget(self, task: _Task) -> None:
+        self._tasks.pop(task.task_id, None)
+        if task.fingerprint is not None and self._task_of_fingerprint.get(task.fingerprint) == task.task_id:
+            del self._task_of_fingerprint[task.fingerprint]
+        for job_id in task.subscribers:
+            self._task_of_job.pop(job_id, None)
+
+    def _finish(self, task: _Task, result: Result) -> None:
+        '''
+        Hands the result to every job waiting for the task.
+        '''
+        with self._lock:
+            subscribers = list(task.subscribers.values())
+            self._forget(task)
+            if result.is_success and task.fingerprint is not None:
+                self._completed[task.fingerprint] = result
+                while self._completed.__len__() > MAX_COMPLETED_RESULTS:
+                    self._completed.popitem(last=False)
+        for subscriber in subscribers:
+            subscriber.on_result(result)
+        if result.is_success and task.fingerprint is not None and task.is_deterministic:
+            self._result_cache.put(task.fingerprint, result.data)
+
+    def _spawn_worker(self) -> _Worker:
+        task_reader, task_writer = self._context.Pipe(duplex=False)
+        result_reader, result_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_worker_loop,
+                                        args=(self.target, self.batch_target, task_reader, result_writer),
+                                        daemon=True)
+        with _blas_threads(max(1, (os.cpu_count() or 1) // self.size)):
+            process.start()
+        task_reader.close()
+        result_writer.close()
+        return _Worker(process, task_writer, result_reader)
+
+    def _dispatch(self) -> None:
+        '''
+        Hands queued tasks to idle workers, batched where possible. The sending happens outside the lock.
+        '''
+        assignments = []
+        with self._lock:
+            idle = [worker for worker in self._workers if not worker.task_ids and not worker.retired]
+            queued = sorted((task for task in self._tasks.values() if task.state == JobState.Queued),
+                            key=lambda task: (-task.priority, task.task_id))
+            reserved = sum(worker.memory for worker in self._workers if worker.task_ids)
+            while queued and idle:
+                task = queued[0]
+                if self.memory_budget is not None and reserved > 0 and reserved + task.memory > self.memory_budget:
+                    break  # waits for memory instead of letting a smaller job overtake it
+                batch = [task]
+                if self.batch_target is not None:
+                    similar = [other for other in queued[1:] if other.batch_key == task.batch_key]
+                    # spreads a large batch over the idle workers instead of running it on one of them
+                    batch_size = min(self.max_batch_size, -(-(similar.__len__() + 1) // idle.__len__()))
+                    batch += similar[:batch_size - 1]
+                reserved += task.memory
+                worker = idle.pop(0)
+                worker.task_ids = [batched.task_id for batched in batch]
+                worker.memory = task.memory
+                callbacks = []
+                for batched in batch:
+                    queued.remove(batched)
+                    batched.state = JobState.Running
+                    callbacks += [subscriber.on_state for subscriber in batched.subscribers.values()]
+                assignments.append((worker, batch, callbacks))
+        for worker, batch, state_callbacks in assignments:
+            for on_state in state_callbacks:
+                if on_state is not None:
+                    on_state(JobState.Running)
+            try:
+                worker.task_connection.send(([task.task_id for task in batch], [task.job for task in batch]))
+            except OSError:
+                pass  # the worker was terminated by cancel in the meantime
+
+    def _route_results(self) -> None:
+        '''
+        Background thread that forwards results to the callbacks and replaces workers that died.
+        '''
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+                connections = {worker.result_connection: worker for worker in self._workers + self._retiring}
+            for connection in wait(list(connections) + [self._wakeup_reader]):
+                if connection is self._wakeup_reader:
+                    self._wakeup_reader.recv()
+                    continue
+                self._receive(connections[connection])
+            self._dispatch()
+
+    def _receive(self, worker: _Worker) -> None:
+        try:
+            task_id, result = worker.result_connection.recv()
+        except (EOFError, OSError):
+            self._replace_dead_worker(worker)
+            return
+        with self._lock:
+            if task_id not in worker.task_ids:
+                return  # late result of a cancelled job
+            if not isinstance(result, Result):  # intermediate result, the task keeps running
+                task = self._tasks.get(task_id)
+                callbacks = [subscriber.on_partial for subscriber in task.subscribers.values()] if task else []
+            else:
+                worker.task_ids.remove(task_id)
+                task = self._tasks.get(task_id)
+                callbacks = None
+                if isinstance(result.error, ResourceLimitExceeded) and worker in self._workers:
+                    # the worker stops after a limit was exceeded, new jobs go to a replacement
+                    worker.retired = True
+                    self._retiring.append(worker)
+                    self._workers[self._workers.index(worker)] = self._spawn_worker()
+                    try:
+                        worker.task_connection.send(None)
+                    except OSError:
+                        pass
+        if callbacks is not None:
+            for on_partial in callbacks:
+                if on_partial is not None:
+                    on_partial(result)
+        elif task is not None:
+            self._finish(task, result)
+
+    def _replace_dead_worker(self, worker: _Worker) -> None:
+        worker.result_connection.close()
+        worker.process.join(timeout=1)
+        with self._lock:
+            tasks = [self._tasks[task_id] for task_id in worker.task_ids if task_id in self._tasks]
+            if worker in self._retiring:
+                self._retiring.remove(worker)
+            elif worker in self._workers:
+                self._workers[self._workers.index(worker)] = self._spawn_worker()
+        for task in tasks:
+            self._finish(task, Failure(RuntimeError("Algorithm process exited unexpectedly")))
@@ -0,0 +1,120 @@
+import argparse
+import sys
+from pathlib import Path
+
+from nn_verification_visualisation.controller.process_manager.batch_runner import load_job_file, run_batch, \
+    write_batch_output, PairOutcome, run_job, run_job_batch
+from nn_verification_visualisation.controller.process_manager.verification_server import VerificationServer, \
+    DEFAULT_ADDRESS
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool
+
+# Only the user interface needs PySide6, it is imported when it starts, so the batch mode runs without a display.
+
+
+def main(argv: list[str] | None = None) -> int:
+    '''
+    Console entry point. Starts the user interface, or with "batch" as first argument runs a job file headless:
+    nn_verification_visualisation batch jobs.json --output results
+    With "serve" it shares the algorithm workers of this machine, which user interfaces started with
+    --server use instead of their own:
+    nn_verification_visualisation serve --address 0.0.0.0:8765
+    nn_verification_visualisation --server compute-host:8765
+    :param argv: the arguments without the program name, defaults to sys.argv
+    :return: the exit code
+    '''
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["batch"]:
+        return batch_main(argv[1:])
+    if argv[:1] == ["serve"]:
+        return serve_main(argv[1:])
+    parser = argparse.ArgumentParser(prog="nn_verification_visualisation")
+    parser.add_argument("--server", help="address of a verification server to compute on, host:port or unix:<path>")
+    args, _ = parser.parse_known_args(argv)
+    if args.server is not None:
+        from nn_verification_visualisation.model.data.storage import Storage
+        Storage().verification_server = args.server
+    from nn_verification_visualisation.__main__ import main as gui_main
+    gui_main()
+    return 0
+
+
+def serve_main(argv: list[str]) -> int:
+    '''
+    Runs a VerificationServer until the process is interrupted.
+    :return: 0 after an interrupt, 2 if the address is invalid or can't be bound
+    '''
+    parser = argparse.ArgumentParser(prog="nn_verification_visualisation serve",
+                                     description="Shares the algorithm workers of this machine with other clients.")
+    parser.add_argument("-a", "--address", default=DEFAULT_ADDRESS,
+                        help=f"host:port or unix:<path> to listen on, defaults to {DEFAULT_ADDRESS}")
+    parser.add_argument("-w", "--workers", type=int, help="number of worker processes")
+    parser.add_argument("--limit-address-space", action="store_true",
+                        help="also cap the address space of the jobs to their memory limit")
+    args = parser.parse_args(argv)
+
+    try:
+        server = VerificationServer(args.address, WorkerPool(size=args.workers, target=run_job,
+                                                             batch_target=run_job_batch,
+                                                             limit_address_space=args.limit_address_space))
+        server.bind()
+    except (ValueError, OSError) as e:
+        print(f"Could not listen on {args.address}: {e}", file=sys.stderr)
+        return 2
+    print(f"Serving {server.algorithms.__len__()} algorithms on {server.address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.pool.shutdown()
+    return 0
+
+
+def batch_main(argv: list[str]) -> int:
+    '''
+    Runs every algorithm of a job file on every neuron pair of its networks and writes a save-state,
+    the bounds, polygons and timings into the output directory, see load_job_file for the format.
+    :return: 0 if every pair succeeded, 1 if some failed, 2 if the job file or the output is invalid
+    '''
+    parser = argparse.ArgumentParser(prog="nn_verification_visualisation batch",
+                                     description="Computes a comparison matrix without the user interface.")
+    parser.add_argument("job_file", help="JSON or YAML job file")
+    parser.add_argument("-o", "--output", help="output directory, defaults to <job file>_results next to the job file")
+    parser.add_argument("-w", "--workers", type=int, help="number of worker processes, replaces the job file value")
+    parser.add_argument("--no-cache", action="store_true", help="recompute results of deterministic algorithms")
+    args = parser.parse_args(argv)
+
+    job_res = load_job_file(args.job_file)
+    if not job_res.is_success:
+        print(f"Invalid job file {args.job_file}: {job_res.error}", file=sys.stderr)
+        return 2
+    job = job_res.data
+    if args.workers is not None:
+        job.workers = args.workers
+    total = job.computations().__len__()
+
+    def on_outcome(outcome: PairOutcome, finished: int):
+        name = (f"{job.networks[outcome.network_index].name} {job.algorithms[outcome.algorithm_index].name} "
+                f"{outcome.selected_neurons}")
+        if not outcome.result.is_success:
+            status = f"failed: {outcome.result.error}"
+        elif outcome.metrics is not None:
+            status = f"done in {outcome.metrics.total_seconds():.2f} s"
+        else:
+            status = "done (cached)"
+        print(f"[{finished}/{total}] {name} {status}", file=sys.stderr)
+
+    outcomes = run_batch(job, on_outcome, use_cache=not args.no_cache)
+
+    job_path = Path(args.job_file)
+    output = args.output or str(job_path.with_name(f"{job_path.stem}_results"))
+    written = write_batch_output(job, outcomes, output)
+    if not written.is_success:
+        print(f"Could not write the results to {output}: {written.error}", file=sys.stderr)
+        return 2
+    print(f"Save-state written to {written.data}", file=sys.stderr)
+    return 0 if all(outcome.result.is_success for outcome in outcomes) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+
+import numpy as np
+from onnx import ModelProto, NodeProto, TensorProto, helper, numpy_helper
+
+LINEAR_WEIGHT_OPS = ("Gemm", "MatMul")
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class NetworkLayer:
+    '''
+    One node of the network with its decoded attributes.
+    :param name: the name of the node
+    :param op_type: the ONNX operator
+    :param inputs: the names of the input tensors
+    :param outputs: the names of the output tensors
+    :param attributes: the attribute values, tensors are read-only np.ndarrays
+    '''
+    name: str
+    op_type: str
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    attributes: Mapping[str, Any]
+
+    @staticmethod
+    def from_node(node: NodeProto) -> NetworkLayer:
+        attributes = {}
+        for attribute in node.attribute:
+            value = helper.get_attribute_value(attribute)
+            if isinstance(value, TensorProto):
+                value = _read_only(numpy_helper.to_array(value))
+            attributes[attribute.name] = value
+        return NetworkLayer(node.name, node.op_type, tuple(node.input), tuple(node.output),
+                            MappingProxyType(attributes))
+
+
+@dataclass(frozen=True, eq=False)
+class NetworkIR:
+    '''
+    Immutable representation of a network, decoded once from its ModelProto, so the algorithms and the network view
+    don't walk the protobuf and convert the initializers again and again. NeuralNetwork.ir keeps the one of a loaded
+    network.
+    :param layers: the nodes in graph order
+    :param initializers: the initializers as read-only float64 arrays, in graph order
+    :param input_name: the name of the first graph input
+    :param input_shape: the dimensions of the first graph input without the batch axis
+    :param output_names: the names of the graph outputs
+    :param output_shapes: the dimensions of the graph outputs, 0 where unknown
+    '''
+    layers: tuple[NetworkLayer, ...]
+    initializers: Mapping[str, np.ndarray]
+    input_name: str
+    input_shape: tuple[int, ...]
+    output_names: tuple[str, ...]
+    output_shapes: tuple[tuple[int, ...], ...]
+
+    @staticmethod
+    def from_model(model: ModelProto, reuse: NetworkIR | None = None) -> NetworkIR:
+        '''
+        :param model: the network
+        :param reuse: representation whose arrays are taken for initializers of the same name instead of decoding
+            them, only valid if the model did not rewrite them, e.g. the head of NetworkModifier.tapped_output_layer
+        :return: the representation of the model
+        '''
+        known = reuse.initializers if reuse is not None else {}
+        initializers = {}
+        for initializer in model.graph.initializer:
+            array = known.get(initializer.name)
+            if array is None:
+                array = _read_only(np.asarray(numpy_helper.to_array(initializer), dtype=np.float64))
+            initializers[initializer.name] = array
+
+        graph_input = model.graph.input[0] if model.graph.input else None
+        input_shape = ()
+        if graph_input is not None:
+            input_shape = tuple(dim.dim_value for dim in graph_input.type.tensor_type.shape.dim[1:])
+        return NetworkIR(
+            tuple(NetworkLayer.from_node(node) for node in model.graph.node),
+            MappingProxyType(initializers),
+            graph_input.name if graph_input is not None else "",
+            input_shape,
+            tuple(output.name for output in model.graph.output),
+            tuple(tuple(dim.dim_value for dim in output.type.tensor_type.shape.dim) for output in model.graph.output),
+        )
+
+    @property
+    def linear_weights(self) -> list[np.ndarray]:
+        '''
+        :return: the weight matrices of the Gemm and MatMul layers, in graph order
+        '''
+        return [self.initializers[layer.inputs[1]] for layer in self.layers
+                if layer.op_type in LINEAR_WEIGHT_OPS and layer.inputs.__len__() > 1
+                and layer.inputs[1] in self.initializers]
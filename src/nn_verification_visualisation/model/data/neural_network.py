@@ -1,5 +1,7 @@
 from onnx import ModelProto
 
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
+
 class NeuralNetwork:
     '''
     Data object for a neural network. Stores the name and path of the network file, as well as the model itself.
@@ -15,3 +17,14 @@ class NeuralNetwork:
         self.name = name
         self.model = model
         self.path = path
+        self._ir = None
+
+    @property
+    def ir(self) -> NetworkIR:
+        '''
+        :return: the decoded layers and weights of the model, built the first time they are needed and kept with the
+            network, so they are freed together with it
+        '''
+        if self._ir is None:
+            self._ir = NetworkIR.from_model(self.model)
+        return self._ir
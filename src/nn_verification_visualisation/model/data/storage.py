@@ -5,6 +5,8 @@ from typing import List, Callable
 
 from PySide6.QtCore import QCoreApplication, QTimer
 
+from nn_verification_visualisation.controller.process_manager.direction_refinement import UNIFORM_DIRECTIONS
+from nn_verification_visualisation.controller.process_manager.network_modifier import DEFAULT_OUTPUT_LAYER_MODE
 from nn_verification_visualisation.model.data.algorithm import Algorithm
 from nn_verification_visualisation.model.data.diagram_config import DiagramConfig
 from nn_verification_visualisation.model.data.network_verification_config import NetworkVerificationConfig
@@ -25,6 +27,14 @@ class Storage(metaclass=SingletonMeta):
     algorithm_change_listeners: List[Callable[[], None]]
 
     num_directions: int
+    output_layer_mode: str
+    job_time_limit: float | None
+    job_memory_limit: int | None
+    direction_mode: str
+    direction_tolerance: float
+    direction_time_budget: float | None
+    job_metrics_log: str | None
+    verification_server: str | None
 
     def __init__(self):
         self.networks = []
@@ -33,6 +43,16 @@ class Storage(metaclass=SingletonMeta):
         self.algorithm_change_listeners = []
 
         self.num_directions = 32
+        self.output_layer_mode = DEFAULT_OUTPUT_LAYER_MODE  # see OUTPUT_LAYER_MODE_LABELS
+        self.job_time_limit = None  # seconds per algorithm run, None for no limit
+        self.job_memory_limit = None  # bytes per algorithm run, None for the default of the WorkerPool
+        self.direction_mode = UNIFORM_DIRECTIONS  # or ADAPTIVE_DIRECTIONS, see direction_refinement
+        self.direction_tolerance = 1e-3  # accepted polygon error of the adaptive mode, relative to its size
+        self.direction_time_budget = None  # seconds of adaptive refinement, None for no limit
+        # JSON-lines file the phase timings of every algorithm run are appended to, None disables it
+        self.job_metrics_log = str(Path.home() / ".nn_verification_visualisation" / "job_metrics.jsonl")
+        # "host:port" or "unix:<path>" of a VerificationServer to compute on, None computes in this process
+        self.verification_server = None
         # --- SaveState integration ---
         self._save_state_path = str(Path.home() / ".nn_verification_visualisation" / "save_state.json")
         self._autosave_timer: QTimer | None = None
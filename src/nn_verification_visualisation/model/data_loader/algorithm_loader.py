@@ -14,6 +14,8 @@ from nn_verification_visualisation.model.data.algorithm import Algorithm
 
 
 CalculateFn = Callable[[Any, Any], Any]
+# optional function of an algorithm that gets the NetworkIR of the network instead of the ModelProto
+NETWORK_IR_FUNCTION = "calculate_output_bounds_ir"
 
 
 class AlgorithmLoader(metaclass=SingletonMeta):
@@ -22,6 +24,8 @@ class AlgorithmLoader(metaclass=SingletonMeta):
     """
     # cash: absolute path -> calculate_output_bounds
     _fn_cache: Dict[str, CalculateFn] = {}
+    # absolute path -> calculate_output_bounds_ir, None if the algorithm has none
+    _ir_fn_cache: Dict[str, CalculateFn | None] = {}
 
     @staticmethod
     def load_algorithm(file_path: str) -> Result[Algorithm]:
@@ -37,6 +41,7 @@ class AlgorithmLoader(metaclass=SingletonMeta):
 
             abs_path = str(Path(file_path).resolve())
             AlgorithmLoader._fn_cache[abs_path] = fn
+            AlgorithmLoader._ir_fn_cache[abs_path] = AlgorithmLoader._get_network_ir_function(module)
 
             path = Path(file_path)
             name = getattr(module, "ALGORITHM_NAME", None) or path.stem
@@ -67,10 +72,36 @@ class AlgorithmLoader(metaclass=SingletonMeta):
             module = AlgorithmLoader._import_module(file_path)
             fn = AlgorithmLoader._get_calculate_output_bounds(module)
             AlgorithmLoader._fn_cache[abs_path] = fn
+            AlgorithmLoader._ir_fn_cache[abs_path] = AlgorithmLoader._get_network_ir_function(module)
             return Success(fn)
         except BaseException as e:
             return Failure(e)
 
+    @staticmethod
+    def load_calculate_output_bounds_ir(file_path: str) -> Result[CalculateFn | None]:
+        """
+        Returns the optional calculate_output_bounds_ir(network, input_bounds) of the algorithm, which gets the
+        NetworkIR of the network, so the shared decoded weights are not converted again.
+        :param file_path: path to the bounds file.
+        :return: the callable, or None if the algorithm only has calculate_output_bounds.
+        """
+        abs_path = str(Path(file_path).resolve())
+        if abs_path not in AlgorithmLoader._fn_cache:
+            loaded = AlgorithmLoader.load_calculate_output_bounds(file_path)
+            if not loaded.is_success:
+                return loaded
+        return Success(AlgorithmLoader._ir_fn_cache.get(abs_path))
+
+    @staticmethod
+    def forget(file_path: str) -> None:
+        """
+        Removes the cached functions of the algorithm, so it is imported again, e.g. after it was edited.
+        :param file_path: path to algorithm file.
+        """
+        abs_path = str(Path(file_path).resolve())
+        AlgorithmLoader._fn_cache.pop(abs_path, None)
+        AlgorithmLoader._ir_fn_cache.pop(abs_path, None)
+
     @staticmethod
     def _import_module(file_path: str):
         """
@@ -125,3 +156,16 @@ class AlgorithmLoader(metaclass=SingletonMeta):
             raise TypeError("calculate_output_bounds must accept exactly 2 parameters: (onnx_model, input_bounds)")
 
         return fn
+
+    @staticmethod
+    def _get_network_ir_function(module) -> CalculateFn | None:
+        """
+        :param module: imported module.
+        :return: the optional calculate_output_bounds_ir of the algorithm, see load_calculate_output_bounds_ir.
+        """
+        fn = getattr(module, NETWORK_IR_FUNCTION, None)
+        if fn is None or not callable(fn):
+            return None
+        if len(inspect.signature(fn).parameters) != 2:
+            raise TypeError(f"{NETWORK_IR_FUNCTION} must accept exactly 2 parameters: (network, input_bounds)")
+        return fn
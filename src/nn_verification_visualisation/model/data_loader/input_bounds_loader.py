@@ -1,10 +1,13 @@
+from __future__ import annotations
+
 import re
 from logging import Logger
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, TYPE_CHECKING
 from venv import logger
 
-from nn_verification_visualisation.model.data.network_verification_config import NetworkVerificationConfig
+if TYPE_CHECKING:
+    from nn_verification_visualisation.model.data.network_verification_config import NetworkVerificationConfig
 from nn_verification_visualisation.utils.result import Failure, Success
 
 import csv
@@ -23,6 +26,17 @@ class InputBoundsLoader(metaclass=SingletonMeta):
         :param network_config: network configuration
         :return: Dictionary of input bounds.
         """
+        if network_config is None or len(network_config.layers_dimensions) < 1:
+            return Failure(ValueError("Invalid network passed"))
+        return self.load_input_bounds_for_inputs(file_path, network_config.layers_dimensions[0])
+
+    def load_input_bounds_for_inputs(self, file_path: str, input_count: int) -> Result[Dict[int, tuple[float, float]]]:
+        """
+        Method to load input bounds csv/vnnlib file without a network configuration, e.g. in the batch mode.
+        :param file_path: path to input bounds csv/vnnlib file.
+        :param input_count: number of inputs of the network.
+        :return: Dictionary of input bounds.
+        """
         ending = file_path.split('.')[-1]
         is_csv = (ending == 'csv')
         is_vnnlib = (ending == 'vnnlib')
@@ -31,11 +45,6 @@ class InputBoundsLoader(metaclass=SingletonMeta):
             logger.error(ending + ' is not supported. Please use a .csv or a .vnnlib file.')
             return Failure(ValueError(ending + ' is not supported. Please use a .csv or a .vnnlib file.'))
 
-        if network_config is None or len(network_config.layers_dimensions) < 1:
-            return Failure(ValueError("Invalid network passed"))
-
-        input_count = network_config.layers_dimensions[0]
-
         try:
             if is_csv:
                 return self.__parse_csv(file_path, input_count)
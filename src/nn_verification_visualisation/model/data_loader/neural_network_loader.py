@@ -5,6 +5,7 @@ from nn_verification_visualisation.utils.singleton import SingletonMeta
 from nn_verification_visualisation.model.data.neural_network import NeuralNetwork
 
 import onnx
+from onnx import ModelProto
 
 class NeuralNetworkLoader(metaclass=SingletonMeta):
     """
@@ -21,4 +22,18 @@ class NeuralNetworkLoader(metaclass=SingletonMeta):
             onnx.checker.check_model(model, full_check=True)
             return Success(NeuralNetwork(Path(file_path).stem, file_path, model))
         except BaseException as e:
-            return Failure(e)
\ No newline at end of file
+            return Failure(e)
+
+    @staticmethod
+    def get_layer_dimensions(model: ModelProto) -> list[int]:
+        """
+        Function to get the number of neurons per layer, entry 0 is the number of inputs.
+        :param model: neural network model.
+        :return: list of the layer dimensions.
+        """
+        layer_dimensions = []  # list of the number of nodes per Layer
+        for layer in model.graph.initializer:  # adds the 1.dim of the matrix, dim of the 1. layer
+            if len(layer.dims) == 2:
+                layer_dimensions.append(layer.dims[0])
+        layer_dimensions.append(model.graph.output[0].type.tensor_type.shape.dim[-1].dim_value)  # adds the output layer dim
+        return layer_dimensions
\ No newline at end of file
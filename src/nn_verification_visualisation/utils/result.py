@@ -6,6 +6,7 @@ class Result(Generic[T]):
     data: T
     error: BaseException
     is_success: bool
+    metrics: object | None = None
 
     def __init__(self, data: T, error: Union[BaseException, None], is_success: bool):
         self.data = data
@@ -13,8 +14,12 @@ class Result(Generic[T]):
         self.is_success = is_success
 
 class Success(Result[T]):
-    def __init__(self, data: T):
+    def __init__(self, data: T, metrics: object | None = None):
+        """
+        :param metrics: optional measurements of how the data was computed, e.g. JobMetrics
+        """
         super().__init__(data, None, True)
+        self.metrics = metrics
 
 class Failure(Result[T]):
     def __init__(self, error: BaseException):
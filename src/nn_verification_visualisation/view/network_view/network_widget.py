@@ -5,8 +5,9 @@ import onnx
 from PySide6.QtGui import QColor, QPainter, QPen, QWheelEvent, QKeyEvent, QTransform, QPalette, QBrush
 from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QSlider, QGraphicsLineItem, QGraphicsItem, QComboBox
 from PySide6.QtCore import Qt, QVariantAnimation, QEasingCurve, QParallelAnimationGroup, QLineF
-from onnx import numpy_helper, ModelProto
+from onnx import ModelProto
 
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
 from nn_verification_visualisation.model.data.network_verification_config import NetworkVerificationConfig
 from nn_verification_visualisation.view.network_view.network_edge_representation import NetworkEdgeBatch
 from nn_verification_visualisation.view.network_view.network_node_representation import NetworkNode, NetworkLayerLine
@@ -195,7 +196,8 @@ class NetworkWidget(QGraphicsView):
 
         all_weights = None
         if self.use_weighted_mode:
-            all_weights = self.get_weights_from_onnx(self.configuration.network.model)
+            # decoded once per network and shared with the algorithms, see NeuralNetwork.ir
+            all_weights = self.configuration.network.ir.linear_weights
 
         # --- Build Edges ---
         for i in range(len(self.node_layers) - 1):
@@ -290,26 +292,8 @@ class NetworkWidget(QGraphicsView):
         self.node_layers[layer_index][node_index].setBrush(color)
 
     def get_weights_from_onnx(self, model_proto: ModelProto):
-        # 1. Create a lookup table for all initializers (weights/biases)
-        # This maps the name of the tensor to its actual numerical array
-        weights_dict = {}
-        for initializer in model_proto.graph.initializer:
-            weights_dict[initializer.name] = numpy_helper.to_array(initializer)
-
-        # 2. Map nodes to their weights
-        # In a typical Fully Connected (Gemm) layer:
-        # node.input[0] is the input data
-        # node.input[1] is the weight matrix
-        # node.input[2] is the bias (optional)
-        layers_weights = []
-
-        for node in model_proto.graph.node:
-            if node.op_type in ["Gemm", "MatMul"]:
-                weight_name = node.input[1]
-                if weight_name in weights_dict:
-                    layers_weights.append(weights_dict[weight_name])
-
-        return layers_weights
+        # The weight matrices of the Gemm / MatMul layers (node.input[1]), see NetworkIR
+        return NetworkIR.from_model(model_proto).linear_weights
 
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_R:
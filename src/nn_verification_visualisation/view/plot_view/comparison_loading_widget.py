@@ -7,6 +7,8 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QScrollArea, QPushBu
 if TYPE_CHECKING:
     from nn_verification_visualisation.controller.input_manager.plot_view_controller import PlotViewController
 
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics
+from nn_verification_visualisation.controller.process_manager.resource_limits import ResourceLimitExceeded
 from nn_verification_visualisation.model.data.diagram_config import DiagramConfig
 from nn_verification_visualisation.utils.result import Result
 from nn_verification_visualisation.view.base_view.tab import Tab
@@ -21,21 +23,32 @@ class ComparisonLoadingWidget(Tab):
     __loaders: List[PairLoadingWidget]
     __page_title: QWidget
     __terminate_process: Callable[[int], bool]
+    __prioritize: Callable[[], None] | None
 
     __create_diagram_button: QPushButton
 
     __controller: PlotViewController
 
     on_update = Signal(tuple)
-
-    def __init__(self, diagram_config: DiagramConfig, controller: PlotViewController, terminate_process: Callable[[int], bool]):
+    on_status = Signal(tuple)
+    on_partial = Signal(tuple)
+
+    def __init__(self, diagram_config: DiagramConfig, controller: PlotViewController, terminate_process: Callable[[int], bool],
+                 prioritize: Callable[[], None] | None = None):
+        '''
+        :param terminate_process: cancels the computation of the pair with the given index
+        :param prioritize: moves the queued computations of this tab to the front, called when the tab is shown
+        '''
         self.diagram_config = diagram_config
         self.__terminate_process = terminate_process
+        self.__prioritize = prioritize
         self.__controller = controller
 
         super().__init__(f"Loading {diagram_config.get_title()}", ":assets/icons/plot/hourglass.svg", has_sidebar=False, remove_close_button=True)
 
         self.on_update.connect(lambda x: self.loading_updated(x[0], x[1]))
+        self.on_status.connect(lambda x: self.status_updated(x[0], x[1]))
+        self.on_partial.connect(lambda x: self.partial_updated(x[0], x[1], x[2]))
 
 
     def get_content(self) -> QWidget:
@@ -84,20 +97,50 @@ class ComparisonLoadingWidget(Tab):
     def loading_updated(self, index: int, result: Result):
         QApplication.processEvents()
         loader = self.__loaders[index]
-        loader.set_status(Status.Done if result.is_success else Status.Failed)
+        if result.is_success:
+            loader.set_status(Status.Done)
+            if isinstance(result.metrics, JobMetrics):
+                loader.set_metrics(result.metrics)
+        elif isinstance(result.error, ResourceLimitExceeded):
+            loader.set_status(Status.LimitExceeded)
+        else:
+            loader.set_status(Status.Failed)
         if not result.is_success:
             loader.error = result.error
         QApplication.processEvents()
 
+    def status_updated(self, index: int, status: Status):
+        '''
+        Shows whether the computation of a pair is queued or running. Finished pairs keep their status.
+        '''
+        loader = self.__loaders[index]
+        if loader.status in (Status.Queued, Status.Ongoing):
+            loader.set_status(status)
+
+    def partial_updated(self, index: int, polygon: list[tuple[float, float]], finished_directions: int):
+        '''
+        Shows the intermediate polygon of a pair that is still computed.
+        :param polygon: polygon of the directions finished so far
+        :param finished_directions: number of these directions
+        '''
+        loader = self.__loaders[index]
+        if loader.status in (Status.Queued, Status.Ongoing):
+            loader.set_partial_polygon(polygon, finished_directions)
+
+    def showEvent(self, event, /):
+        super().showEvent(event)
+        if self.__prioritize is not None:
+            self.__prioritize()
+
     def loading_finished(self):
         self.__create_diagram_button.setVisible(True)
         pass
 
     def __on_clicked(self, index: int) -> None:
         loader = self.__loaders[index]
-        if loader.status == Status.Ongoing: # on waiting -> cancel
+        if loader.status in (Status.Queued, Status.Ongoing): # on waiting -> cancel
             self.__terminate_process(index)
-        elif loader.status == Status.Failed and loader.error is not None: # on error -> show error
+        elif loader.status in (Status.Failed, Status.LimitExceeded) and loader.error is not None: # on error -> show error
             error_message = str(loader.error)
             error_dialog = InfoPopup(self.__controller.current_plot_view.close_dialog, error_message, InfoType.ERROR)
             self.__controller.current_plot_view.open_dialog(error_dialog)
@@ -106,7 +149,7 @@ class ComparisonLoadingWidget(Tab):
     def __get_pair_list(self) -> List[PairLoadingWidget]:
         loaders: List[PairLoadingWidget] = []
         for i, config in enumerate(self.diagram_config.plot_generation_configs):
-            loader = PairLoadingWidget(config.get_title(), lambda : self.__on_clicked(i))
-            loader.set_status(Status.Ongoing)
+            loader = PairLoadingWidget(config.get_title(), lambda checked=False, index=i: self.__on_clicked(index))
+            loader.set_status(Status.Queued)
             loaders.append(loader)
         return loaders
@@ -3,12 +3,17 @@ from typing import Callable
 from PySide6.QtCore import QThread
 from PySide6.QtSvgWidgets import QSvgWidget
 from PySide6.QtWidgets import QPushButton, QLabel, QHBoxLayout, QFrame
+
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics
+from nn_verification_visualisation.view.plot_view.polygon_preview import PolygonPreview
 from nn_verification_visualisation.view.plot_view.status import Status
 
 class PairLoadingWidget(QFrame):
     '''
     List item that displays the status of a single running algorithm.
     Shows the name of the neuron pair, a status icon and a button.
+    While the algorithm is running, the polygon of the directions it has finished so far can be shown.
+    A completed pair shows its total time, the tooltip lists the time and memory of every phase.
     '''
 
     status: Status
@@ -20,6 +25,9 @@ class PairLoadingWidget(QFrame):
     __button: QPushButton
     __title: QLabel
     __icon: QSvgWidget
+    __preview: PolygonPreview
+    __finished_directions: int
+    __metrics: JobMetrics | None
 
     def __init__(self, name: str, on_click: Callable[[], None] = None):
         '''
@@ -28,6 +36,8 @@ class PairLoadingWidget(QFrame):
         '''
         self.__on_click = on_click
         self.__name = name
+        self.__finished_directions = 0
+        self.__metrics = None
         super().__init__()
 
         self.__button = QPushButton()
@@ -39,9 +49,13 @@ class PairLoadingWidget(QFrame):
         self.__icon = QSvgWidget()
         self.__icon.setFixedSize(20, 20)
 
+        self.__preview = PolygonPreview()
+        self.__preview.setVisible(False)
+
         container_layout = QHBoxLayout()
         container_layout.addWidget(self.__title)
         container_layout.addWidget(self.__icon)
+        container_layout.addWidget(self.__preview)
         container_layout.addStretch()
         container_layout.addWidget(self.__button)
 
@@ -60,14 +74,23 @@ class PairLoadingWidget(QFrame):
         self.status = status
 
         match status:
+            case Status.Queued:
+                self.__button.setVisible(True)
+                self.__button.setText("Cancel Execution")
+                self.__icon.load(":assets/icons/hourglass.svg")
+                status = "Queued"
             case Status.Ongoing:
                 self.__button.setVisible(True)
                 self.__button.setText("Cancel Execution")
                 self.__icon.load(":assets/icons/hourglass.svg")
                 status = "Loading"
+                if self.__finished_directions > 0:
+                    status += f" ({self.__finished_directions} directions)"
             case Status.Done:
                 self.__button.setVisible(False)
                 status = "Completed"
+                if self.__metrics is not None:
+                    status += f" in {self.__metrics.total_seconds():.2f} s"
                 self.__icon.load(":assets/icons/check.svg")
             case Status.Failed:
                 self.__button.setVisible(True)
@@ -76,9 +99,37 @@ class PairLoadingWidget(QFrame):
                 self.__icon.load(":assets/icons/error.svg")
 
                 status = "Error"
+            case Status.LimitExceeded:
+                self.__button.setVisible(True)
+                self.__button.setText("Show Error")
+                self.__button.setObjectName("error-button")
+                self.__icon.load(":assets/icons/error.svg")
+
+                status = "Limit exceeded"
+        if self.status not in (Status.Queued, Status.Ongoing):
+            self.__preview.setVisible(False)
         self.__title.setText("{} - {}".format(self.__name, status))
 
         self.__button.style().unpolish(self.__button)
         self.__button.style().polish(self.__button)
         self.__button.update()
 
+    def set_partial_polygon(self, polygon: list[tuple[float, float]], finished_directions: int):
+        '''
+        Shows the intermediate polygon of the running algorithm, which gets tighter with every finished direction.
+        :param polygon: polygon of the finished directions
+        :param finished_directions: number of directions the polygon is built from
+        '''
+        self.__finished_directions = finished_directions
+        self.__preview.set_polygon(polygon)
+        self.__preview.setVisible(True)
+        self.set_status(Status.Ongoing)
+
+    def set_metrics(self, metrics: JobMetrics):
+        '''
+        Shows the measured phases of the finished algorithm.
+        :param metrics: time and peak memory per phase
+        '''
+        self.__metrics = metrics
+        self.setToolTip(metrics.summary())
+        self.set_status(self.status)
@@ -0,0 +1,51 @@
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainter, QPolygonF, QPen, QPalette, QColor
+from PySide6.QtWidgets import QWidget
+
+
+class PolygonPreview(QWidget):
+    '''
+    Small drawing of a polygon, scaled to fit the widget.
+    Used to show the intermediate polygon of a running algorithm.
+    '''
+
+    __polygon: list[tuple[float, float]]
+
+    def __init__(self, size: int = 40):
+        '''
+        :param size: width and height of the widget
+        '''
+        super().__init__()
+        self.__polygon = []
+        self.setFixedSize(size, size)
+
+    def set_polygon(self, polygon: list[tuple[float, float]]):
+        '''
+        :param polygon: vertices of the polygon, an empty list clears the drawing
+        '''
+        self.__polygon = list(polygon)
+        self.update()
+
+    def paintEvent(self, event, /):
+        if self.__polygon.__len__() < 2:
+            return
+        xs = [x for x, _ in self.__polygon]
+        ys = [y for _, y in self.__polygon]
+        margin = 3
+        span = max(max(xs) - min(xs), max(ys) - min(ys), 1e-12)
+        scale = (min(self.width(), self.height()) - 2 * margin) / span
+        center_x, center_y = (max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2
+
+        # y points up in the plot and down on the screen
+        points = QPolygonF([QPointF(self.width() / 2 + (x - center_x) * scale,
+                                    self.height() / 2 - (y - center_y) * scale) for x, y in self.__polygon])
+
+        color = self.palette().color(QPalette.ColorRole.Highlight)
+        fill = QColor(color)
+        fill.setAlpha(80)
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(color, 1.5))
+        painter.setBrush(fill)
+        painter.drawPolygon(points)
+        painter.end()
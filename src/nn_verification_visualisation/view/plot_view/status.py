@@ -4,4 +4,6 @@ from enum import Enum
 class Status(Enum):
     Ongoing = 0
     Done = 1
-    Failed = 2
\ No newline at end of file
+    Failed = 2
+    Queued = 3
+    LimitExceeded = 4
@@ -431,9 +431,12 @@ class TestExecuteAlgorithmWrapper:
         idx, result = queue.get(timeout=5)
         assert idx == 0
         assert result.is_success
-        output_bounds, out_directions = result.data
+        output_bounds, out_directions, polygon = result.data
         assert output_bounds == [(0.0, 1.0), (2.0, 3.0)]
         assert out_directions == directions
+        # the worker sends the polygon along as compact float32 array
+        assert polygon.dtype == np.float32
+        assert sorted(map(tuple, polygon.tolist())) == [(0.0, 2.0), (0.0, 3.0), (1.0, 2.0), (1.0, 3.0)]
 
     def test_failure_from_executor_propagates_to_queue(self):
         queue = Queue()
@@ -107,4 +107,149 @@ def test_execute_algorithm_success_and_failures(monkeypatch):
         raising=True,
     )
     r = ex.execute_algorithm(model, bounds, "a.py", [(0, 0)], 2)
-    assert not r.is_success and isinstance(r.error, ValueError)
\ No newline at end of file
+    assert not r.is_success and isinstance(r.error, ValueError)
+
+def test_execute_algorithm_tap_mode_runs_on_the_tapped_head():
+    from pathlib import Path
+
+    import onnx
+    from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+
+    repo_root = Path(__file__).resolve().parents[3]
+    model = onnx.load(repo_root / "TestFiles" / "NN3.onnx")
+    before = model.SerializeToString()
+    input_dim = model.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+    bounds = np.column_stack([np.full(input_dim, -1.0), np.full(input_dim, 1.0)])
+    executor = AlgorithmExecutor()
+
+    results = [
+        executor.execute_algorithm(model, bounds, str(repo_root / "algorithms" / name), [(1, 0), (2, 1)], 8, "tap")
+        for name in ("box_ibp_numpy.py", "simple_zonotope.py", "crown_numpy.py")
+    ]
+
+    for r in results:
+        assert r.is_success, r.error
+        assert r.data[0].shape == (8, 2)
+        assert np.all(r.data[0][:, 0] <= r.data[0][:, 1])
+    assert model.SerializeToString() == before
+
+    r = executor.execute_algorithm(model, bounds, str(repo_root / "algorithms" / "box_ibp_numpy.py"), [(1, 0)], 2,
+                                   "unknown")
+    assert not r.is_success and isinstance(r.error, ValueError)
+
+
+def test_execute_algorithm_batch_matches_single_runs():
+    from pathlib import Path
+
+    import onnx
+    from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+
+    repo_root = Path(__file__).resolve().parents[3]
+    model = onnx.load(repo_root / "TestFiles" / "NN3.onnx")
+    input_dim = model.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+    bounds = np.column_stack([np.full(input_dim, -1.0), np.full(input_dim, 1.0)])
+    algorithm = str(repo_root / "algorithms" / "box_ibp_numpy.py")
+    pairs = [[(1, 0), (2, 1)], [(0, 0), (0, 1)], [(2, 0), (2, 2)]]
+    executor = AlgorithmExecutor()
+
+    for mode in ("bridge", "tap"):
+        batch = executor.execute_algorithm_batch(model, bounds, algorithm, pairs, 6, mode)
+        assert batch.is_success, batch.error
+        assert batch.data.__len__() == 3
+        for pair, (pair_bounds, directions) in zip(pairs, batch.data):
+            single = executor.execute_algorithm(model, bounds, algorithm, pair, 6, mode)
+            assert np.allclose(pair_bounds, single.data[0], atol=1e-4)
+            assert directions == single.data[1]
+
+    r = executor.execute_algorithm_batch(model, bounds, algorithm, pairs, 2, "unknown")
+    assert not r.is_success and isinstance(r.error, ValueError)
+
+
+def test_adaptive_directions_stay_within_the_budget():
+    from pathlib import Path
+
+    import onnx
+    from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+    from nn_verification_visualisation.model.data_loader.algorithm_loader import AlgorithmLoader
+
+    repo_root = Path(__file__).resolve().parents[3]
+    model = onnx.load(repo_root / "TestFiles" / "NN3.onnx")
+    input_dim = model.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+    bounds = np.column_stack([np.full(input_dim, -1.0), np.full(input_dim, 1.0)])
+    algorithm = str(repo_root / "algorithms" / "simple_zonotope.py")
+    pairs = [[(2, 0), (2, 1)], [(1, 0), (2, 2)]]
+    executor = AlgorithmExecutor()
+    rounds = []
+
+    single = executor.execute_algorithm(model, bounds, algorithm, pairs[0], 24, direction_mode="adaptive",
+                                        on_partial=lambda b, d: rounds.append(d.__len__()))
+    assert single.is_success, single.error
+    output_bounds, directions = single.data
+    assert 8 <= directions.__len__() <= 24 and output_bounds.shape == (directions.__len__(), 2)
+    assert rounds[0] == 8 and rounds == sorted(rounds)
+    angles = [np.arctan2(x - 1e-9, y - 1e-9) for x, y in directions]
+    assert angles == sorted(angles)
+    # same bounds as a plain run with exactly these directions
+    calculate = AlgorithmLoader.load_calculate_output_bounds(algorithm).data
+    uniform = executor.run_algorithm(calculate, model, bounds, pairs[0], directions, "bridge")
+    assert np.allclose(output_bounds, uniform, atol=1e-4)
+
+    batch = executor.execute_algorithm_batch(model, bounds, algorithm, pairs, 24, direction_mode="adaptive")
+    assert batch.is_success, batch.error
+    assert np.allclose(batch.data[0][0], output_bounds, atol=1e-4)
+    assert batch.data[0][1] == directions
+    assert batch.data[1][1].__len__() <= 24
+
+    r = executor.execute_algorithm(model, bounds, algorithm, pairs[0], 24, direction_mode="unknown")
+    assert not r.is_success and isinstance(r.error, ValueError)
+
+
+def test_generator_algorithms_report_their_progress(tmp_path):
+    from pathlib import Path
+
+    import onnx
+    from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+
+    repo_root = Path(__file__).resolve().parents[3]
+    model = onnx.load(repo_root / "TestFiles" / "NN3.onnx")
+    input_dim = model.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+    bounds = np.column_stack([np.full(input_dim, -1.0), np.full(input_dim, 1.0)])
+    algorithm = tmp_path / "streaming.py"
+    algorithm.write_text(
+        "import sys\n"
+        f"sys.path.insert(0, {str(repo_root / 'algorithms')!r})\n"
+        "import box_ibp_numpy\n"
+        "def calculate_output_bounds(onnx_model, input_bounds):\n"
+        "    bounds = box_ibp_numpy.calculate_output_bounds(onnx_model, input_bounds)\n"
+        "    for start in range(0, len(bounds), 3):\n"
+        "        yield list(range(start, min(start + 3, len(bounds)))), bounds[start:start + 3]\n"
+    )
+    executor = AlgorithmExecutor()
+    reference = executor.execute_algorithm(model, bounds, str(repo_root / "algorithms" / "box_ibp_numpy.py"),
+                                           [(1, 0), (2, 1)], 8)
+    partials = []
+
+    r = executor.execute_algorithm(model, bounds, str(algorithm), [(1, 0), (2, 1)], 8,
+                                   on_partial=lambda b, d: partials.append((b.copy(), d)))
+
+    assert r.is_success, r.error
+    assert np.allclose(r.data[0], reference.data[0])
+    assert [d.__len__() for _, d in partials] == [3, 6, 8]
+    assert np.allclose(partials[1][0], reference.data[0][:6]) and partials[1][1] == reference.data[1][:6]
+
+    batch_partials = []
+    r = executor.execute_algorithm_batch(model, bounds, str(algorithm), [[(1, 0), (2, 1)], [(0, 0), (0, 1)]], 4,
+                                         on_partial=lambda p, b, d: batch_partials.append((p, d.__len__())))
+    assert r.is_success, r.error
+    assert batch_partials == [(0, 3), (0, 4), (1, 2), (1, 4)]
+
+
+def test_generator_algorithms_have_to_yield_every_direction(tmp_path):
+    from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+
+    import pytest
+
+    with pytest.raises(ValueError):
+        AlgorithmExecutor.collect_output_bounds((chunk for chunk in [([0], [[0.0, 1.0]])]), 2)
+    assert AlgorithmExecutor.collect_output_bounds(
+        (chunk for chunk in [([1], [[2.0, 3.0]]), ([0], [[0.0, 1.0]])]), 2).tolist() == [[0.0, 1.0], [2.0, 3.0]]
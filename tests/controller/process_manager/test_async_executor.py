@@ -0,0 +1,118 @@
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import onnx
+import pytest
+
+from nn_verification_visualisation.controller.process_manager.async_executor import PairRequest, run_pairs, \
+    run_pair
+from nn_verification_visualisation.controller.process_manager.batch_runner import run_job, run_job_batch
+from nn_verification_visualisation.controller.process_manager.result_cache import ResultCache
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool
+from nn_verification_visualisation.utils.result import Success, Failure
+from nn_verification_visualisation.utils.singleton import SingletonMeta
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+class FakePool:
+    """Finishes jobs only when the test says so, like a pool with slow workers."""
+
+    size = 1
+
+    def __init__(self):
+        self.callbacks = {}
+        self.cancelled = []
+
+    def submit(self, model, input_bounds, algorithm_path, selected_neurons, num_directions, on_result, *args,
+               **kwargs):
+        job_id = self.callbacks.__len__()
+        self.callbacks[job_id] = on_result
+        return job_id
+
+    def finish(self, job_id):
+        self.callbacks[job_id](Success(job_id))
+
+    def cancel(self, job_id):
+        self.cancelled.append(job_id)
+        self.callbacks[job_id](Failure(Exception("Cancelled")))
+        return True
+
+
+def _request(num_directions=4):
+    return PairRequest(None, np.zeros((4, 2)), "unused.py", [(1, 0), (2, 1)], num_directions)
+
+
+def test_submission_waits_for_the_consumer():
+    async def consume():
+        pool = FakePool()
+        pairs = run_pairs([_request() for _ in range(5)], pool, max_in_flight=2)
+
+        waiting = asyncio.ensure_future(pairs.__anext__())
+        await asyncio.sleep(0)
+        assert pool.callbacks.__len__() == 2
+        pool.finish(1)
+        first = await waiting
+        assert (first.index, first.result.data) == (1, 1)
+        assert pool.callbacks.__len__() == 2  # the next request is only submitted when the consumer asks for more
+
+        indices = []
+        for job_id, submitted in ((0, 3), (2, 4), (3, 5), (4, 5)):
+            waiting = asyncio.ensure_future(pairs.__anext__())
+            await asyncio.sleep(0)
+            assert pool.callbacks.__len__() == submitted
+            pool.finish(job_id)
+            indices.append((await waiting).index)
+        assert indices == [0, 2, 3, 4] and pool.cancelled == []
+        with pytest.raises(StopAsyncIteration):
+            await pairs.__anext__()
+
+    asyncio.run(consume())
+
+
+def test_cancelling_the_consumer_cancels_its_jobs():
+    async def consume(pool):
+        async for _ in run_pairs([_request(), _request()], pool):
+            pass
+
+    async def cancel():
+        pool = FakePool()
+        task = asyncio.ensure_future(consume(pool))
+        await asyncio.sleep(0.01)
+        pool.finish(0)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return pool
+
+    assert asyncio.run(cancel()).cancelled == [1]
+
+
+def test_async_pairs_run_on_the_worker_pool(tmp_path):
+    SingletonMeta._instances.pop(WorkerPool, None)
+    pool = WorkerPool(size=1, target=run_job, batch_target=run_job_batch,
+                      result_cache=ResultCache(str(tmp_path / "cache")))
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    bounds = np.column_stack([np.full(4, -1.0), np.full(4, 1.0)])
+    algorithm = str(REPO_ROOT / "algorithms" / "box_ibp_numpy.py")
+
+    async def run():
+        async def requests():
+            for pair in ([(1, 0), (2, 1)], [(2, 0), (2, 1)]):
+                yield PairRequest(model, bounds, algorithm, pair, 6)
+
+        results = [pair async for pair in run_pairs(requests(), pool)]
+        single = await run_pair(PairRequest(model, bounds, algorithm, [(1, 0), (2, 1)], 6), pool)
+        return results, single
+
+    try:
+        results, single = asyncio.run(run())
+    finally:
+        pool.shutdown()
+        SingletonMeta._instances.pop(WorkerPool, None)
+    assert sorted(pair.index for pair in results) == [0, 1]
+    assert all(pair.result.is_success for pair in results)
+    first = next(pair for pair in results if pair.index == 0)
+    assert np.allclose(single.data[0], first.result.data[0])
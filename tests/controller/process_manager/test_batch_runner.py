@@ -0,0 +1,140 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from nn_verification_visualisation.controller.process_manager.batch_runner import load_job_file, run_batch, \
+    write_batch_output, run_job, run_job_batch, SAVE_STATE_FILE, RESULTS_FILE, METRICS_FILE
+from nn_verification_visualisation.controller.process_manager.result_cache import ResultCache
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool
+from nn_verification_visualisation.utils.singleton import SingletonMeta
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+def _write_job(tmp_path, **changes) -> Path:
+    job = {
+        "networks": [{"path": str(REPO_ROOT / "TestFiles" / "NN3.onnx"), "bounds": str(REPO_ROOT / "TestFiles" / "B1.csv")},
+                     {"path": str(REPO_ROOT / "TestFiles" / "NN3.onnx"), "bounds": [[-1, 1]] * 4,
+                      "neuron_pairs": [[[2, 0], [2, 1]]]}],
+        "algorithms": [str(REPO_ROOT / "algorithms" / "box_ibp_numpy.py"),
+                       str(REPO_ROOT / "algorithms" / "simple_zonotope.py")],
+        "neuron_pairs": [[[1, 0], [2, 1]], [[2, 0], [2, 2]]],
+        "num_directions": 8,
+    }
+    job.update(changes)
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps(job))
+    return path
+
+
+@pytest.fixture
+def batch_pool(tmp_path):
+    pool = WorkerPool.dedicated(size=1, target=run_job, batch_target=run_job_batch,
+                                result_cache=ResultCache(str(tmp_path / "cache")))
+    yield pool
+    pool.shutdown()
+
+
+def test_job_file_describes_a_comparison_matrix(tmp_path):
+    job_res = load_job_file(str(_write_job(tmp_path)))
+
+    assert job_res.is_success, job_res.error
+    job = job_res.data
+    assert [network.neuron_pairs for network in job.networks] == [[[(1, 0), (2, 1)], [(2, 0), (2, 2)]],
+                                                                  [[(2, 0), (2, 1)]]]
+    assert job.networks[0].bounds.shape == (4, 2)
+    assert [algorithm.name for algorithm in job.algorithms] == ["Box IBP (NumPy)", "Simple Zonotope"]
+    assert job.computations().__len__() == 6 and job.options == {}
+
+
+def test_invalid_job_files_fail(tmp_path):
+    assert isinstance(load_job_file(str(_write_job(tmp_path, algorithms=[]))).error, ValueError)
+    assert isinstance(load_job_file(str(_write_job(tmp_path, direction_mode="random"))).error, ValueError)
+    assert isinstance(load_job_file(str(_write_job(tmp_path, neuron_pairs=[]))).error, ValueError)
+    assert not load_job_file(str(tmp_path / "missing.json")).is_success
+
+
+def test_yaml_job_files_and_relative_paths(tmp_path):
+    yaml = pytest.importorskip("yaml")
+    (tmp_path / "bounds.csv").write_text((REPO_ROOT / "TestFiles" / "B1.csv").read_text())
+    path = tmp_path / "job.yaml"
+    path.write_text(yaml.safe_dump({
+        "networks": [{"path": str(REPO_ROOT / "TestFiles" / "NN3.onnx"), "bounds": "bounds.csv"}],
+        "algorithms": [{"path": str(REPO_ROOT / "algorithms" / "box_ibp_numpy.py")}],
+        "neuron_pairs": [[[1, 0], [2, 1]]],
+        "direction_mode": "adaptive",
+    }))
+
+    job = load_job_file(str(path)).data
+
+    assert job.networks[0].bounds.tolist()[2] == [0.0, 1.0]
+    assert job.options["direction_mode"] == "adaptive"
+
+
+def test_batch_output_is_a_save_state(tmp_path, batch_pool):
+    from nn_verification_visualisation.model.data_loader.save_state_loader import SaveStateLoader
+
+    job = load_job_file(str(_write_job(tmp_path))).data
+    progress = []
+
+    outcomes = run_batch(job, lambda outcome, finished: progress.append(finished), pool=batch_pool)
+
+    assert batch_pool._running  # a given pool is left running for its owner
+    assert progress == list(range(1, 7))
+    assert all(outcome.result.is_success for outcome in outcomes)
+    assert all(outcome.polygon.__len__() >= 3 for outcome in outcomes)
+    assert all({"algorithm", "polygon", "handoff"} <= set(outcome.metrics.seconds) for outcome in outcomes)
+
+    written = write_batch_output(job, outcomes, str(tmp_path / "out"))
+    assert written.is_success, written.error
+    results = json.loads((tmp_path / "out" / RESULTS_FILE).read_text())
+    assert [pair["status"] for pair in results["pairs"]] == ["done"] * 6
+    assert np.asarray(results["pairs"][0]["bounds"]).shape == (8, 2)
+    assert (tmp_path / "out" / METRICS_FILE).read_text().count("\n") == 6
+
+    loaded = SaveStateLoader().load_save_state(str(tmp_path / "out" / SAVE_STATE_FILE))
+    assert loaded.is_success, loaded.error
+    diagrams = loaded.data.diagrams
+    assert [diagram.plot_generation_configs.__len__() for diagram in diagrams] == [4, 2]
+    assert diagrams[0].plots == [[0, 1], [2, 3]]
+    assert diagrams[0].polygons[0] == [tuple(vertex) for vertex in outcomes[0].polygon]
+
+
+def test_batch_runs_on_a_dedicated_pool(tmp_path, monkeypatch):
+    SingletonMeta._instances.pop(WorkerPool, None)
+    shared = WorkerPool(size=3, target=run_job, result_cache=ResultCache(str(tmp_path / "shared")))
+    created = []
+    dedicated = WorkerPool.dedicated
+    monkeypatch.setattr(WorkerPool, "dedicated", staticmethod(
+        lambda *args, **kwargs: created.append(dedicated(*args, **kwargs)) or created[-1]))
+    job = load_job_file(str(_write_job(tmp_path))).data
+    job.workers = 1
+
+    try:
+        outcomes = run_batch(job, use_cache=False)
+        assert WorkerPool() is shared
+    finally:
+        SingletonMeta._instances.pop(WorkerPool, None)
+
+    assert all(outcome.result.is_success for outcome in outcomes)
+    # the pool of the batch has its size and job functions, even though a shared pool exists
+    assert created.__len__() == 1 and created[0] is not shared
+    assert created[0].size == 1 and created[0].batch_target is run_job_batch and not created[0]._running
+    assert shared.size == 3 and shared.batch_target is None
+
+
+def test_batch_mode_does_not_import_pyside():
+    code = "import sys, nn_verification_visualisation.main; print('PySide6' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+
+
+def test_batch_command_reports_invalid_job_files(tmp_path, capsys):
+    from nn_verification_visualisation.main import main
+
+    assert main(["batch", str(_write_job(tmp_path, networks=[]))]) == 2
+    assert "contains no networks" in capsys.readouterr().err
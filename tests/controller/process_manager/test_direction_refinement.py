@@ -0,0 +1,30 @@
+import numpy as np
+
+from nn_verification_visualisation.controller.process_manager.direction_refinement import angle_directions, \
+    initial_angles, refinement_angles
+
+
+def _support(points: np.ndarray, angles: list[float]) -> np.ndarray:
+    projections = np.asarray(angle_directions(angles)) @ points.T
+    return np.column_stack([projections.min(axis=1), projections.max(axis=1)])
+
+
+def test_box_needs_no_further_directions():
+    box = np.array([[0.0, 0.0], [2.0, 0.0], [2.0, 1.0], [0.0, 1.0]])
+    angles = initial_angles(64)
+
+    assert angles.__len__() == 8
+    assert refinement_angles(angles, _support(box, angles), 1e-3, 56) == []
+
+
+def test_curved_shape_is_refined_within_the_limit():
+    t = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+    circle = np.column_stack([np.cos(t), 0.5 * np.sin(t)])
+    angles = initial_angles(64)
+
+    new_angles = refinement_angles(angles, _support(circle, angles), 1e-4, 5)
+
+    assert new_angles.__len__() == 5
+    assert all(0 <= angle < np.pi for angle in new_angles)
+    assert not set(new_angles) & set(angles)
+    assert refinement_angles(angles, _support(circle, angles), 1e-4, 0) == []
@@ -0,0 +1,54 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from nn_verification_visualisation.controller.process_manager import job_fingerprint as job_fingerprint_module
+from nn_verification_visualisation.controller.process_manager.job_fingerprint import job_fingerprint, file_hash
+from nn_verification_visualisation.model.data import network_ir
+
+
+def _fingerprint(algorithm_path, **changes):
+    arguments = dict(model_key="model", input_bounds=np.zeros((2, 2)), algorithm_path=algorithm_path,
+                     selected_neurons=[(0, 0), (1, 1)], num_directions=8, output_layer_mode="bridge")
+    arguments.update(changes)
+    return job_fingerprint(**arguments)
+
+
+def test_fingerprint_depends_on_every_input(tmp_path: Path):
+    algorithm = tmp_path / "algorithm.py"
+    algorithm.write_text("a = 1")
+    reference = _fingerprint(str(algorithm))
+
+    assert _fingerprint(str(algorithm), input_bounds=np.zeros((2, 2), dtype=np.float32)) == reference
+    assert _fingerprint(str(algorithm), model_key="other") != reference
+    assert _fingerprint(str(algorithm), input_bounds=np.ones((2, 2))) != reference
+    assert _fingerprint(str(algorithm), selected_neurons=[(1, 1), (0, 0)]) != reference
+    assert _fingerprint(str(algorithm), num_directions=9) != reference
+    assert _fingerprint(str(algorithm), output_layer_mode="tap") != reference
+    assert _fingerprint(str(algorithm), options={}) == reference
+    assert _fingerprint(str(algorithm), options={"direction_mode": "adaptive"}) != reference
+
+    algorithm.write_text("a = 22")
+    assert _fingerprint(str(algorithm)) != reference
+
+
+def test_fingerprint_depends_on_the_shared_algorithm_modules(tmp_path: Path, monkeypatch):
+    algorithm = tmp_path / "algorithm.py"
+    algorithm.write_text("a = 1")
+    reference = _fingerprint(str(algorithm))
+
+    compiler = tmp_path / "network_compiler.py"
+    compiler.write_text("fixed = True")
+    monkeypatch.setattr(job_fingerprint_module, "ALGORITHM_SUPPORT_MODULES",
+                        (SimpleNamespace(__file__=str(compiler)), network_ir))
+    assert _fingerprint(str(algorithm)) != reference
+
+
+def test_file_hash_follows_changes(tmp_path: Path):
+    path = tmp_path / "file.py"
+    path.write_text("x")
+    first = file_hash(str(path))
+    assert file_hash(str(path)) == first
+    path.write_text("yy")
+    assert file_hash(str(path)) != first
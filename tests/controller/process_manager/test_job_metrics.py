@@ -0,0 +1,49 @@
+import json
+import time
+
+import numpy as np
+
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics, measure, \
+    append_metrics_log, peak_rss, reset_peak_rss
+
+
+def test_phases_add_up_and_keep_their_peak():
+    metrics = JobMetrics()
+
+    metrics.record("algorithm", 1.0, 100)
+    metrics.record("algorithm", 0.5, 50)
+    metrics.record("modify", 0.25, None)
+
+    assert metrics.seconds == {"algorithm": 1.5, "modify": 0.25}
+    assert metrics.peak_rss == {"algorithm": 100, "modify": None}
+    assert metrics.total_seconds() == 1.75
+    assert metrics.summary() == "modify: 0.250 s\nalgorithm: 1.500 s, peak 0 MiB"
+
+
+def test_measure_records_time_and_peak_memory():
+    metrics = JobMetrics()
+
+    with measure(metrics, "algorithm"):
+        data = np.ones(64 * 1024 ** 2 // 8)
+        time.sleep(0.01)
+    with measure(None, "algorithm"):
+        pass
+
+    assert metrics.seconds["algorithm"] >= 0.01
+    if peak_rss() is not None:
+        assert metrics.peak_rss["algorithm"] >= data.nbytes
+    del data
+    reset_peak_rss()
+
+
+def test_metrics_are_appended_as_json_lines(tmp_path):
+    path = tmp_path / "logs" / "metrics.jsonl"
+    metrics = JobMetrics({"algorithm": 1.0}, {"algorithm": 1024}, batch_size=3)
+
+    assert append_metrics_log(str(path), metrics, algorithm="IBP")
+    assert append_metrics_log(str(path), metrics.copy(), algorithm="Zonotope")
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["algorithm"] for record in records] == ["IBP", "Zonotope"]
+    assert records[0]["seconds"] == {"algorithm": 1.0} and records[0]["batch_size"] == 3
+    assert "version" in records[0] and "time" in records[0]
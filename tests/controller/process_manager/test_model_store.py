@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import onnx
+
+from nn_verification_visualisation.controller.process_manager.model_store import ModelStore
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+def test_models_are_published_once_per_content(tmp_path):
+    store = ModelStore(str(tmp_path))
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    same_content = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    other = onnx.load(REPO_ROOT / "TestFiles" / "NN2.onnx")
+
+    key, path = store.publish(model)
+    assert store.publish(model) == (key, path)
+    assert store.publish(same_content) == (key, path)
+    assert store.publish(other)[0] != key
+    assert len(list(tmp_path.glob("*/*.onnx"))) == 2
+
+    assert ModelStore.attach(path) == model
+
+    store.clear()
+    assert not Path(path).exists()
+    assert store.publish(model) != (key, path)  # published again into a fresh directory
+    store.clear()
+
+
+def test_removed_models_are_forgotten(tmp_path):
+    store = ModelStore(str(tmp_path))
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    kept = onnx.load(REPO_ROOT / "TestFiles" / "NN2.onnx")
+    store.publish(model)
+    store.publish(kept)
+    assert len(store._keys) == 2
+
+    del model
+    store.publish(kept)
+    assert [entry[0] for entry in store._keys.values()] == [kept]
+    store.clear()
+
+
+def test_published_models_are_removed_at_exit(tmp_path):
+    import subprocess
+    import sys
+
+    script = ("import onnx, sys\n"
+              "from nn_verification_visualisation.controller.process_manager.model_store import ModelStore\n"
+              "store = ModelStore(sys.argv[1])\n"
+              f"print(store.publish(onnx.load({str(REPO_ROOT / 'TestFiles' / 'NN3.onnx')!r}))[1])\n")
+    path = subprocess.run([sys.executable, "-c", script, str(tmp_path)], capture_output=True, text=True,
+                          check=True).stdout.strip()
+    assert path.startswith(str(tmp_path)) and not Path(path).exists()
+    assert list(tmp_path.iterdir()) == []
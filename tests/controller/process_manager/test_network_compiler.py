@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from onnx import helper, numpy_helper, TensorProto
+
+from nn_verification_visualisation.controller.process_manager.network_compiler import compile_network
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
+
+
+def _model(nodes, initializers, output="y"):
+    graph = helper.make_graph(nodes, "g", [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 3])],
+                              [helper.make_tensor_value_info(output, TensorProto.FLOAT, [1, 2])],
+                              [numpy_helper.from_array(np.asarray(value, dtype=np.float32), name)
+                               for name, value in initializers.items()])
+    return helper.make_model(graph)
+
+
+def test_constant_operands_are_folded_into_the_gemm():
+    weight = np.arange(6, dtype=np.float32).reshape(3, 2)
+    model = _model([helper.make_node("Gemm", ["x", "w", "b"], ["h"]),
+                    helper.make_node("Mul", ["h", "s"], ["m"]),
+                    helper.make_node("Relu", ["m"], ["r"]),
+                    helper.make_node("Flatten", ["r"], ["f"]),
+                    helper.make_node("Add", ["f", "r"], ["y"])],
+                   {"w": weight, "b": [1.0, -1.0], "s": [2.0, 3.0]})
+
+    steps = compile_network(NetworkIR.from_model(model), 3)
+
+    assert [step[0] for step in steps] == ["Gemm", "Relu", "Reshape", "Sum"]
+    np.testing.assert_allclose(steps[0][3][0], weight * [2.0, 3.0])
+    np.testing.assert_allclose(steps[0][3][1], [2.0, -3.0])
+    assert steps[0][2] == "m"
+    # m is only read by the ReLU, so the ReLU may overwrite it
+    assert steps[1][3] == (True,)
+
+
+def test_unsupported_operators_are_reported():
+    model = _model([helper.make_node("Sigmoid", ["x"], ["y"])], {})
+
+    with pytest.raises(ValueError, match="Unsupported ONNX operator 'Sigmoid'"):
+        compile_network(NetworkIR.from_model(model), 3)
@@ -95,3 +95,196 @@ def test_network_modifier():
     assert(modified_test_model.graph.initializer[5].dims[0] == 32)
 
 
+
+
+def test_bridge_neurons_are_built_from_arrays():
+    rng = np.random.default_rng(0)
+    w1 = rng.standard_normal((3, 5)).astype(np.float32)
+    b1 = rng.standard_normal(5).astype(np.float32)
+    w2 = rng.standard_normal((5, 2)).astype(np.float32)
+    b2 = rng.standard_normal(2).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gemm", ["input", "W1", "B1"], ["fc1_out"]),
+         helper.make_node("Relu", ["fc1_out"], ["relu_out"]),
+         helper.make_node("Gemm", ["relu_out", "W2", "B2"], ["output"])],
+        "test_graph",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 3])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 2])],
+        [onnx.numpy_helper.from_array(w1.astype(np.float64), "W1"), onnx.numpy_helper.from_array(b1, "B1"),
+         onnx.numpy_helper.from_array(w2, "W2"), onnx.numpy_helper.from_array(b2, "B2")],
+    )
+    model = helper.make_model(graph, producer_name="test_model")
+    directions = AlgorithmExecutor().calculate_directions(8)
+
+    modified = NetworkModifier().custom_output_layer(model, [(1, 3), (0, 2)], directions)
+    arrays = [onnx.numpy_helper.to_array(initializer) for initializer in modified.graph.initializer]
+
+    assert all(initializer.data_type == TensorProto.FLOAT for initializer in modified.graph.initializer)
+    assert all(len(initializer.float_data) == 0 for initializer in modified.graph.initializer)
+    np.testing.assert_allclose(arrays[0][:, :5], w1, rtol=1e-6)
+    np.testing.assert_allclose(arrays[0][:, 5], w1[:, 3], rtol=1e-6)  # bridge copies the selected neuron
+    np.testing.assert_array_equal(arrays[0][:, 6], [0, 0, 1])  # bridge of the input neuron
+    np.testing.assert_allclose(arrays[1], np.append(b1, [500, 500]))
+    np.testing.assert_allclose(arrays[2][:5, :2], w2)
+    np.testing.assert_array_equal(arrays[2][5:, 2:], np.eye(2))
+    np.testing.assert_allclose(arrays[3], np.append(b2, [-500, -500]))
+    np.testing.assert_allclose(arrays[4][2:], np.asarray(directions, dtype=np.float32).T)
+    assert not np.any(arrays[4][:2])
+    assert model.graph.initializer[0].data_type == TensorProto.DOUBLE  # the original model is not changed
+
+
+def test_tapped_output_layer_projects_the_selected_tensors():
+    import onnxruntime as ort
+
+    rng = np.random.default_rng(1)
+    w1 = rng.standard_normal((3, 5)).astype(np.float32)
+    b1 = rng.standard_normal(5).astype(np.float32)
+    w2 = rng.standard_normal((5, 2)).astype(np.float32)
+    b2 = rng.standard_normal(2).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gemm", ["input", "W1", "B1"], ["fc1_out"]),
+         helper.make_node("Relu", ["fc1_out"], ["relu_out"]),
+         helper.make_node("Gemm", ["relu_out", "W2", "B2"], ["output"])],
+        "test_graph",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 3])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 2])],
+        [onnx.numpy_helper.from_array(w1, "W1"), onnx.numpy_helper.from_array(b1, "B1"),
+         onnx.numpy_helper.from_array(w2, "W2"), onnx.numpy_helper.from_array(b2, "B2")],
+    )
+    model = helper.make_model(graph, producer_name="test_model", opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    directions = AlgorithmExecutor().calculate_directions(8)
+
+    tapped = NetworkModifier().tapped_output_layer(model, [(1, 3), (0, 2)], directions)
+    onnx.checker.check_model(tapped)
+
+    original = {initializer.name: initializer for initializer in model.graph.initializer}
+    for initializer in tapped.graph.initializer:
+        if initializer.name in original:
+            assert initializer == original[initializer.name]  # the network weights are not rewritten
+    # the second layer is behind the deepest tapped tensor and is cut off
+    assert [initializer.name for initializer in tapped.graph.initializer][:2] == ["W1", "B1"]
+    assert len(tapped.graph.initializer) == 2 + 4
+    assert [node.op_type for node in tapped.graph.node] == ["Gemm", "Gather", "Gather", "Concat", "Gemm"]
+    assert onnx.numpy_helper.to_array(tapped.graph.initializer[-2]).shape == (2, 8)
+    assert len(model.graph.node) == 3 and model.graph.output[0].name == "output"
+
+    x = rng.standard_normal((1, 3)).astype(np.float32)
+    projected = ort.InferenceSession(tapped.SerializeToString()).run(None, {"input": x})[0].reshape(-1)
+    hidden = (x @ w1 + b1)[0, 3]
+    expected = [a * hidden + b * x[0, 2] for a, b in directions]
+    np.testing.assert_allclose(projected, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_bridge_output_of_a_cut_network_matches_the_whole_network(monkeypatch):
+    import onnxruntime as ort
+
+    model = onnx.load("TestFiles/NN1.onnx")
+    model.ir_version = 8
+    directions = AlgorithmExecutor().calculate_directions(6)
+    x = np.random.default_rng(0).standard_normal((1, 4)).astype(np.float32)
+
+    def project(modified):
+        return ort.InferenceSession(modified.SerializeToString()).run(None, {model.graph.input[0].name: x})[0]
+
+    modified = NetworkModifier().custom_output_layer(model, [(2, 7), (1, 3)], directions)
+    # layers 4 and 5 are not part of the bridge model anymore, layer 3 ends the bridges
+    assert modified.graph.node.__len__() == 5 + 1 and modified.graph.initializer.__len__() == 6 + 2
+    assert NetworkModifier.bridge_truncation_index(NetworkModifier(), model, []) == model.graph.node.__len__()
+
+    monkeypatch.setattr(NetworkModifier, "bridge_truncation_index",
+                        staticmethod(lambda self, static_model, neurons: static_model.graph.node.__len__()))
+    whole = NetworkModifier().custom_output_layer(model, [(2, 7), (1, 3)], directions)
+    assert whole.graph.node.__len__() == model.graph.node.__len__() + 1
+    np.testing.assert_allclose(project(modified), project(whole), rtol=1e-4, atol=1e-3)
+
+
+def test_bridge_output_of_the_last_hidden_layer_is_clipped_like_the_tapped_tensor():
+    import onnxruntime as ort
+
+    model = onnx.load("TestFiles/NN1.onnx")
+    model.ir_version = 8
+    neurons = [(4, 0), (4, 1)]
+    directions = [(1.0, 0.0), (0.0, 1.0)]
+    x = np.random.default_rng(0).uniform(-1, 1, (32, 4)).astype(np.float32)
+
+    def project(modified):
+        session = ort.InferenceSession(modified.SerializeToString())
+        return np.concatenate([session.run(None, {model.graph.input[0].name: row[None]})[0] for row in x])
+
+    tapped = project(NetworkModifier().tapped_output_layer(model, neurons, directions))
+    bridged = project(NetworkModifier().custom_output_layer(model, neurons, directions))
+
+    # the bridges copy the weights of the neurons without their bias and go through relu(v + 500) - 500
+    bias = onnx.numpy_helper.to_array(model.graph.initializer[7])[:2]
+    assert np.any(tapped - bias < -500)
+    np.testing.assert_allclose(bridged, np.maximum(tapped - bias, -500), rtol=1e-4, atol=1e-2)
+
+
+def test_tap_truncation_index_cuts_behind_the_deepest_tensor():
+    model = onnx.load("TestFiles/NN3.onnx")
+    modifier = NetworkModifier()
+
+    assert modifier.tap_truncation_index(modifier, model, [(0, 1), (0, 2)]) == 0
+    assert modifier.tap_truncation_index(modifier, model, [(1, 0), (0, 2)]) == 1
+    assert modifier.tap_truncation_index(modifier, model, [(2, 0), (1, 2)]) == 3
+    assert modifier.tap_truncation_index(modifier, model, [(3, 0), (1, 2)]) == 5
+
+    truncated = modifier.truncated_copy(modifier, model, 3)
+    assert [initializer.name for initializer in truncated.graph.initializer] == \
+           [initializer.name for initializer in model.graph.initializer[:4]]
+    assert truncated.opset_import == model.opset_import and truncated.graph.input == model.graph.input
+
+
+def test_layer_output_names_follow_bias_adds():
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["input", "W1"], ["mm1"]),
+         helper.make_node("Add", ["mm1", "B1"], ["h1"]),
+         helper.make_node("Relu", ["h1"], ["r1"]),
+         helper.make_node("Gemm", ["r1", "W2", "B2"], ["output"])],
+        "test_graph",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 2])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 2])],
+        [onnx.numpy_helper.from_array(np.ones((2, 2), dtype=np.float32), name) for name in ("W1", "W2")] +
+        [onnx.numpy_helper.from_array(np.ones(2, dtype=np.float32), name) for name in ("B1", "B2")],
+    )
+    model = helper.make_model(graph, producer_name="test_model")
+
+    assert NetworkModifier.layer_output_names(NetworkModifier(), model) == ["input", "h1", "output"]
+
+
+def test_tapped_network_restores_the_model():
+    model = onnx.load("TestFiles/NN3.onnx")
+    before = model.SerializeToString()
+    directions = AlgorithmExecutor().calculate_directions(4)
+
+    with NetworkModifier().tapped_network(model, [(1, 0), (2, 1)], directions) as tapped:
+        assert tapped is model
+        assert [node.op_type for node in tapped.graph.node][:3] == ["Gemm", "Relu", "Gemm"]
+        assert tapped.graph.node.__len__() == 3 + 4
+        assert tapped.graph.output[0].name == "tap_output"
+        assert tapped.graph.output[0].type.tensor_type.shape.dim[-1].dim_value == 4
+
+    assert model.SerializeToString() == before
+
+
+def test_batched_selection_places_every_pair_in_its_own_rows():
+    directions = [(1.0, 0.0), (0.5, 2.0)]
+
+    neurons, batched = NetworkModifier.batched_selection([[(1, 0), (2, 1)], [(2, 1), (0, 3)], [(0, 3), (0, 3)]],
+                                                         directions)
+
+    assert neurons == [(1, 0), (2, 1), (0, 3)]
+    assert np.allclose(batched, [
+        [1.0, 0.0, 0.0], [0.5, 2.0, 0.0],
+        [0.0, 1.0, 0.0], [0.0, 0.5, 2.0],
+        [0.0, 0.0, 1.0], [0.0, 0.0, 2.5],
+    ])
+
+
+def test_batched_selection_per_pair_allows_different_directions():
+    neurons, batched = NetworkModifier.batched_selection_per_pair([[(0, 0), (0, 1)], [(0, 1), (1, 2)]],
+                                                                  [[(1.0, 0.0)], [(0.0, 1.0), (1.0, 1.0)]])
+
+    assert neurons == [(0, 0), (0, 1), (1, 2)]
+    assert np.allclose(batched, [[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 1.0, 1.0]])
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from nn_verification_visualisation.controller.process_manager.polygon import polygon_from_bounds, \
+    intersect_half_planes, display_polygon, result_polygon
+
+
+def clipped_polygon(bounds, directions):
+    """Sutherland-Hodgman clipping of a large square, the former implementation."""
+    margin = max(5.0, max(abs(value) for bound in bounds for value in bound) * 2.0 + 1.0)
+    polygon = [(-margin, -margin), (margin, -margin), (margin, margin), (-margin, margin)]
+    for (low, high), (a, b) in zip(bounds, directions):
+        for na, nb, c in ((a, b, high), (-a, -b, -low)):
+            clipped = []
+            for index, current in enumerate(polygon):
+                previous = polygon[index - 1]
+                current_in = na * current[0] + nb * current[1] <= c + 1e-9
+                previous_in = na * previous[0] + nb * previous[1] <= c + 1e-9
+                if current_in != previous_in:
+                    dx, dy = current[0] - previous[0], current[1] - previous[1]
+                    t = (c - na * previous[0] - nb * previous[1]) / (na * dx + nb * dy)
+                    clipped.append((previous[0] + t * dx, previous[1] + t * dy))
+                if current_in:
+                    clipped.append(current)
+            polygon = clipped
+            if not polygon:
+                return []
+    return polygon
+
+
+def area(polygon):
+    points = np.asarray(polygon)
+    if points.shape[0] < 3:
+        return 0.0
+    return 0.5 * (points[:, 0] @ np.roll(points[:, 1], -1) - points[:, 1] @ np.roll(points[:, 0], -1))
+
+
+def test_square_in_counterclockwise_order():
+    polygon = polygon_from_bounds([(-1.0, 1.0), (-2.0, 2.0)], [(1.0, 0.0), (0.0, 1.0)])
+    assert sorted(polygon) == [(-1.0, -2.0), (-1.0, 2.0), (1.0, -2.0), (1.0, 2.0)]
+    assert area(polygon) == pytest.approx(8.0)
+
+
+def test_matches_clipping_on_random_bounds():
+    rng = np.random.default_rng(0)
+    for trial in range(300):
+        count = int(rng.integers(1, 40))
+        angles = np.pi * np.arange(count) / count if trial % 2 else rng.uniform(0, np.pi, count)
+        directions = np.column_stack([np.sin(angles) + 1e-9, np.cos(angles) + 1e-9]) * rng.uniform(0.5, 2, (count, 1))
+        points = rng.normal(size=(20, 2)) * rng.uniform(0.1, 10) + rng.normal(size=2) * 3
+        projections = points @ directions.T
+        slack = rng.exponential(1.0, (2, count)) * (rng.random((2, count)) < 0.5)
+        bounds = np.column_stack([projections.min(axis=0) - slack[0], projections.max(axis=0) + slack[1]])
+        if trial % 10 == 0:
+            bounds[0] = bounds[0, ::-1] + [1.0, -1.0]  # contradicting bounds
+
+        expected = clipped_polygon(bounds.tolist(), directions.tolist())
+        polygon = polygon_from_bounds(bounds, directions)
+        assert (polygon == []) == (expected == [])
+        assert area(polygon) == pytest.approx(area(expected), rel=1e-6, abs=1e-9)
+        if polygon:
+            projections = np.asarray(polygon) @ directions.T
+            assert np.all(projections <= bounds[:, 1] + 1e-7) and np.all(projections >= bounds[:, 0] - 1e-7)
+
+
+def test_directions_touching_the_same_vertices():
+    # tight bounds of a triangle, thousands of directions touch the same three points
+    triangle = np.array([[0.0, 0.0], [3.0, 0.0], [0.0, 2.0]])
+    angles = np.pi * np.arange(4000) / 4000
+    directions = np.column_stack([np.sin(angles), np.cos(angles)])
+    projections = triangle @ directions.T
+    polygon = polygon_from_bounds(np.column_stack([projections.min(axis=0), projections.max(axis=0)]), directions)
+    assert area(polygon) == pytest.approx(3.0, rel=1e-3)
+    assert polygon.__len__() < 12
+
+
+def test_infinite_and_repeated_bounds():
+    polygon = polygon_from_bounds([(-1.0, np.inf), (-1.0, 1.0), (0.0, 0.5)], [(1.0, 0.0), (0.0, 1.0), (1.0, 0.0)])
+    assert sorted(polygon) == [(0.0, -1.0), (0.0, 1.0), (0.5, -1.0), (0.5, 1.0)]
+
+
+def test_contradicting_bounds():
+    assert polygon_from_bounds([(10.0, -10.0)], [(1.0, 0.0)]) == []
+    assert polygon_from_bounds([(0.0, 1.0), (0.0, 1.0), (2.5, 3.0)],
+                               [(1.0, 0.0), (0.0, 1.0), (1.0, 1.0)]) == []
+
+
+def test_half_planes_must_surround_the_origin():
+    with pytest.raises(ValueError):
+        intersect_half_planes(np.array([[1.0, 0.0], [0.0, 1.0]]), np.array([1.0, 1.0]))
+
+
+def test_display_polygon_is_compact():
+    # the second direction only touches the corner, so the clipped corner is too small for float32
+    directions = [(1.0, 0.0), (0.0, 1.0), (1.0, 1.0)]
+    polygon = display_polygon([(-1.0, 1.0), (-1.0, 1.0), (-2.0, 2.0 - 1e-9)], directions)
+    assert polygon.dtype == np.float32 and polygon.shape == (4, 2)
+    assert display_polygon([(10.0, -10.0)], [(1.0, 0.0)]).shape == (0, 2)
+
+
+def test_result_polygon_of_old_results():
+    bounds, directions = [(-1.0, 1.0), (-2.0, 2.0)], [(1.0, 0.0), (0.0, 1.0)]
+    expected = sorted(polygon_from_bounds(bounds, directions))
+    assert sorted(result_polygon((bounds, directions))) == expected
+    assert sorted(result_polygon((bounds, directions, display_polygon(bounds, directions)))) == expected
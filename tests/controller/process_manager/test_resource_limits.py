@@ -0,0 +1,57 @@
+import pickle
+import time
+
+import numpy as np
+import pytest
+
+from nn_verification_visualisation.controller.process_manager import resource_limits
+from nn_verification_visualisation.controller.process_manager.resource_limits import job_limits, \
+    ResourceLimitExceeded, TIME_LIMIT, MEMORY_LIMIT
+
+
+def test_exceeding_the_time_limit_is_reported():
+    exceeded = []
+
+    with job_limits(0.1, None, exceeded.append):
+        time.sleep(0.5)
+
+    assert [error.kind for error in exceeded] == [TIME_LIMIT]
+    assert "time limit of 0.1 s" in str(exceeded[0])
+
+
+def test_jobs_within_their_limits_are_not_reported():
+    exceeded = []
+
+    with job_limits(5, 2 * 1024 ** 3, exceeded.append):
+        np.ones(1000)
+
+    assert exceeded == []
+
+
+@pytest.mark.skipif(resource_limits.resource is None or resource_limits._memory_usage() is None,
+                    reason="address space limits need Linux")
+def test_large_allocations_fail_under_the_memory_limit():
+    limit_before = resource_limits.resource.getrlimit(resource_limits.resource.RLIMIT_AS)
+
+    with pytest.raises(MemoryError):
+        with job_limits(None, resource_limits._memory_usage()[1] + 64 * 1024 ** 2, lambda error: None,
+                        limit_address_space=True):
+            np.ones(2 * 1024 ** 3 // 8)
+
+    assert resource_limits.resource.getrlimit(resource_limits.resource.RLIMIT_AS) == limit_before
+
+
+@pytest.mark.skipif(resource_limits.resource is None or resource_limits._memory_usage() is None,
+                    reason="address space limits need Linux")
+def test_the_address_space_is_only_capped_on_request():
+    limit_before = resource_limits.resource.getrlimit(resource_limits.resource.RLIMIT_AS)
+
+    with job_limits(None, resource_limits._memory_usage()[1] + 64 * 1024 ** 2, lambda error: None):
+        assert resource_limits.resource.getrlimit(resource_limits.resource.RLIMIT_AS) == limit_before
+
+
+def test_limit_errors_survive_pickling():
+    error = pickle.loads(pickle.dumps(ResourceLimitExceeded(MEMORY_LIMIT, 512 * 1024 ** 2)))
+
+    assert error.kind == MEMORY_LIMIT and error.limit == 512 * 1024 ** 2
+    assert str(error) == "The algorithm exceeded its memory limit of 512 MiB"
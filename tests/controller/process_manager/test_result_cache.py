@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import onnx
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+from nn_verification_visualisation.controller.process_manager.polygon import display_polygon
+from nn_verification_visualisation.controller.process_manager.result_cache import ResultCache
+
+
+def test_results_are_read_back(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    data = ([(-1.5, 2.0), (0.1, 0.30000000000000004)], [(0.5, 1e-09)])
+
+    assert cache.get("key") is None
+    assert cache.put("key", data)
+    assert ResultCache(str(tmp_path)).get("key") == data
+
+
+def test_arrays_are_stored_as_lists(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.put("key", ([(0.0, 1.0)], [(1.0, 0.0)], np.array([[0.5, -1.0]], dtype=np.float32)))
+    assert cache.get("key") == ([(0.0, 1.0)], [(1.0, 0.0)], [[0.5, -1.0]])
+
+
+def test_executor_results_are_stored(tmp_path):
+    model = onnx.load("TestFiles/NN3.onnx")
+    bounds = np.column_stack([np.full(4, -1.0), np.full(4, 1.0)])
+    result = AlgorithmExecutor().execute_algorithm(model, bounds, "algorithms/box_ibp_numpy.py", [(1, 0), (2, 1)], 8)
+    assert result.is_success, result.error
+    output_bounds, directions = result.data
+    data = (output_bounds, directions, display_polygon(output_bounds, directions))  # like batch_runner.run_job
+    assert isinstance(directions[0][0], np.floating)
+
+    cache = ResultCache(str(tmp_path))
+    assert cache.put("key", data)
+    cached_bounds, cached_directions, cached_polygon = ResultCache(str(tmp_path)).get("key")
+    assert np.array_equal(cached_bounds, output_bounds)
+    assert cached_directions == [(float(a), float(b)) for a, b in directions]
+    assert np.array_equal(np.asarray(cached_polygon, dtype=np.float32), data[2])
+
+
+def test_unreadable_data_is_not_stored(tmp_path):
+    cache = ResultCache(str(tmp_path))
+
+    assert not cache.put("nan", [(float("nan"), 1.0)])
+    assert not cache.put("object", object())
+    assert cache.get("nan") is None and cache.get("object") is None
+
+    (tmp_path / "broken.result").write_text("__import__('os')")
+    assert cache.get("broken") is None
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=160)
+    for index, key in enumerate(["a", "b", "c"]):
+        cache.put(key, [float(index)] * 10)
+        os.utime(tmp_path / f"{key}.result", ns=(index * 10 ** 9, index * 10 ** 9))
+    cache.get("a")  # "b" is now the oldest
+
+    cache.put("d", [3.0] * 10)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ["a", "c", "d"])
@@ -0,0 +1,247 @@
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import onnx
+import pytest
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import PartialResult
+from nn_verification_visualisation.controller.process_manager.batch_runner import run_job, run_job_batch
+from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics
+from nn_verification_visualisation.controller.process_manager.resource_limits import ResourceLimitExceeded, \
+    TIME_LIMIT
+from nn_verification_visualisation.controller.process_manager.result_cache import ResultCache
+from nn_verification_visualisation.controller.process_manager.verification_server import VerificationServer, \
+    RemoteWorkerPool, parse_address, encode_result, decode_result, worker_pool_for
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool, JobState
+from nn_verification_visualisation.model.data.algorithm import Algorithm
+from nn_verification_visualisation.utils.result import Success, Failure
+from nn_verification_visualisation.utils.singleton import SingletonMeta
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+NETWORK = REPO_ROOT / "TestFiles" / "NN3.onnx"
+ALGORITHM = Algorithm("Box IBP", str(REPO_ROOT / "algorithms" / "box_ibp_numpy.py"), True)
+
+
+class FakePool:
+    """Records the jobs of the server and finishes them only when the test says so."""
+
+    size = 3
+
+    def __init__(self):
+        self.jobs = {}
+        self.priorities = {}
+        self.cancelled = []
+
+    def start(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+    def submit(self, model, input_bounds, algorithm_path, selected_neurons, num_directions, on_result,
+               output_layer_mode="bridge", priority=0, on_state=None, is_deterministic=False, on_partial=None,
+               **kwargs):
+        job_id = self.jobs.__len__()
+        self.jobs[job_id] = dict(model=model, input_bounds=input_bounds, algorithm_path=algorithm_path,
+                                 selected_neurons=selected_neurons, is_deterministic=is_deterministic,
+                                 on_result=on_result, on_partial=on_partial, **kwargs)
+        if on_state is not None:
+            on_state(JobState.Queued)
+        return job_id
+
+    def prioritize(self, job_ids, priority):
+        for job_id in job_ids:
+            self.priorities[job_id] = priority
+
+    def cancel(self, job_id):
+        self.cancelled.append(job_id)
+        self.jobs[job_id]["on_result"](Failure(Exception("Cancelled by User")))
+        return True
+
+
+class Collector:
+    def __init__(self):
+        self.results = []
+        self.states = []
+        self.partials = []
+        self.done = threading.Event()
+
+    def on_result(self, result):
+        self.results.append(result)
+        self.done.set()
+
+
+@pytest.fixture
+def fake_server():
+    pool = FakePool()
+    server = VerificationServer("127.0.0.1:0", pool, [ALGORITHM])
+    address = server.start()
+    client = RemoteWorkerPool(address, timeout=5)
+    yield pool, server, client
+    client.shutdown()
+    server.shutdown()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def submit(client, collector, algorithm_path=ALGORITHM.path, **kwargs):
+    model = onnx.load(NETWORK)
+    bounds = np.column_stack([np.full(4, -1.0), np.full(4, 1.0)])
+    return client.submit(model, bounds, algorithm_path, [(1, 0), (2, 1)], 8, collector.on_result,
+                         on_state=collector.states.append, on_partial=collector.partials.append, **kwargs)
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:8765")[1] == ("127.0.0.1", 8765)
+    assert parse_address(":0")[1] == ("127.0.0.1", 0)
+    assert parse_address("unix:/tmp/server.sock")[1] == "/tmp/server.sock"
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+def test_results_survive_the_encoding():
+    metrics = JobMetrics({"algorithm": 1.5}, {"algorithm": 1024}, batch_size=2, finished_at=10.0)
+    result = decode_result(encode_result(Success(([(0.0, 1.0)], [(1.0, 0.0)]), metrics)))
+    assert result.data == ([(0.0, 1.0)], [(1.0, 0.0)])
+    assert result.metrics.seconds == {"algorithm": 1.5} and result.metrics.batch_size == 2
+    assert result.metrics.finished_at == 10.0
+
+    limit = decode_result(encode_result(Failure(ResourceLimitExceeded(TIME_LIMIT, 2.0))))
+    assert isinstance(limit.error, ResourceLimitExceeded) and limit.error.limit == 2.0
+    assert str(decode_result(encode_result(Failure(ValueError("broken")))).error) == "broken"
+
+
+def test_jobs_run_on_the_pool_of_the_server(fake_server):
+    pool, server, client = fake_server
+    collector = Collector()
+    job_id = submit(client, collector, priority=4, time_limit=2.0, options={"direction_mode": "adaptive"})
+
+    wait_for(lambda: pool.jobs.__len__() == 1 and collector.states)
+    job = pool.jobs[0]
+    # the server runs its own algorithm of the same file name
+    assert job["algorithm_path"] == ALGORITHM.path and job["is_deterministic"]
+    assert job["selected_neurons"] == [(1, 0), (2, 1)]
+    assert job["time_limit"] == 2.0 and job["options"] == {"direction_mode": "adaptive"}
+    assert np.array_equal(job["input_bounds"], np.column_stack([np.full(4, -1.0), np.full(4, 1.0)]))
+    assert collector.states == [JobState.Queued]
+
+    job["on_partial"](PartialResult([(0.0, 1.0)], [(1.0, 0.0)]))
+    job["on_result"](Success(([(0.0, 1.0), (-1.0, 2.0)], [(1.0, 0.0), (0.0, 1.0)])))
+    assert collector.done.wait(5)
+    assert collector.partials[0].output_bounds == [(0.0, 1.0)]
+    assert collector.results[0].data == ([(0.0, 1.0), (-1.0, 2.0)], [(1.0, 0.0), (0.0, 1.0)])
+    assert not client.cancel(job_id)
+    assert client.size == 3
+
+
+def test_the_model_is_sent_once(fake_server):
+    pool, server, client = fake_server
+    model = onnx.load(NETWORK)
+    bounds = np.column_stack([np.full(4, -1.0), np.full(4, 1.0)])
+    for pair in ([(1, 0), (2, 1)], [(2, 0), (2, 1)]):
+        client.submit(model, bounds, ALGORITHM.path, pair, 8, lambda result: None)
+    wait_for(lambda: pool.jobs.__len__() == 2)
+    session = next(iter(server._sessions))
+    assert session.models.__len__() == 1
+    assert pool.jobs[0]["model"] == pool.jobs[1]["model"] == model
+
+
+def test_cancel_and_prioritize(fake_server):
+    pool, server, client = fake_server
+    collector = Collector()
+    job_id = submit(client, collector)
+    wait_for(lambda: pool.jobs.__len__() == 1)
+    client.prioritize([job_id], 7)
+    wait_for(lambda: pool.priorities == {0: 7})
+
+    assert client.cancel(job_id)
+    # like the local pool, the cancellation is reported before cancel returns
+    assert str(collector.results[0].error) == "Cancelled by User"
+    assert pool.cancelled == [0]
+
+
+def test_unknown_algorithms_fail(fake_server):
+    pool, server, client = fake_server
+    collector = Collector()
+    submit(client, collector, algorithm_path="/somewhere/else/my_own_algorithm.py")
+    assert collector.done.wait(5)
+    assert "not available on the server" in str(collector.results[0].error)
+    assert not pool.jobs
+    assert [algorithm.name for algorithm in client.algorithms()] == ["Box IBP"]
+
+
+def test_disconnecting_cancels_the_jobs_of_the_client(fake_server):
+    pool, server, client = fake_server
+    submit(client, Collector())
+    wait_for(lambda: pool.jobs.__len__() == 1)
+    client.shutdown()
+    wait_for(lambda: pool.cancelled == [0])
+
+
+def test_a_lost_server_fails_the_jobs(fake_server):
+    pool, server, client = fake_server
+    collector = Collector()
+    submit(client, collector)
+    wait_for(lambda: pool.jobs.__len__() == 1)
+    server.shutdown()
+    assert collector.done.wait(5)
+    assert isinstance(collector.results[0].error, ConnectionError)
+
+
+def test_unreachable_servers_fail_the_jobs():
+    server = VerificationServer("127.0.0.1:0", FakePool(), [])
+    address = server.start()
+    server.shutdown()
+    collector = Collector()
+    submit(RemoteWorkerPool(address, timeout=1), collector)
+    assert isinstance(collector.results[0].error, ConnectionError)
+
+
+def test_worker_pool_for_reuses_the_client():
+    assert worker_pool_for("127.0.0.1:1") is worker_pool_for("127.0.0.1:1")
+    assert isinstance(worker_pool_for("127.0.0.1:1"), RemoteWorkerPool)
+
+
+@pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="needs Unix sockets")
+def test_server_computes_like_the_local_pool(tmp_path):
+    SingletonMeta._instances.pop(WorkerPool, None)
+    pool = WorkerPool(size=1, target=run_job, batch_target=run_job_batch,
+                      result_cache=ResultCache(str(tmp_path / "cache")))
+    server = VerificationServer(f"unix:{tmp_path / 'server.sock'}", pool, [ALGORITHM])
+    client = RemoteWorkerPool(server.start(), timeout=30)
+    try:
+        collector = Collector()
+        submit(client, collector)
+        assert collector.done.wait(60)
+        cached = Collector()
+        submit(client, cached)
+        assert cached.done.wait(30)
+    finally:
+        client.shutdown()
+        server.shutdown()
+        pool.shutdown()
+        SingletonMeta._instances.pop(WorkerPool, None)
+
+    result = collector.results[0]
+    assert result.is_success, result.error
+    assert isinstance(result.metrics, JobMetrics) and result.metrics.seconds
+    bounds, directions, polygon = result.data
+    assert bounds.__len__() == directions.__len__() == 8
+    assert all(low <= high for low, high in bounds)
+    assert polygon.dtype == np.float32 and polygon.shape[0] >= 3
+    # deterministic algorithms are answered from the result cache of the server
+    assert cached.results[0].data[:2] == result.data[:2]
+    assert np.array_equal(cached.results[0].data[2], polygon)
+
+
+def test_serve_rejects_invalid_addresses(capsys):
+    from nn_verification_visualisation.main import main
+    assert main(["serve", "--address", "nowhere"]) == 2
+    assert "Could not listen on nowhere" in capsys.readouterr().err
@@ -0,0 +1,280 @@
+import time
+from pathlib import Path
+from queue import Queue
+
+import numpy as np
+import onnx
+import pytest
+
+from nn_verification_visualisation.controller.process_manager.resource_limits import ResourceLimitExceeded, \
+    TIME_LIMIT
+from nn_verification_visualisation.controller.process_manager.result_cache import ResultCache
+from nn_verification_visualisation.controller.process_manager.worker_pool import WorkerPool, CANCELLED_MESSAGE, \
+    JobState
+from nn_verification_visualisation.utils.result import Success
+from nn_verification_visualisation.utils.singleton import SingletonMeta
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+def _echo_target(job_id, queue, model, input_bounds, algorithm_path, selected_neurons, num_directions,
+                 output_layer_mode, neural_network=None):
+    if num_directions < 0:
+        time.sleep(60)
+    elif num_directions >= 100:
+        time.sleep(1)
+    queue.put((job_id, Success((model.graph.node.__len__(), num_directions))))
+
+
+@pytest.fixture
+def pool_factory(tmp_path):
+    pools = []
+
+    def create(**kwargs):
+        SingletonMeta._instances.pop(WorkerPool, None)
+        kwargs.setdefault("result_cache", ResultCache(str(tmp_path / "cache")))
+        pool = WorkerPool(**kwargs)
+        pools.append(pool)
+        return pool
+
+    yield create
+    for pool in pools:
+        pool.shutdown()
+    SingletonMeta._instances.pop(WorkerPool, None)
+
+
+def _submit(pool, model, num_directions, results):
+    return pool.submit(model, np.zeros((2, 2)), "unused.py", [(0, 0), (0, 1)], num_directions,
+                       lambda result: results.put((num_directions, result)))
+
+
+def test_jobs_are_spread_over_the_warm_workers(pool_factory):
+    pool = pool_factory(size=2, target=_echo_target)
+    pool.start()
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    for num_directions in range(6):
+        _submit(pool, model, num_directions, results)
+
+    received = dict(results.get(timeout=60) for _ in range(6))
+    assert sorted(received) == list(range(6))
+    assert all(result.is_success and result.data == (5, n) for n, result in received.items())
+
+
+def test_cancel_terminates_only_the_running_job(pool_factory):
+    pool = pool_factory(size=1, target=_echo_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    slow_job = _submit(pool, model, -1, results)
+    queued_job = _submit(pool, model, 7, results)
+    assert pool.cancel(queued_job)
+    assert results.get(timeout=5)[1].error.args[0] == CANCELLED_MESSAGE
+
+    time.sleep(0.5)
+    assert pool.cancel(slow_job)
+    assert results.get(timeout=5)[1].error.args[0] == CANCELLED_MESSAGE
+    assert not pool.cancel(slow_job)
+
+    _submit(pool, model, 3, results)  # served by the replacement worker
+    num_directions, result = results.get(timeout=60)
+    assert num_directions == 3 and result.is_success
+
+
+def test_default_target_runs_the_algorithm(pool_factory):
+    pool = pool_factory(size=1)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    input_dim = model.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+    bounds = np.column_stack([np.full(input_dim, -1.0), np.full(input_dim, 1.0)])
+    results = Queue()
+
+    pool.submit(model, bounds, str(REPO_ROOT / "algorithms" / "box_ibp_numpy.py"), [(1, 0), (2, 1)], 4,
+                results.put)
+
+    result = results.get(timeout=60)
+    assert result.is_success, result.error
+    output_bounds, directions, polygon = result.data
+    assert len(output_bounds) == 4 and len(directions) == 4
+    assert polygon.dtype == np.float32 and polygon.shape[0] >= 3
+    assert {"dispatch", "modify", "algorithm", "polygon"} <= set(result.metrics.seconds)
+    assert all(seconds >= 0 for seconds in result.metrics.seconds.values())
+
+
+def test_queued_jobs_start_by_priority(pool_factory):
+    pool = pool_factory(size=1, target=_echo_target)
+    pool.start()
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+    states = []
+
+    _submit(pool, model, 100, results)
+    for num_directions, priority in [(1, 0), (2, 0), (3, 5)]:
+        pool.submit(model, np.zeros((2, 2)), "unused.py", [(0, 0), (0, 1)], num_directions,
+                    lambda result, n=num_directions: results.put((n, result)), priority=priority,
+                    on_state=lambda state, n=num_directions: states.append((n, state)))
+
+    order = [results.get(timeout=60)[0] for _ in range(4)]
+    assert order == [100, 3, 1, 2]
+    assert states[:3] == [(1, JobState.Queued), (2, JobState.Queued), (3, JobState.Queued)]
+    assert (3, JobState.Running) in states
+
+
+def test_memory_budget_limits_concurrent_jobs(pool_factory):
+    pool = pool_factory(size=2, target=_echo_target, memory_budget=1)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    first = _submit(pool, model, -1, results)
+    second = _submit(pool, model, 4, results)
+    assert pool.get_state(first) == JobState.Running
+    assert pool.get_state(second) == JobState.Queued
+
+    pool.cancel(first)
+    assert results.get(timeout=5)[0] == -1
+    num_directions, result = results.get(timeout=60)
+    assert num_directions == 4 and result.is_success
+    assert pool.get_state(second) == JobState.Done
+
+
+def _submit_identical(pool, model, results, name, **kwargs):
+    algorithm_path = str(REPO_ROOT / "algorithms" / "box_ibp_numpy.py")
+    return pool.submit(model, np.zeros((2, 2)), algorithm_path, [(0, 0), (0, 1)], 100,
+                       lambda result: results.put((name, result)), **kwargs)
+
+
+def test_identical_jobs_are_computed_once(pool_factory):
+    pool = pool_factory(size=2, target=_echo_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    first = _submit_identical(pool, model, results, "first")
+    second = _submit_identical(pool, model, results, "second")
+    assert pool.get_state(first) == JobState.Running
+    assert pool.get_state(second) == JobState.Running  # joined the running job instead of taking the idle worker
+
+    received = dict(results.get(timeout=60) for _ in range(2))
+    assert received["first"] is received["second"]
+
+
+def test_cancelling_one_identical_job_keeps_the_other(pool_factory):
+    pool = pool_factory(size=1, target=_echo_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    first = _submit_identical(pool, model, results, "first")
+    _submit_identical(pool, model, results, "second")
+    assert pool.cancel(first)
+    assert results.get(timeout=5)[0] == "first"
+
+    name, result = results.get(timeout=60)
+    assert name == "second" and result.is_success
+
+
+def test_deterministic_results_are_reused(pool_factory):
+    pool = pool_factory(size=1, target=_echo_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    _submit_identical(pool, model, results, "first", is_deterministic=True)
+    first = results.get(timeout=60)[1]
+
+    start = time.perf_counter()
+    _submit_identical(pool, model, results, "again", is_deterministic=True)
+    assert results.get(timeout=5) == ("again", first)
+    assert time.perf_counter() - start < 0.5
+
+    _submit_identical(pool, model, results, "not deterministic")
+    assert results.get(timeout=60)[0] == "not deterministic"
+
+
+def _echo_batch_target(job_ids, queue, model, input_bounds, algorithm_path, neuron_pairs, num_directions,
+                       output_layer_mode, neural_network=None):
+    for job_id, neurons in zip(job_ids, neuron_pairs):
+        queue.put((job_id, Success(("batch", job_ids.__len__(), neurons))))
+
+
+def test_similar_queued_jobs_run_as_one_batch(pool_factory):
+    pool = pool_factory(size=1, target=_echo_target, batch_target=_echo_batch_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    _submit(pool, model, 100, results)  # keeps the worker busy while the pairs are queued
+    for layer in range(3):
+        pool.submit(model, np.zeros((2, 2)), "unused.py", [(layer, 0), (layer, 1)], 4,
+                    lambda result, layer=layer: results.put((layer, result)))
+    pool.submit(model, np.ones((2, 2)), "unused.py", [(0, 0), (0, 1)], 4, lambda result: results.put(("other", result)))
+
+    received = dict(results.get(timeout=60) for _ in range(5))
+    assert received[100].data == (5, 100)
+    for layer in range(3):
+        assert received[layer].data == ("batch", 3, [(layer, 0), (layer, 1)])
+    assert received["other"].data == (5, 4)  # different bounds are not batched
+
+
+def test_deterministic_results_survive_the_session(pool_factory, tmp_path):
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+    pool = pool_factory(size=1, target=_echo_target)
+    _submit_identical(pool, model, results, "first", is_deterministic=True)
+    first = results.get(timeout=60)[1]
+    pool.shutdown()
+
+    pool = pool_factory(size=1, target=_echo_target, result_cache=ResultCache(str(tmp_path / "cache")))
+    start = time.perf_counter()
+    _submit_identical(pool, model, results, "reopened", is_deterministic=True)
+    name, result = results.get(timeout=5)
+    assert name == "reopened" and result.data == first.data
+    assert time.perf_counter() - start < 0.5
+
+
+def _partial_target(job_id, queue, model, input_bounds, algorithm_path, selected_neurons, num_directions,
+                    output_layer_mode, neural_network=None):
+    for finished in range(1, num_directions):
+        queue.put((job_id, ("partial", finished)))
+    queue.put((job_id, Success(("done", num_directions))))
+
+
+def _network_ir_target(job_id, queue, model, input_bounds, algorithm_path, selected_neurons, num_directions,
+                       output_layer_mode, neural_network=None):
+    queue.put((job_id, Success((neural_network.model is model, id(neural_network.ir), neural_network.ir.input_shape))))
+
+
+def test_workers_keep_the_network_ir_with_their_cached_model(pool_factory):
+    pool = pool_factory(size=1, target=_network_ir_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    _submit(pool, model, 1, results)
+    first = results.get(timeout=60)[1].data
+    _submit(pool, model, 2, results)
+    second = results.get(timeout=60)[1].data
+
+    assert first[0] and first[2] == (4,)
+    assert first == second  # the second job reuses the NetworkIR of the first
+
+
+def test_intermediate_results_are_forwarded(pool_factory):
+    pool = pool_factory(size=1, target=_partial_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    pool.submit(model, np.zeros((2, 2)), "unused.py", [(0, 0), (0, 1)], 3, results.put,
+                on_partial=lambda partial: results.put(partial))
+
+    assert [results.get(timeout=60) for _ in range(2)] == [("partial", 1), ("partial", 2)]
+    assert results.get(timeout=60).data == ("done", 3)
+
+
+def test_jobs_over_their_time_limit_fail_and_free_the_worker(pool_factory):
+    pool = pool_factory(size=1, target=_echo_target)
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    results = Queue()
+
+    pool.submit(model, np.zeros((2, 2)), "unused.py", [(0, 0), (0, 1)], -1, results.put, time_limit=0.5)
+    error = results.get(timeout=30).error
+    assert isinstance(error, ResourceLimitExceeded) and error.kind == TIME_LIMIT
+
+    _submit(pool, model, 3, results)  # served by the replacement worker
+    num_directions, result = results.get(timeout=60)
+    assert num_directions == 3 and result.is_success
@@ -0,0 +1,63 @@
+import gc
+import weakref
+
+import numpy as np
+import onnx
+import pytest
+
+from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+from nn_verification_visualisation.controller.process_manager.network_modifier import NetworkModifier
+from nn_verification_visualisation.model.data.network_ir import NetworkIR
+from nn_verification_visualisation.model.data.neural_network import NeuralNetwork
+from nn_verification_visualisation.model.data_loader.neural_network_loader import NeuralNetworkLoader
+
+
+def test_network_ir_is_decoded_once_when_it_is_needed(monkeypatch):
+    decoded = []
+    from_model = NetworkIR.from_model
+    monkeypatch.setattr(NetworkIR, "from_model", staticmethod(
+        lambda model, reuse=None: decoded.append(model) or from_model(model, reuse)))
+    result = NeuralNetworkLoader().load_neural_network("TestFiles/NN3.onnx")
+    assert result.is_success, result.error
+    network = result.data
+    model = network.model
+    assert decoded == []  # loading does not decode the network
+
+    ir = network.ir
+    assert ir is network.ir and decoded == [model]
+    assert [layer.op_type for layer in ir.layers] == ["Gemm", "Relu", "Gemm", "Relu", "Gemm"]
+    assert ir.input_name == model.graph.input[0].name and ir.input_shape == (4,)
+    for initializer, array in zip(model.graph.initializer, ir.initializers.values()):
+        assert array.dtype == np.float64
+        np.testing.assert_array_equal(array, onnx.numpy_helper.to_array(initializer))
+    assert [weight.shape for weight in ir.linear_weights] == [(4, 8), (8, 8), (8, 2)]
+
+    # the shared arrays can't be changed by one of their users
+    with pytest.raises(ValueError):
+        ir.linear_weights[0][0, 0] = 1.0
+    with pytest.raises(TypeError):
+        ir.initializers["new"] = np.zeros(1)
+
+
+def test_network_ir_is_freed_with_the_network():
+    network = NeuralNetwork("NN3", "TestFiles/NN3.onnx", onnx.load("TestFiles/NN3.onnx"))
+    ir = weakref.ref(network.ir)
+
+    del network
+    gc.collect()
+    assert ir() is None
+
+
+def test_network_ir_of_the_in_place_tap_head_shares_the_weights():
+    model = onnx.load("TestFiles/NN3.onnx")
+    ir = NetworkIR.from_model(model)
+    directions = AlgorithmExecutor().calculate_directions(4)
+
+    with NetworkModifier().tapped_network(model, [(1, 0), (2, 1)], directions) as tapped:
+        tapped_ir = NetworkIR.from_model(tapped, reuse=ir)
+        assert tapped_ir.output_names == ("tap_output",)
+        # the weights of the network are shared, only the head is decoded
+        assert all(tapped_ir.initializers[name] is array for name, array in ir.initializers.items())
+        assert tapped_ir.initializers["output_initializer_W"].shape == (2, 4)
+
+    assert [layer.op_type for layer in NetworkIR.from_model(model).layers] == [layer.op_type for layer in ir.layers]
@@ -24,3 +24,27 @@ def test_algorithm_loader_loads_simple_algorithm(tmp_path):
     assert algo.name == "My Test Algo"
     assert algo.path == str(algo_file)
     assert algo.is_deterministic is True
+
+
+def test_algorithm_loader_finds_the_optional_network_ir_function(tmp_path):
+    from nn_verification_visualisation.model.data_loader.algorithm_loader import AlgorithmLoader
+
+    algo_file = tmp_path / "ir_algo.py"
+    algo_file.write_text(
+        "def calculate_output_bounds(onnx_model, input_bounds):\n"
+        "    return input_bounds\n"
+        "\n"
+        "def calculate_output_bounds_ir(network, input_bounds):\n"
+        "    return input_bounds\n",
+        encoding="utf-8",
+    )
+    plain_file = tmp_path / "plain_algo.py"
+    plain_file.write_text("def calculate_output_bounds(onnx_model, input_bounds):\n    return input_bounds\n",
+                          encoding="utf-8")
+
+    res = AlgorithmLoader.load_calculate_output_bounds_ir(str(algo_file))
+    assert res.is_success and res.data.__name__ == "calculate_output_bounds_ir"
+    assert AlgorithmLoader.load_calculate_output_bounds_ir(str(plain_file)).data is None
+
+    AlgorithmLoader.forget(str(algo_file))
+    assert str(algo_file.resolve()) not in AlgorithmLoader._ir_fn_cache
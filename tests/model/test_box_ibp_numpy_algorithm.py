@@ -1,3 +1,4 @@
+import importlib.util
 from itertools import product
 from pathlib import Path
 
@@ -46,3 +47,23 @@ def test_box_ibp_numpy_is_sound_for_nn1():
 
     assert np.all(interval_bounds[:, 0] <= exact_bounds[:, 0] + 1e-9)
     assert np.all(interval_bounds[:, 1] >= exact_bounds[:, 1] - 1e-9)
+
+
+def test_box_ibp_numpy_batched_matches_single_boxes():
+    repo_root = Path(__file__).resolve().parents[2]
+    spec = importlib.util.spec_from_file_location("box_ibp_numpy", repo_root / "algorithms" / "box_ibp_numpy.py")
+    box_ibp_numpy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(box_ibp_numpy)
+    model = onnx.load(repo_root / "TestFiles" / "NN1.onnx")
+
+    input_dim = model.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(5, input_dim))
+    radii = rng.uniform(0.0, 1.0, (5, input_dim))
+    boxes = np.stack([centers - radii, centers + radii], axis=2)
+
+    batched = box_ibp_numpy.calculate_output_bounds_batched(model, boxes)
+
+    assert batched.shape[0] == 5 and batched.shape[2] == 2
+    for box, bounds in zip(boxes, batched):
+        assert np.allclose(bounds, box_ibp_numpy.calculate_output_bounds(model, box))
@@ -0,0 +1,231 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+import pytest
+from onnx import helper, numpy_helper, TensorProto
+
+from nn_verification_visualisation.controller.process_manager.network_compiler import conv, conv_geometry
+from nn_verification_visualisation.model.data.network_ir import NetworkIR, NetworkLayer
+from nn_verification_visualisation.model.data_loader.algorithm_loader import AlgorithmLoader
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ALGORITHMS = ["box_ibp_numpy.py", "simple_zonotope.py", "crown_numpy.py"]
+
+
+def _calculate_output_bounds(file_name: str):
+    result = AlgorithmLoader().load_calculate_output_bounds(str(REPO_ROOT / "algorithms" / file_name))
+    assert result.is_success, result.error
+    return result.data
+
+
+def _load_module(file_name: str):
+    spec = importlib.util.spec_from_file_location(Path(file_name).stem, REPO_ROOT / "algorithms" / file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _cnn() -> onnx.ModelProto:
+    """Normalized input, padded Conv with BatchNorm, strided grouped Conv, Flatten / Reshape and MatMul + Add."""
+    rng = np.random.default_rng(1)
+
+    def initializer(name, shape):
+        return numpy_helper.from_array(rng.normal(size=shape).astype(np.float32), name)
+
+    initializers = [
+        initializer("mean", (1, 2, 1, 1)), numpy_helper.from_array(np.full((1, 2, 1, 1), 0.5, np.float32), "std"),
+        initializer("w1", (4, 2, 3, 3)), initializer("b1", (4,)),
+        initializer("bn_scale", (4,)), initializer("bn_bias", (4,)), initializer("bn_mean", (4,)),
+        numpy_helper.from_array(np.full(4, 1.5, np.float32), "bn_var"),
+        initializer("w2", (4, 2, 2, 2)),
+        numpy_helper.from_array(np.array([1, -1], dtype=np.int64), "shape"),
+        initializer("w3", (36, 5)), initializer("b3", (5,)), initializer("w4", (36, 5)),
+    ]
+    nodes = [
+        helper.make_node("Sub", ["x", "mean"], ["centered"]),
+        helper.make_node("Div", ["centered", "std"], ["normalized"]),
+        helper.make_node("Conv", ["normalized", "w1", "b1"], ["conv1"], pads=[1, 1, 1, 1]),
+        helper.make_node("BatchNormalization", ["conv1", "bn_scale", "bn_bias", "bn_mean", "bn_var"], ["bn"]),
+        helper.make_node("Relu", ["bn"], ["relu1"]),
+        helper.make_node("Conv", ["relu1", "w2"], ["conv2"], strides=[2, 2], group=2, auto_pad="SAME_UPPER"),
+        helper.make_node("Relu", ["conv2"], ["relu2"]),
+        helper.make_node("Flatten", ["relu2"], ["flat"]),
+        helper.make_node("Reshape", ["flat", "shape"], ["features"]),
+        helper.make_node("MatMul", ["features", "w3"], ["matmul"]),
+        helper.make_node("Add", ["matmul", "b3"], ["dense"]),
+        helper.make_node("MatMul", ["features", "w4"], ["skip"]),
+        helper.make_node("Sub", ["dense", "skip"], ["y"]),
+    ]
+    graph = helper.make_graph(nodes, "cnn", [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 2, 6, 6])],
+                              [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 5])], initializers)
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+
+
+@pytest.mark.parametrize("file_name", ALGORITHMS)
+def test_cnn_bounds_enclose_onnxruntime(file_name):
+    model = _cnn()
+    session = ort.InferenceSession(model.SerializeToString())
+    rng = np.random.default_rng(0)
+    center = rng.normal(size=72)
+    input_bounds = np.column_stack([center - 0.05, center + 0.05])
+    samples = rng.uniform(input_bounds[:, 0], input_bounds[:, 1], (100, 72)).astype(np.float32)
+    outputs = np.concatenate([session.run(None, {"x": sample.reshape(1, 2, 6, 6)})[0] for sample in samples])
+
+    calculate_output_bounds = _calculate_output_bounds(file_name)
+    bounds = calculate_output_bounds(model, input_bounds)
+
+    assert bounds.shape == (5, 2)
+    assert np.all(bounds[:, 0] <= outputs.min(axis=0) + 1e-4)
+    assert np.all(bounds[:, 1] >= outputs.max(axis=0) - 1e-4)
+    # a point is propagated exactly
+    point = calculate_output_bounds(model, np.column_stack([center, center]))
+    expected = session.run(None, {"x": center.astype(np.float32).reshape(1, 2, 6, 6)})[0][0]
+    assert np.allclose(point, expected[:, None], atol=1e-4)
+
+
+@pytest.mark.parametrize("file_name", ALGORITHMS)
+def test_matmul_add_networks_match_their_gemm_version(file_name):
+    calculate_output_bounds = _calculate_output_bounds(file_name)
+    for name in ("IR11_1", "IR11_2"):
+        model = onnx.load(REPO_ROOT / "TestFiles" / f"{name}.onnx")
+        gemm_model = onnx.load(REPO_ROOT / "TestFiles" / f"{name}_gemm.onnx")
+        input_dim = model.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+        input_bounds = np.column_stack([np.full(input_dim, -0.5), np.full(input_dim, 0.5)])
+
+        assert np.allclose(calculate_output_bounds(model, input_bounds),
+                           calculate_output_bounds(gemm_model, input_bounds))
+
+
+def test_zonotope_order_reduction_stays_sound():
+    simple_zonotope = _load_module("simple_zonotope.py")
+    rng = np.random.default_rng(0)
+    generators = rng.normal(size=(40, 6)) * rng.uniform(0.0, 2.0, (40, 1))
+    generators[3] = 0.0
+    center = rng.normal(size=6)
+
+    _, reduced, symbols = simple_zonotope._reduce_order(center, generators, np.arange(40), 40, 2)
+
+    assert reduced.shape[0] <= 2 * 6 and symbols.shape[0] == reduced.shape[0]
+    assert np.all(symbols[-6:] >= 40)  # the box gets new noise symbols
+    assert np.all(np.abs(reduced).sum(axis=0) >= np.abs(generators).sum(axis=0) - 1e-9)
+
+    model = _cnn()
+    session = ort.InferenceSession(model.SerializeToString())
+    center = rng.normal(size=72)
+    input_bounds = np.column_stack([center - 0.05, center + 0.05])
+    samples = rng.uniform(input_bounds[:, 0], input_bounds[:, 1], (100, 72)).astype(np.float32)
+    outputs = np.concatenate([session.run(None, {"x": sample.reshape(1, 2, 6, 6)})[0] for sample in samples])
+    full = simple_zonotope.calculate_output_bounds(model, input_bounds)
+    simple_zonotope.MAX_ORDER = 2
+    bounds = simple_zonotope.calculate_output_bounds(model, input_bounds)
+
+    assert np.all(bounds[:, 0] <= outputs.min(axis=0) + 1e-4)
+    assert np.all(bounds[:, 1] >= outputs.max(axis=0) - 1e-4)
+    assert np.all(bounds[:, 1] - bounds[:, 0] >= full[:, 1] - full[:, 0] - 1e-9)
+
+
+def test_zonotope_order_reduction_keeps_wide_layers():
+    simple_zonotope = _load_module("simple_zonotope.py")
+    rng = np.random.default_rng(2)
+    width = 1100  # more features than generators were allowed in total before the limit was an order
+    initializers = [
+        numpy_helper.from_array(rng.normal(size=(4, width)).astype(np.float32), "w1"),
+        numpy_helper.from_array(rng.normal(size=width).astype(np.float32), "b1"),
+        numpy_helper.from_array((rng.normal(size=(width, width)) / np.sqrt(width)).astype(np.float32), "w2"),
+        numpy_helper.from_array(rng.normal(size=width).astype(np.float32), "b2"),
+        numpy_helper.from_array((rng.normal(size=(width, 2)) / np.sqrt(width)).astype(np.float32), "w3"),
+    ]
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["x", "w1"], ["h1"]), helper.make_node("Add", ["h1", "b1"], ["a1"]),
+         helper.make_node("Relu", ["a1"], ["r1"]), helper.make_node("MatMul", ["r1", "w2"], ["h2"]),
+         helper.make_node("Add", ["h2", "b2"], ["a2"]), helper.make_node("Relu", ["a2"], ["r2"]),
+         helper.make_node("MatMul", ["r2", "w3"], ["y"])],
+        "wide",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 4])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 2])],
+        initializers,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    input_bounds = np.column_stack([np.full(4, -1.0), np.full(4, 1.0)])
+
+    bounds = simple_zonotope.calculate_output_bounds(model, input_bounds)
+    simple_zonotope.MAX_ORDER = 10 ** 9
+    unreduced = simple_zonotope.calculate_output_bounds(model, input_bounds)
+
+    assert np.all(bounds[:, 1] - bounds[:, 0] <= unreduced[:, 1] - unreduced[:, 0] + 1e-9)
+
+
+@pytest.mark.parametrize("file_name", ALGORITHMS)
+def test_tapped_pre_activations_are_not_overwritten(file_name):
+    from nn_verification_visualisation.controller.process_manager.network_modifier import NetworkModifier
+
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN1.onnx")
+    # the tapped hidden tensors are read by the ReLU and by the head, so the ReLU must not work in place
+    tapped = NetworkModifier().tapped_output_layer(model, [(1, 0), (2, 1), (3, 2)],
+                                                   [(1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)])
+    session = ort.InferenceSession(tapped.SerializeToString())
+    rng = np.random.default_rng(0)
+    input_bounds = np.column_stack([np.full(4, -1.0), np.full(4, 1.0)])
+    samples = rng.uniform(-1.0, 1.0, (500, 4)).astype(np.float32)
+    outputs = np.concatenate([session.run(None, {tapped.graph.input[0].name: sample[None]})[0] for sample in samples])
+
+    bounds = _calculate_output_bounds(file_name)(tapped, input_bounds)
+
+    assert outputs.min() < 0.0
+    assert np.all(bounds[:, 0] <= outputs.min(axis=0) + 1e-5)
+    assert np.all(bounds[:, 1] >= outputs.max(axis=0) - 1e-5)
+
+
+@pytest.mark.parametrize("file_name", ["simple_zonotope.py", "crown_numpy.py"])
+def test_relaxations_are_tighter_than_intervals(file_name):
+    model = _cnn()
+    input_bounds = np.column_stack([np.full(72, -0.1), np.full(72, 0.1)])
+
+    box = _calculate_output_bounds("box_ibp_numpy.py")(model, input_bounds)
+    bounds = _calculate_output_bounds(file_name)(model, input_bounds)
+
+    assert np.all(bounds[:, 1] - bounds[:, 0] < box[:, 1] - box[:, 0])
+
+
+def test_crown_conv_transpose_is_the_adjoint():
+    crown_numpy = _load_module("crown_numpy.py")
+    rng = np.random.default_rng(0)
+    weight = rng.normal(size=(4, 2, 3, 2))
+    node = helper.make_node("Conv", ["x", "w"], ["y"], strides=[2, 1], pads=[1, 0, 2, 1], dilations=[1, 2], group=2)
+    geometry = conv_geometry(NetworkLayer.from_node(node), (4, 7, 6), weight)
+    inputs = rng.normal(size=(3, 168))
+    outputs = conv(inputs, weight, geometry)
+    coefficients = rng.normal(size=(5, outputs.shape[1]))
+
+    assert np.allclose(coefficients @ outputs.T, crown_numpy._conv_transpose(coefficients, weight, geometry) @ inputs.T)
+
+
+@pytest.mark.parametrize("file_name", ALGORITHMS)
+def test_tap_mode_runs_the_network_ir_function(file_name, monkeypatch):
+    from nn_verification_visualisation.controller.process_manager.algorithm_executor import AlgorithmExecutor
+    from nn_verification_visualisation.controller.process_manager.network_modifier import TAP_OUTPUT_LAYER_MODE
+
+    model = onnx.load(REPO_ROOT / "TestFiles" / "NN3.onnx")
+    input_bounds = np.column_stack([np.full(4, -1.0), np.full(4, 1.0)])
+    directions = AlgorithmExecutor().calculate_directions(8)
+    module = _load_module(file_name)
+    expected = AlgorithmExecutor.run_algorithm(module.calculate_output_bounds, model, input_bounds, [(1, 0), (2, 1)],
+                                               directions, TAP_OUTPUT_LAYER_MODE)
+
+    network = AlgorithmExecutor.network_of(model, TAP_OUTPUT_LAYER_MODE, module.calculate_output_bounds_ir)
+    decoded = []
+    from_model = NetworkIR.from_model
+    monkeypatch.setattr(NetworkIR, "from_model", staticmethod(
+        lambda model, reuse=None: decoded.append(reuse) or from_model(model, reuse)))
+    for _ in range(2):
+        bounds = AlgorithmExecutor.run_algorithm(module.calculate_output_bounds, model, input_bounds,
+                                                 [(1, 0), (2, 1)], directions, TAP_OUTPUT_LAYER_MODE,
+                                                 calculate_output_bounds_ir=module.calculate_output_bounds_ir,
+                                                 network=network)
+        assert np.allclose(bounds, expected)
+
+    # the model is decoded once per job, the tapped networks of its runs are built from that one
+    assert decoded == [network, network]
@@ -22,6 +22,7 @@ def make_config(layers: list[int], name: str = "TestNet") -> Mock:
     config.network.model = Mock()
     config.network.model.graph.initializer = []
     config.network.model.graph.node = []
+    config.network.ir.linear_weights = []
     config.layers_dimensions = layers
     return config
 
@@ -18,6 +18,8 @@ class FakePairLoadingWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.set_status = MagicMock()
+        self.set_partial_polygon = MagicMock()
+        self.set_metrics = MagicMock()
         self.status = None
         self.error = None
 
@@ -95,9 +97,9 @@ class TestComparisonLoadingWidgetInitialisation:
         assert calls[0][0][0] == "Pair 0"
         assert calls[1][0][0] == "Pair 1"
 
-    def test_all_loaders_start_with_ongoing_status(self, widget_setup):
+    def test_all_loaders_start_with_queued_status(self, widget_setup):
         for pair in widget_setup["pair_instances"]:
-            pair.set_status.assert_called_with(Status.Ongoing)
+            pair.set_status.assert_called_with(Status.Queued)
 
     def test_continue_button_is_hidden_initially(self, widget_setup):
         widget = widget_setup["widget"]
@@ -244,6 +246,72 @@ class TestOnClicked:
         controller.current_plot_view.open_dialog.assert_not_called()
 
 
+class TestStatusUpdated:
+    def test_running_status_replaces_queued_status(self, widget_setup):
+        widget = widget_setup["widget"]
+        pair_instances = widget_setup["pair_instances"]
+        pair_instances[0].status = Status.Queued
+
+        widget.status_updated(0, Status.Ongoing)
+
+        pair_instances[0].set_status.assert_called_with(Status.Ongoing)
+
+    def test_finished_pairs_keep_their_status(self, widget_setup):
+        widget = widget_setup["widget"]
+        pair_instances = widget_setup["pair_instances"]
+        pair_instances[1].status = Status.Done
+        pair_instances[1].set_status.reset_mock()
+
+        widget.status_updated(1, Status.Ongoing)
+
+        pair_instances[1].set_status.assert_not_called()
+
+    def test_exceeded_limits_get_their_own_status(self, widget_setup):
+        from nn_verification_visualisation.controller.process_manager.resource_limits import \
+            ResourceLimitExceeded, TIME_LIMIT
+        from nn_verification_visualisation.utils.result import Failure
+        widget = widget_setup["widget"]
+        pair_instances = widget_setup["pair_instances"]
+
+        widget.loading_updated(0, Failure(ResourceLimitExceeded(TIME_LIMIT, 10)))
+
+        pair_instances[0].set_status.assert_called_with(Status.LimitExceeded)
+
+    def test_partial_polygon_is_shown_while_computing(self, widget_setup):
+        widget = widget_setup["widget"]
+        pair_instances = widget_setup["pair_instances"]
+        pair_instances[0].status = Status.Ongoing
+        pair_instances[1].status = Status.Done
+        polygon = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
+
+        widget.partial_updated(0, polygon, 4)
+        widget.partial_updated(1, polygon, 4)
+
+        pair_instances[0].set_partial_polygon.assert_called_once_with(polygon, 4)
+        pair_instances[1].set_partial_polygon.assert_not_called()
+
+    def test_clicking_queued_loader_cancels_its_own_pair(self, widget_setup):
+        pair_instances = widget_setup["pair_instances"]
+        terminate_process = widget_setup["terminate_process"]
+        on_click = widget_setup["MockPairWidget"].call_args_list[0][0][1]
+        pair_instances[0].status = Status.Queued
+
+        on_click()
+
+        terminate_process.assert_called_once_with(0)
+
+    def test_showing_the_tab_prioritizes_its_pairs(self, qtbot):
+        prioritize = MagicMock()
+        with patch("nn_verification_visualisation.view.plot_view.comparison_loading_widget.PairLoadingWidget",
+                   side_effect=[FakePairLoadingWidget(), FakePairLoadingWidget()]):
+            widget = ComparisonLoadingWidget(make_mock_config(), make_mock_controller(), MagicMock(), prioritize)
+        qtbot.addWidget(widget)
+
+        widget.show()
+
+        prioritize.assert_called_once()
+
+
 class TestCreateDiagramTab:
     def test_create_diagram_button_delegates_to_controller(self, widget_setup):
         widget = widget_setup["widget"]
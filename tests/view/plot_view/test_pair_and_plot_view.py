@@ -42,6 +42,52 @@ def test_pair_loading_widget_updates_ui_for_each_status(qapp):
     assert widget._PairLoadingWidget__title.text() == "Pair A - Error"
 
 
+def test_pair_loading_widget_shows_queued_pairs_as_cancellable(qapp):
+    widget = PairLoadingWidget("Pair A", on_click=Mock())
+    widget.show()
+
+    widget.set_status(Status.Queued)
+    assert widget.status == Status.Queued
+    assert widget._PairLoadingWidget__button.isVisible() is True
+    assert widget._PairLoadingWidget__button.text() == "Cancel Execution"
+    assert widget._PairLoadingWidget__title.text() == "Pair A - Queued"
+
+
+def test_pair_loading_widget_shows_exceeded_limits(qapp):
+    widget = PairLoadingWidget("Pair A", on_click=Mock())
+    widget.show()
+
+    widget.set_status(Status.LimitExceeded)
+    assert widget._PairLoadingWidget__button.text() == "Show Error"
+    assert widget._PairLoadingWidget__title.text() == "Pair A - Limit exceeded"
+
+
+def test_pair_loading_widget_shows_partial_polygon(qapp):
+    widget = PairLoadingWidget("Pair A", on_click=Mock())
+    widget.show()
+    widget.set_status(Status.Queued)
+
+    widget.set_partial_polygon([(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)], 12)
+    assert widget.status == Status.Ongoing
+    assert widget._PairLoadingWidget__preview.isVisible() is True
+    assert widget._PairLoadingWidget__title.text() == "Pair A - Loading (12 directions)"
+    widget._PairLoadingWidget__preview.grab()  # paints the polygon
+
+    widget.set_status(Status.Done)
+    assert widget._PairLoadingWidget__preview.isVisible() is False
+
+
+def test_pair_loading_widget_shows_metrics(qapp):
+    from nn_verification_visualisation.controller.process_manager.job_metrics import JobMetrics
+
+    widget = PairLoadingWidget("Pair A", on_click=Mock())
+    widget.set_status(Status.Done)
+
+    widget.set_metrics(JobMetrics({"algorithm": 1.0, "dispatch": 0.25}, {"algorithm": 64 * 1024 ** 2}))
+    assert widget._PairLoadingWidget__title.text() == "Pair A - Completed in 1.25 s"
+    assert widget.toolTip() == "dispatch: 0.250 s\nalgorithm: 1.000 s, peak 64 MiB"
+
+
 def test_pair_loading_widget_button_click_delegates_to_callback(qapp):
     callback = Mock()
     widget = PairLoadingWidget("Pair A", on_click=callback)
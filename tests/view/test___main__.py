@@ -13,6 +13,7 @@ def mocked_main(mocker):
     mock_color_manager = mocker.Mock()
     mock_window = mocker.Mock()
     mock_storage = mocker.Mock()
+    mock_storage.verification_server = None
 
     mocks = {
         'qapp_class': mocker.patch('nn_verification_visualisation.__main__.QApplication', return_value=mock_app),
@@ -20,6 +21,7 @@ def mocked_main(mocker):
         'main_window_class': mocker.patch('nn_verification_visualisation.__main__.MainWindow', return_value=mock_window),
         'storage_class': mocker.patch('nn_verification_visualisation.__main__.Storage', return_value=mock_storage),
         'mp': mocker.patch('nn_verification_visualisation.__main__.mp'),
+        'worker_pool_class': mocker.patch('nn_verification_visualisation.__main__.WorkerPool'),
         'sys_exit': mocker.patch('sys.exit'),
         'app': mock_app,
         'color_manager': mock_color_manager,
@@ -80,4 +82,23 @@ class TestMain:
     def test_main_connect_to_about_to_quit(self, mocked_main):
         from nn_verification_visualisation.__main__ import main
         main()
-        mocked_main['app'].aboutToQuit.connect.assert_called_once()
\ No newline at end of file
+        mocked_main['app'].aboutToQuit.connect.assert_called_once()
+
+    def test_main_warms_up_and_stops_the_worker_pool(self, mocked_main):
+        from nn_verification_visualisation.__main__ import main
+        main()
+        worker_pool = mocked_main['worker_pool_class'].return_value
+        worker_pool.start.assert_called_once()
+
+        mocked_main['app'].aboutToQuit.connect.call_args[0][0]()
+        mocked_main['storage'].save_to_disk.assert_called_once()
+        worker_pool.shutdown.assert_called_once()
+
+    def test_main_has_no_local_workers_with_a_verification_server(self, mocked_main):
+        from nn_verification_visualisation.__main__ import main
+        mocked_main['storage'].verification_server = "compute-host:8765"
+        main()
+        mocked_main['worker_pool_class'].assert_not_called()
+
+        mocked_main['app'].aboutToQuit.connect.call_args[0][0]()
+        mocked_main['storage'].save_to_disk.assert_called_once()